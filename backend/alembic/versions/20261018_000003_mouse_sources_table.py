@@ -0,0 +1,62 @@
+"""move raw upstream payloads out of mice into mouse_sources
+
+Revision ID: 20261018_000003
+Revises: 20260226_000001
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000003"
+down_revision = "20260226_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS mouse_sources (
+            mouse_id TEXT PRIMARY KEY REFERENCES mice (id) ON DELETE CASCADE,
+            source TEXT,
+            payload JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'mice' AND column_name = 'source_payload'
+            ) THEN
+                INSERT INTO mouse_sources (mouse_id, source, payload, updated_at)
+                SELECT id, source, source_payload, updated_at
+                FROM mice
+                WHERE source_payload IS NOT NULL
+                ON CONFLICT (mouse_id) DO NOTHING;
+            END IF;
+        END
+        $$;
+        """
+    )
+    op.execute("ALTER TABLE mice DROP COLUMN IF EXISTS source_payload;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE mice ADD COLUMN IF NOT EXISTS source_payload JSONB;")
+    op.execute(
+        """
+        UPDATE mice
+        SET source_payload = mouse_sources.payload
+        FROM mouse_sources
+        WHERE mouse_sources.mouse_id = mice.id;
+        """
+    )
+    op.execute("DROP TABLE IF EXISTS mouse_sources;")
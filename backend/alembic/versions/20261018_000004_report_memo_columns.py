@@ -0,0 +1,38 @@
+"""memoization keys on reports: the measurement, grip and catalog version behind each one
+
+Revision ID: 20261018_000004
+Revises: 20261018_000003
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000004"
+down_revision = "20261018_000003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE reports
+            ADD COLUMN IF NOT EXISTS measurement_id BIGINT,
+            ADD COLUMN IF NOT EXISTS grip_id BIGINT,
+            ADD COLUMN IF NOT EXISTS catalog_version TEXT;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE reports
+            DROP COLUMN IF EXISTS catalog_version,
+            DROP COLUMN IF EXISTS grip_id,
+            DROP COLUMN IF EXISTS measurement_id;
+        """
+    )
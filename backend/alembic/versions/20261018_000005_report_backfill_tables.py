@@ -0,0 +1,45 @@
+"""report backfill bookkeeping: per-version mouse fingerprints and resumable checkpoints
+
+Revision ID: 20261018_000005
+Revises: 20261018_000004
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000005"
+down_revision = "20261018_000004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_fingerprints (
+            catalog_version TEXT PRIMARY KEY,
+            fingerprints JSONB NOT NULL,
+            recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_backfill_checkpoints (
+            catalog_version TEXT PRIMARY KEY,
+            last_report_id BIGINT NOT NULL DEFAULT 0,
+            rescored INTEGER NOT NULL DEFAULT 0,
+            restamped INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            completed_at TIMESTAMPTZ
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS report_backfill_checkpoints;")
+    op.execute("DROP TABLE IF EXISTS catalog_fingerprints;")
@@ -0,0 +1,174 @@
+"""monthly range partitions for measurements, grips and reports, plus daily rollup tables
+
+Rewrites each table into a partitioned copy (one partition per month of existing rows, three
+months ahead, and a default partition), keeping its id sequence so report -> measurement/grip
+ids stay valid. The copy holds an exclusive lock on each table; run it in a maintenance window.
+
+Revision ID: 20261018_000006
+Revises: 20261018_000005
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000006"
+down_revision = "20261018_000005"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = {
+    "measurements": """
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        length_mm DOUBLE PRECISION NOT NULL,
+        width_mm DOUBLE PRECISION NOT NULL,
+        length_cm DOUBLE PRECISION NOT NULL,
+        width_cm DOUBLE PRECISION NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    """,
+    "grips": """
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        grip TEXT NOT NULL,
+        confidence DOUBLE PRECISION NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    """,
+    "reports": """
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        report_json JSONB NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        measurement_id BIGINT,
+        grip_id BIGINT,
+        catalog_version TEXT
+    """,
+}
+
+
+def _column_names(table: str) -> str:
+    return ", ".join(["id"] + [line.split()[0] for line in COLUMNS[table].strip().rstrip(",").split(",\n")])
+
+
+def _is_partitioned(table: str) -> bool:
+    row = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    )
+    return row.first() is not None
+
+
+def _create_indexes(table: str) -> None:
+    op.execute(f"CREATE INDEX IF NOT EXISTS {table}_session_id_id_idx ON {table} (session_id, id DESC);")
+    op.execute(f"CREATE INDEX IF NOT EXISTS {table}_user_id_id_idx ON {table} (user_id, id DESC);")
+
+
+def upgrade() -> None:
+    for table in COLUMNS:
+        if _is_partitioned(table):
+            continue
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned;")
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey;")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE;")
+        op.execute(
+            f"""
+            CREATE TABLE {table} (
+                id BIGINT NOT NULL DEFAULT nextval('{table}_id_seq'),
+                {COLUMNS[table].strip()},
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            """
+        )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;")
+        op.execute(
+            f"""
+            DO $$
+            DECLARE
+                month DATE := date_trunc(
+                    'month', COALESCE((SELECT MIN(created_at) FROM {table}_unpartitioned), NOW()) AT TIME ZONE 'UTC'
+                )::date;
+                last_month DATE := (
+                    date_trunc('month', NOW() AT TIME ZONE 'UTC') + INTERVAL '{MONTHS_AHEAD} months'
+                )::date;
+            BEGIN
+                WHILE month <= last_month LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                        '{table}_p' || to_char(month, 'YYYYMM'),
+                        month::timestamp AT TIME ZONE 'UTC',
+                        (month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+                    );
+                    month := (month + INTERVAL '1 month')::date;
+                END LOOP;
+            END
+            $$;
+            """
+        )
+        columns = _column_names(table)
+        op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_unpartitioned;")
+        op.execute(f"DROP TABLE {table}_unpartitioned;")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id;")
+        _create_indexes(table)
+        op.execute(f"ANALYZE {table};")
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS measurement_daily_histogram (
+            day DATE NOT NULL,
+            length_bucket_mm SMALLINT NOT NULL,
+            width_bucket_mm SMALLINT NOT NULL,
+            measurements INTEGER NOT NULL,
+            PRIMARY KEY (day, length_bucket_mm, width_bucket_mm)
+        );
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS grip_daily_counts (
+            day DATE NOT NULL,
+            grip TEXT NOT NULL,
+            grips INTEGER NOT NULL,
+            confidence_sum DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (day, grip)
+        );
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_daily_counts (
+            day DATE NOT NULL,
+            scoring_profile TEXT NOT NULL,
+            reports INTEGER NOT NULL,
+            PRIMARY KEY (day, scoring_profile)
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS report_daily_counts;")
+    op.execute("DROP TABLE IF EXISTS grip_daily_counts;")
+    op.execute("DROP TABLE IF EXISTS measurement_daily_histogram;")
+    for table in COLUMNS:
+        if not _is_partitioned(table):
+            continue
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned;")
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey;")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE;")
+        op.execute(
+            f"""
+            CREATE TABLE {table} (
+                id BIGINT NOT NULL DEFAULT nextval('{table}_id_seq') PRIMARY KEY,
+                {COLUMNS[table].strip()}
+            );
+            """
+        )
+        columns = _column_names(table)
+        op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_partitioned;")
+        op.execute(f"DROP TABLE {table}_partitioned;")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id;")
+        _create_indexes(table)
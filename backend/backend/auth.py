@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import jwt
-from jwt import InvalidTokenError, PyJWKClient
+from jwt import InvalidTokenError, PyJWK, PyJWKClient, PyJWKClientError
 
 from backend import config
 
+LOGGER = logging.getLogger("mousefit.auth")
+
 SUPPORTED_JWT_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
 
 
@@ -33,15 +41,188 @@ class AuthContext:
         return None
 
 
+class VerifiedTokenCache:
+    """
+    Per-worker LRU of the AuthContext of tokens that passed verification, keyed by a SHA-256
+    of the token, so repeat requests skip the JWKS lookup and signature check. An entry is
+    served until `margin_sec` before the token's `exp`; tokens without `exp` are not cached.
+    A signing key removed from the JWKS therefore only stops tokens not yet seen by this worker.
+    At most `max_entries` tokens are kept; 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 10000, margin_sec: float = 30.0) -> None:
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._margin_sec = margin_sec
+        self._entries: "OrderedDict[bytes, Tuple[AuthContext, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str, count_miss: bool = True) -> Optional[AuthContext]:
+        """The cached context, if fresh. `count_miss=False` for a lookup a full verification will repeat."""
+        if self._max_entries <= 0:
+            return None
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                self._entries.pop(key, None)
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, context: AuthContext) -> None:
+        exp = context.claims.get("exp")
+        if self._max_entries <= 0 or isinstance(exp, bool) or not isinstance(exp, (int, float)):
+            return
+        valid_until = float(exp) - self._margin_sec
+        if valid_until <= time.time():
+            return
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (context, valid_until)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+VERIFIED_TOKENS = VerifiedTokenCache(
+    max_entries=config.AUTH_TOKEN_CACHE_SIZE, margin_sec=config.AUTH_TOKEN_CACHE_MARGIN_SEC
+)
+
+
+class JwksCache:
+    """
+    Signing keys of the JWKS endpoint, fetched at startup and then refreshed by a background
+    thread every `refresh_sec` (randomized by +/- `jitter` so workers do not fetch in step).
+    Verifying a token signed by a known key never waits on the endpoint. A token naming an
+    unknown kid (a rotation between refreshes) waits for a fetch already in flight, then
+    fetches once itself if the key is still missing, at most every `min_refetch_sec`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_sec: float = 300.0,
+        jitter: float = 0.1,
+        timeout_sec: float = 5.0,
+        min_refetch_sec: float = 30.0,
+    ) -> None:
+        self._client = PyJWKClient(url, cache_jwk_set=False, timeout=timeout_sec)
+        self._refresh_sec = refresh_sec
+        self._jitter = jitter
+        self._timeout_sec = timeout_sec
+        self._min_refetch_sec = min_refetch_sec
+        self._fetch_lock = threading.Lock()
+        self._keys: Dict[str, PyJWK] = {}
+        self._last_refetch = float("-inf")
+        self._first_attempt = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.fetches = 0
+        self.failures = 0
+
+    def refresh(self) -> None:
+        """Fetch the key set, after any fetch already running."""
+        with self._fetch_lock:
+            self._fetch()
+
+    def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            key = self._refetch(kid)
+        if key is None:
+            raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    def _refetch(self, kid: Optional[str]) -> Optional[PyJWK]:
+        # Verification runs in the threadpool, so waiting here does not stall the event loop; a
+        # fetch in flight when the key rotated may already bring it. The wait is bounded like a fetch.
+        if not self._fetch_lock.acquire(timeout=self._timeout_sec):
+            LOGGER.warning("jwks_refetch_wait_timed_out kid=%s", kid)
+            return self._keys.get(kid)
+        try:
+            key = self._keys.get(kid)
+            if key is not None or time.monotonic() - self._last_refetch < self._min_refetch_sec:
+                return key
+            self._last_refetch = time.monotonic()
+            try:
+                self._fetch()
+            except Exception:
+                LOGGER.exception("jwks_refetch_failed kid=%s", kid)
+            return self._keys.get(kid)
+        finally:
+            self._fetch_lock.release()
+
+    def _fetch(self) -> None:
+        # Callers hold _fetch_lock.
+        try:
+            keys: List[PyJWK] = self._client.get_signing_keys(refresh=True)
+        except Exception:
+            self.failures += 1
+            raise
+        self._keys = {key.key_id: key for key in keys}
+        self.fetches += 1
+
+    def start(self, prefetch_timeout_sec: float) -> None:
+        """Start refreshing; waits up to `prefetch_timeout_sec` for the first fetch to finish."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mousefit-jwks-refresh", daemon=True)
+        self._thread.start()
+        if not self._first_attempt.wait(prefetch_timeout_sec) or not self._keys:
+            LOGGER.warning("jwks_prefetch_incomplete timeout_sec=%s", prefetch_timeout_sec)
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                delay = self._refresh_sec
+            except Exception:
+                LOGGER.exception("jwks_refresh_failed")
+                # Retry sooner while the endpoint is failing, but not in a tight loop.
+                delay = min(self._refresh_sec, max(self._min_refetch_sec, 1.0))
+            self._first_attempt.set()
+            self._stop.wait(delay * random.uniform(1 - self._jitter, 1 + self._jitter))
+
+
 @lru_cache(maxsize=1)
-def _jwks_client() -> PyJWKClient:
+def _jwks_client() -> JwksCache:
     if not config.SUPABASE_JWKS_URL:
         raise AuthError(
             "auth_not_configured",
             "SUPABASE_JWKS_URL (or SUPABASE_URL) is required when ENABLE_AUTH is enabled.",
             status_code=500,
         )
-    return PyJWKClient(config.SUPABASE_JWKS_URL)
+    return JwksCache(
+        config.SUPABASE_JWKS_URL, refresh_sec=config.JWKS_REFRESH_SEC, timeout_sec=config.JWKS_TIMEOUT_SEC
+    )
+
+
+def start_jwks_refresh() -> None:
+    """Prefetch the JWKS and keep it fresh in the background; call at startup when auth is on."""
+    _jwks_client().start(prefetch_timeout_sec=config.JWKS_TIMEOUT_SEC)
+
+
+def stop_jwks_refresh() -> None:
+    if _jwks_client.cache_info().currsize:
+        _jwks_client().stop()
 
 
 def parse_bearer_token(header_value: str | None) -> Optional[str]:
@@ -78,6 +259,11 @@ def verify_bearer_token(token: str) -> AuthContext:
     if not token:
         raise AuthError("auth_missing_token", "Missing bearer token.", status_code=401)
 
+    cached = VERIFIED_TOKENS.get(token)
+    if cached is not None:
+        return cached
+
+    # Blocks on the JWKS endpoint only for an unknown kid; async callers run this in a thread.
     try:
         algorithms = _jwt_algorithms_for_token(token)
         signing_key = _jwks_client().get_signing_key_from_jwt(token)
@@ -101,4 +287,6 @@ def verify_bearer_token(token: str) -> AuthContext:
     if not isinstance(user_id, str) or not user_id.strip():
         raise AuthError("auth_invalid_claims", "Token is missing a valid subject (sub).", status_code=401)
 
-    return AuthContext(user_id=user_id.strip(), claims=claims)
+    context = AuthContext(user_id=user_id.strip(), claims=claims)
+    VERIFIED_TOKENS.put(token, context)
+    return context
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+from backend import config
+from backend.catalog_events import CATALOG_LISTENER, CATALOG_WATERMARK_SQL, CatalogListener
+from backend.http_cache import PrecompressedBody
+from backend.scoring import ColumnarCatalog, FitLookupGrid
+from backend.search import SearchIndex
+from backend.spatial import FitGridIndex
+
+LOGGER = logging.getLogger("mousefit.catalog")
+
+Row = Dict[str, Any]
+Normalizer = Callable[[Row], Row]
+
+# Normalized columns only; raw upstream payloads live in mouse_sources and are fetched on demand.
+CATALOG_COLUMNS = (
+    "id",
+    "brand",
+    "model",
+    "variant",
+    "length_mm",
+    "width_mm",
+    "height_mm",
+    "weight_g",
+    "ergo",
+    "wired",
+    "shape",
+    "hump",
+    "grips",
+    "hands",
+    "product_url",
+    "image_url",
+    "source_handle",
+    "availability_status",
+    "shape_raw",
+    "hump_raw",
+    "hump_bucket",
+    "front_flare_raw",
+    "side_curvature_raw",
+    "side_profile",
+    "hand_compatibility",
+    "affiliate_links",
+    "brand_discount",
+    "discount_code",
+    "price_usd",
+    "price_status",
+)
+
+
+def encode_json(payload: Any) -> bytes:
+    # Compact UTF-8 either way, matching starlette's JSONResponse output for catalog rows.
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _watermark_version(watermark: str) -> str:
+    return hashlib.sha1(watermark.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of the mice table; replaced wholesale when the watermark moves."""
+
+    version: str
+    rows: Tuple[Row, ...]
+    by_id: Mapping[str, Row]
+    item_json: Mapping[str, bytes]
+    list_json: bytes
+    columns: ColumnarCatalog
+    fit_index: FitGridIndex
+    fit_grid: FitLookupGrid
+    search_index: SearchIndex
+    list_body: PrecompressedBody
+    built_at: float
+    _item_bodies: Dict[str, PrecompressedBody] = field(default_factory=dict, repr=False, compare=False)
+    _derived: Dict[Hashable, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def build(cls, version: str, rows: Iterable[Row]) -> "CatalogSnapshot":
+        ordered = tuple(rows)
+        item_json = {str(row["id"]): encode_json(row) for row in ordered}
+        by_id = {str(row["id"]): row for row in ordered}
+        list_json = b"[" + b",".join(item_json[str(row["id"])] for row in ordered) + b"]"
+        columns = ColumnarCatalog.from_rows(ordered)
+        return cls(
+            version=version,
+            rows=ordered,
+            by_id=by_id,
+            item_json=item_json,
+            list_json=list_json,
+            columns=columns,
+            fit_index=FitGridIndex(columns.length_mm, columns.width_mm, columns.height_mm),
+            fit_grid=FitLookupGrid(columns, validate=config.FIT_GRID_VALIDATE),
+            search_index=SearchIndex(ordered),
+            list_body=PrecompressedBody(version, list_json),
+            built_at=time.time(),
+        )
+
+    def item_body(self, mouse_id: str) -> Optional[PrecompressedBody]:
+        body = self._item_bodies.get(mouse_id)
+        if body is None:
+            raw = self.item_json.get(mouse_id)
+            if raw is None:
+                return None
+            # Per-item content hash, so a mouse untouched by a sync keeps its validator.
+            body = self._item_bodies.setdefault(mouse_id, PrecompressedBody(hashlib.sha1(raw).hexdigest()[:16], raw))
+        return body
+
+    def derived(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """A value computed once per snapshot from its rows (e.g. a sort order), built on first use."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            return self._derived.setdefault(key, build())
+
+
+class CatalogCache:
+    """
+    Per-worker catalog snapshot keyed by the MAX(updated_at)/COUNT(*) watermark of `mice`.
+    While `listener` is connected the watermark is only rechecked after a pushed
+    invalidation; otherwise it is polled at most once per `check_interval_sec`. While one
+    thread rebuilds, others keep serving the old snapshot.
+    """
+
+    def __init__(self, check_interval_sec: float = 5.0, listener: Optional[CatalogListener] = None) -> None:
+        self._lock = threading.Lock()
+        self._check_interval_sec = check_interval_sec
+        self._listener = listener
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._rebuilds = 0
+
+    @property
+    def rebuilds(self) -> int:
+        return self._rebuilds
+
+    def peek(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def invalidate(self, watermark: Optional[str] = None) -> None:
+        """Force a watermark check on the next read, unless `watermark` is already being served."""
+        snapshot = self._snapshot
+        if watermark is not None and snapshot is not None and _watermark_version(watermark) == snapshot.version:
+            return
+        # Plain flag write: never blocks the listener thread behind an in-flight rebuild.
+        self._stale = True
+
+    def _is_current(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        if snapshot is None or self._stale:
+            return False
+        if self._listener is not None and self._listener.connected:
+            return True
+        return time.monotonic() - self._checked_at < self._check_interval_sec
+
+    def get(self, conn_factory: Callable[[], Any], normalize: Normalizer) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_current(snapshot):
+            return snapshot  # type: ignore[return-value]
+
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot  # type: ignore[return-value]
+        try:
+            snapshot = self._snapshot
+            if self._is_current(snapshot):
+                return snapshot  # type: ignore[return-value]
+            # Cleared before reading, so an invalidation racing this check is not lost.
+            self._stale = False
+            with conn_factory() as conn:
+                version = self._read_version(conn)
+                if snapshot is None or snapshot.version != version:
+                    snapshot = self._load(conn, version, normalize)
+                    self._snapshot = snapshot
+                    self._rebuilds += 1
+                    LOGGER.info("catalog_snapshot_rebuilt version=%s rows=%s", version, len(snapshot.rows))
+            self._checked_at = time.monotonic()
+            return snapshot
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _read_version(conn) -> str:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {CATALOG_WATERMARK_SQL} AS watermark FROM mice")
+            row = cur.fetchone() or {}
+        return _watermark_version(str(row.get("watermark") or ""))
+
+    @staticmethod
+    def _load(conn, version: str, normalize: Normalizer) -> CatalogSnapshot:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM mice ORDER BY brand, model, id")
+            rows = cur.fetchall()
+        # Re-sort in Python so the snapshot order matches keyset cursors regardless of DB collation.
+        normalized = sorted(
+            (normalize(row) for row in rows),
+            key=lambda row: (str(row.get("brand") or ""), str(row.get("model") or ""), str(row.get("id") or "")),
+        )
+        return CatalogSnapshot.build(version, normalized)
+
+
+CATALOG = CatalogCache(check_interval_sec=config.CATALOG_CHECK_INTERVAL_SEC, listener=CATALOG_LISTENER)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+try:
+    import psycopg
+except Exception:  # pragma: no cover - optional in limited test envs
+    psycopg = None
+
+LOGGER = logging.getLogger("mousefit.catalog_events")
+
+CATALOG_CHANNEL = "mousefit_catalog"
+# Computed in SQL so the payload a writer sends and the version a reader computes agree exactly.
+CATALOG_WATERMARK_SQL = "COALESCE(EXTRACT(EPOCH FROM MAX(updated_at)), 0)::text || ':' || COUNT(*)"
+
+Subscriber = Callable[[Optional[str]], None]
+
+
+def notify_catalog_changed(cur) -> None:
+    """Queue a catalog notification carrying the new watermark; Postgres delivers it on commit."""
+    cur.execute(f"SELECT pg_notify(%s, {CATALOG_WATERMARK_SQL}) FROM mice", (CATALOG_CHANNEL,))
+
+
+class CatalogListener:
+    """
+    Dedicated LISTEN connection, outside the request pool, that fans catalog notifications
+    out to subscribers on a background thread. Subscribers receive the watermark payload,
+    or None when the connection is established or lost and a change may have been missed.
+    """
+
+    def __init__(
+        self,
+        channel: str = CATALOG_CHANNEL,
+        reconnect_delay_sec: float = 2.0,
+        poll_timeout_sec: float = 1.0,
+        connect: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        self._channel = channel
+        self._reconnect_delay_sec = reconnect_delay_sec
+        self._poll_timeout_sec = poll_timeout_sec
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscriber] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connected = False
+        self._notifications = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def notifications(self) -> int:
+        return self._notifications
+
+    def subscribe(self, callback: Subscriber) -> None:
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def start(self, conninfo: str) -> bool:
+        connect = self._connect or (psycopg.connect if psycopg is not None else None)
+        if connect is None:
+            LOGGER.warning("catalog_listener_unavailable reason=psycopg_missing")
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return True
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(connect, conninfo), name="mousefit-catalog-listener", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def stop(self, timeout_sec: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_sec)
+        self._thread = None
+
+    def _run(self, connect: Callable[..., Any], conninfo: str) -> None:
+        while not self._stop.is_set():
+            try:
+                with connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self._channel}")
+                    self._set_connected(True)
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=self._poll_timeout_sec):
+                            self._notifications += 1
+                            self._dispatch(notify.payload or None)
+            except Exception:
+                if not self._stop.is_set():
+                    LOGGER.exception("catalog_listener_failed channel=%s", self._channel)
+            finally:
+                self._set_connected(False)
+            self._stop.wait(self._reconnect_delay_sec)
+
+    def _set_connected(self, connected: bool) -> None:
+        if self._connected == connected:
+            return
+        self._connected = connected
+        LOGGER.info("catalog_listener_%s channel=%s", "connected" if connected else "disconnected", self._channel)
+        if not self._stop.is_set():
+            self._dispatch(None)
+
+    def _dispatch(self, payload: Optional[str]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(payload)
+            except Exception:
+                LOGGER.exception("catalog_listener_subscriber_failed channel=%s", self._channel)
+
+
+CATALOG_LISTENER = CatalogListener()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, replace
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from backend.catalog import CatalogSnapshot
+
+Row = Dict[str, Any]
+
+RANGE_FIELDS = ("length_mm", "width_mm", "height_mm", "weight_g", "price_usd")
+SORT_FIELDS = ("brand", *RANGE_FIELDS)
+MAX_PAGE_SIZE = 500
+# Distinct filter combinations whose match count a snapshot remembers for X-Total-Count.
+MAX_CACHED_TOTALS = 256
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class RangeFilter:
+    field: str
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+    def matches(self, row: Row) -> bool:
+        value = row.get(self.field)
+        if value is None:
+            return False
+        if self.minimum is not None and value < self.minimum:
+            return False
+        if self.maximum is not None and value > self.maximum:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    ranges: Tuple[RangeFilter, ...] = ()
+    shapes: FrozenSet[str] = frozenset()
+    hump_buckets: FrozenSet[str] = frozenset()
+    availability: FrozenSet[str] = frozenset()
+    grips: FrozenSet[str] = frozenset()
+    wired: Optional[bool] = None
+    sort: str = "brand"
+    descending: bool = False
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @property
+    def is_default(self) -> bool:
+        return self == CatalogQuery()
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(
+            self.ranges or self.shapes or self.hump_buckets or self.availability or self.grips
+        ) or self.wired is not None
+
+
+@dataclass(frozen=True)
+class CatalogPage:
+    rows: List[Row]
+    total: int
+    next_cursor: Optional[str] = None
+
+
+def parse_sort(value: Optional[str]) -> Tuple[str, bool]:
+    raw = (value or "brand").strip()
+    descending = raw.startswith("-")
+    field = raw[1:] if descending else raw
+    if field not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_FIELDS)} (prefix with '-' for descending).")
+    return field, descending
+
+
+def _lowered(values: Optional[Sequence[str]]) -> FrozenSet[str]:
+    return frozenset(v.strip().lower() for v in values or () if v and v.strip())
+
+
+def build_query(
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]],
+    shapes: Optional[Sequence[str]] = None,
+    hump_buckets: Optional[Sequence[str]] = None,
+    availability: Optional[Sequence[str]] = None,
+    grips: Optional[Sequence[str]] = None,
+    wired: Optional[bool] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> CatalogQuery:
+    sort_field, descending = parse_sort(sort)
+    return CatalogQuery(
+        ranges=tuple(
+            RangeFilter(field, low, high)
+            for field, (low, high) in ranges.items()
+            if low is not None or high is not None
+        ),
+        shapes=_lowered(shapes),
+        hump_buckets=_lowered(hump_buckets),
+        availability=_lowered(availability),
+        grips=_lowered(grips),
+        wired=wired,
+        sort=sort_field,
+        descending=descending,
+        limit=limit,
+        cursor=cursor or None,
+    )
+
+
+def _text_in(value: Any, allowed: FrozenSet[str]) -> bool:
+    return isinstance(value, str) and value.strip().lower() in allowed
+
+
+def matches(row: Row, query: CatalogQuery) -> bool:
+    for range_filter in query.ranges:
+        if not range_filter.matches(row):
+            return False
+    if query.shapes and not _text_in(row.get("shape"), query.shapes):
+        return False
+    if query.hump_buckets and not _text_in(row.get("hump_bucket"), query.hump_buckets):
+        return False
+    if query.availability and not _text_in(row.get("availability_status"), query.availability):
+        return False
+    if query.wired is not None and row.get("wired") is not query.wired:
+        return False
+    if query.grips and not any(str(g).strip().lower() in query.grips for g in row.get("grips") or ()):
+        return False
+    return True
+
+
+def sort_key(row: Row, field: str, descending: bool) -> Tuple[Any, ...]:
+    tiebreak = (str(row.get("brand") or ""), str(row.get("model") or ""), str(row.get("id") or ""))
+    if field == "brand":
+        return tiebreak
+    value = row.get(field)
+    if value is None:
+        # Missing values always sort last, regardless of direction.
+        return (1, 0.0, *tiebreak)
+    return (0, -float(value) if descending else float(value), *tiebreak)
+
+
+def encode_cursor(key: Tuple[Any, ...]) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str) -> Tuple[Any, ...]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("cursor is not a valid page token.") from exc
+    expected_len = 3 if field == "brand" else 5
+    if not isinstance(key, list) or len(key) != expected_len:
+        raise InvalidCursor("cursor does not match the requested sort.")
+    return tuple(key)
+
+
+def _ordering(snapshot: CatalogSnapshot, field: str, descending: bool) -> Tuple[List[Tuple[Any, ...]], List[Row]]:
+    """Sort keys and rows of the whole snapshot in (field, direction) order, sorted once per snapshot."""
+
+    def build() -> Tuple[List[Tuple[Any, ...]], List[Row]]:
+        keyed = sorted(((sort_key(row, field, descending), row) for row in snapshot.rows), key=lambda item: item[0])
+        return [key for key, _ in keyed], [row for _, row in keyed]
+
+    return snapshot.derived(("ordering", field, descending), build)
+
+
+def _total(snapshot: CatalogSnapshot, query: CatalogQuery) -> int:
+    if not query.has_filters:
+        return len(snapshot.rows)
+    totals: Dict[CatalogQuery, int] = snapshot.derived("totals", dict)
+    # Only the filters decide the count; every page of every sort order shares it.
+    filters = replace(query, sort="brand", descending=False, limit=None, cursor=None)
+    total = totals.get(filters)
+    if total is None:
+        if len(totals) >= MAX_CACHED_TOTALS:
+            totals.clear()
+        total = totals[filters] = sum(1 for row in snapshot.rows if matches(row, query))
+    return total
+
+
+def run_query(snapshot: CatalogSnapshot, query: CatalogQuery) -> CatalogPage:
+    keys, rows = _ordering(snapshot, query.sort, query.descending)
+
+    position = 0
+    if query.cursor:
+        after = decode_cursor(query.cursor, query.sort)
+        try:
+            position = bisect_right(keys, after)
+        except TypeError as exc:
+            raise InvalidCursor("cursor does not match the requested sort.") from exc
+
+    # Walk forward from the cursor, filtering as we go, until the page is full.
+    filtered = query.has_filters
+    limit = len(rows) if query.limit is None else query.limit
+    page: List[Row] = []
+    last = -1
+    while position < len(rows) and len(page) < limit:
+        if not filtered or matches(rows[position], query):
+            page.append(rows[position])
+            last = position
+        position += 1
+    # Another page exists if anything past it matches; the scan stops at the first match.
+    more = any(matches(rows[idx], query) for idx in range(position, len(rows))) if filtered else position < len(rows)
+    next_cursor = encode_cursor(keys[last]) if page and more else None
+    return CatalogPage(rows=page, total=_total(snapshot, query), next_cursor=next_cursor)
@@ -32,6 +32,12 @@ SUPABASE_JWT_ISSUER = (
     or (f"{SUPABASE_URL}/auth/v1" if SUPABASE_URL else "")
 )
 SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated").strip()
+# The JWKS is fetched at startup (waiting up to the timeout) and refreshed in the background.
+JWKS_REFRESH_SEC = float(os.getenv("MOUSEFIT_JWKS_REFRESH_SEC", "300"))
+JWKS_TIMEOUT_SEC = float(os.getenv("MOUSEFIT_JWKS_TIMEOUT_SEC", "5"))
+# Verified tokens each worker remembers (until `exp` minus the margin) to skip re-verification; 0 disables.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("MOUSEFIT_AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_MARGIN_SEC = float(os.getenv("MOUSEFIT_AUTH_TOKEN_CACHE_MARGIN_SEC", "30"))
 
 USE_SERVER_REPORT_PIPELINE = os.getenv("USE_SERVER_REPORT_PIPELINE", "1").strip().lower() in {
     "1",
@@ -41,3 +47,37 @@ USE_SERVER_REPORT_PIPELINE = os.getenv("USE_SERVER_REPORT_PIPELINE", "1").strip(
 }
 
 SENTRY_DSN = os.getenv("SENTRY_DSN", "").strip()
+
+CATALOG_CHECK_INTERVAL_SEC = float(os.getenv("MOUSEFIT_CATALOG_CHECK_SEC", "5"))
+CATALOG_LISTEN = os.getenv("MOUSEFIT_CATALOG_LISTEN", "1").strip().lower() in {"1", "true", "yes", "on"}
+# Cross-check every precomputed fit-grid lookup against a full catalog scan (slow; for rollout).
+FIT_GRID_VALIDATE = os.getenv("MOUSEFIT_FIT_GRID_VALIDATE", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Report scoring profile (see backend.scoring_profiles); MOUSEFIT_SCORING_VARIANTS, e.g.
+# "classic=50,shape=50", splits sessions between profiles by a stable hash of session_id.
+SCORING_PROFILE = os.getenv("MOUSEFIT_SCORING_PROFILE", "classic").strip().lower()
+SCORING_VARIANTS = os.getenv("MOUSEFIT_SCORING_VARIANTS", "").strip()
+# How long a worker trusts that a user's token profile seed is already stored; 0 disables.
+PROFILE_SEED_TTL_SEC = float(os.getenv("MOUSEFIT_PROFILE_SEED_TTL_SEC", "300"))
+# How long a worker trusts the measurement/grip it last wrote per session, unchecked; writes to
+# the session on other workers within this window are missed. 0 disables.
+SESSION_STATE_TTL_SEC = float(os.getenv("MOUSEFIT_SESSION_STATE_TTL_SEC", "10"))
+SESSION_STATE_MAX_SESSIONS = int(os.getenv("MOUSEFIT_SESSION_STATE_MAX_SESSIONS", "10000"))
+# Months of raw session rows scripts/retain_session_data.py keeps before rolling them up.
+# Session reads (latest measurement/grip/report, report memo) look back as far, no further.
+RETAIN_MONTHS = int(os.getenv("MOUSEFIT_RETAIN_MONTHS", "12"))
+# How long an Idempotency-Key response is replayed (worker LRU + idempotency_keys table); 0 disables.
+IDEMPOTENCY_TTL_SEC = float(os.getenv("MOUSEFIT_IDEMPOTENCY_TTL_SEC", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("MOUSEFIT_IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# Buffer measurement/grip inserts per worker and COPY them in batches (see backend.write_behind).
+# Acknowledged rows still queued are lost if the worker crashes; SYNC_COMMIT=0 also skips the
+# WAL flush wait on each batch commit.
+WRITE_BEHIND = os.getenv("MOUSEFIT_WRITE_BEHIND", "0").strip().lower() in {"1", "true", "yes", "on"}
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("MOUSEFIT_WRITE_BEHIND_FLUSH_MS", "10"))
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("MOUSEFIT_WRITE_BEHIND_MAX_ROWS", "5000"))
+WRITE_BEHIND_BATCH = int(os.getenv("MOUSEFIT_WRITE_BEHIND_BATCH", "1000"))
+WRITE_BEHIND_SYNC_COMMIT = os.getenv("MOUSEFIT_WRITE_BEHIND_SYNC_COMMIT", "1").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
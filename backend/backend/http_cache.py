@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - optional dependency
+    brotli = None
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+MINIMUM_COMPRESS_SIZE = 1000
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the bytes (and therefore the representation) stable across rebuilds.
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Pick the first server-preferred coding the client accepts with q > 0."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        name = token.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: Optional[str], etag_base: str) -> bool:
+    """Weak comparison per RFC 9110; any content-coding variant of the same version matches."""
+    if not if_none_match:
+        return False
+    for raw in if_none_match.split(","):
+        tag = raw.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == etag_base or tag.rsplit("-", 1)[0] == etag_base:
+            return True
+    return False
+
+
+class PrecompressedBody:
+    """One response body plus its gzip/brotli variants, each compressed at most once."""
+
+    def __init__(self, etag_base: str, body: bytes) -> None:
+        self.etag_base = etag_base
+        self._lock = threading.Lock()
+        self._variants: Dict[str, bytes] = {"identity": body}
+
+    @property
+    def compressible(self) -> bool:
+        return len(self._variants["identity"]) >= MINIMUM_COMPRESS_SIZE
+
+    def variant(self, encoding: str) -> bytes:
+        body = self._variants.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._variants.get(encoding)
+            if body is None:
+                body = _compress(self._variants["identity"], encoding)
+                self._variants[encoding] = body
+        return body
+
+    def etag(self, encoding: str) -> str:
+        if encoding == "identity":
+            return f'"{self.etag_base}"'
+        return f'"{self.etag_base}-{encoding}"'
+
+    def warm(self) -> None:
+        if self.compressible:
+            for encoding in supported_encodings():
+                self.variant(encoding)
+
+
+def conditional_response(
+    request: Request,
+    body: PrecompressedBody,
+    media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    encoding = "identity"
+    if body.compressible:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), supported_encodings())
+    out_headers = dict(headers or {})
+    out_headers["ETag"] = body.etag(encoding)
+    out_headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), body.etag_base):
+        return Response(status_code=304, headers=out_headers)
+    if encoding != "identity":
+        out_headers["Content-Encoding"] = encoding
+    return Response(content=body.variant(encoding), media_type=media_type, headers=out_headers)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from backend import config
+
+MAX_KEY_LENGTH = 255
+# How long a claim holds a key while its request runs; claims of a crashed worker lapse after this.
+CLAIM_LEASE_SEC = 30
+
+# Claims the key unless an unexpired row holds it, and returns that row otherwise, in one statement.
+# The outer SELECT sees the table as of the statement start, so a row claimed concurrently by
+# another worker comes back as neither claimed nor stored; treat that as in progress.
+CLAIM_SQL = """
+    WITH claimed AS (
+        INSERT INTO idempotency_keys (key, fingerprint, expires_at)
+        VALUES (%s, %s, NOW() + make_interval(secs => %s))
+        ON CONFLICT (key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, status_code = NULL, body = NULL, expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at <= NOW()
+        RETURNING key
+    )
+    SELECT EXISTS (SELECT 1 FROM claimed) AS claimed, k.fingerprint, k.status_code, k.body
+    FROM (SELECT 1) AS anchor
+    LEFT JOIN idempotency_keys AS k ON k.key = %s AND k.expires_at > NOW()
+"""
+COMPLETE_SQL = """
+    UPDATE idempotency_keys
+    SET status_code = %s, body = %s, expires_at = NOW() + make_interval(secs => %s)
+    WHERE key = %s AND fingerprint = %s
+"""
+RELEASE_SQL = "DELETE FROM idempotency_keys WHERE key = %s AND status_code IS NULL"
+PURGE_SQL = "DELETE FROM idempotency_keys WHERE expires_at <= NOW()"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+
+
+def scoped_key(user_id: Optional[str], key: str) -> str:
+    """Keys are the client's; scoping them by caller keeps one user from replaying another's response."""
+    return hashlib.sha256(json.dumps([user_id, key]).encode("utf-8")).hexdigest()
+
+
+def request_fingerprint(method: str, path: str, query: str, body: str) -> str:
+    return hashlib.sha256(json.dumps([method, path, query, body]).encode("utf-8")).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Per-worker LRU of responses stored under an Idempotency-Key, in front of the
+    `idempotency_keys` table that other workers share, plus the keys this worker is
+    still running (with their request fingerprints) so a concurrent retry is refused before
+    it reaches Postgres.
+    Entries expire with their row after `ttl_sec`; 0 turns Idempotency-Key handling off.
+    """
+
+    def __init__(self, ttl_sec: float = 3600.0, max_entries: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self.ttl_sec = ttl_sec
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[StoredResponse, float]]" = OrderedDict()
+        self._in_flight: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.replays = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_sec > 0
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (stored, time.monotonic() + self.ttl_sec)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def record_replay(self) -> None:
+        with self._lock:
+            self.replays += 1
+
+    def begin(self, key: str, fingerprint: str) -> Optional[str]:
+        """Mark a key as running on this worker; None if it now is, else the fingerprint already running it."""
+        with self._lock:
+            running = self._in_flight.get(key)
+            if running is None:
+                self._in_flight[key] = fingerprint
+            return running
+
+    def end(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "replays": self.replays,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+            }
+
+
+IDEMPOTENCY = IdempotencyCache(ttl_sec=config.IDEMPOTENCY_TTL_SEC, max_entries=config.IDEMPOTENCY_MAX_ENTRIES)
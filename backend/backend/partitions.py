@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+try:
+    from psycopg import sql
+except Exception:  # pragma: no cover - optional in limited test envs
+    sql = None
+
+from backend import config
+
+# Session tables range-partitioned by month on created_at (alembic 20261018_000006).
+PARTITIONED_TABLES = ("measurements", "grips", "reports")
+# Monthly partitions are created this many months ahead, so rows rarely land in the default one.
+MONTHS_AHEAD = 3
+# Lower bound when the lookback is disabled; older than any stored row.
+_NO_CUTOFF = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    """The month a partition created by `ensure_month_partitions` covers; None for any other table."""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def session_cutoff(now: Optional[datetime] = None) -> datetime:
+    """
+    Oldest created_at the session read paths consider: the first month the retention job
+    keeps (`RETAIN_MONTHS`), so no retained row is hidden. As a literal lower bound on the
+    partition key it lets Postgres skip the expired partitions still awaiting the job.
+    """
+    if config.RETAIN_MONTHS < 0:
+        return _NO_CUTOFF
+    return add_months(month_start(now or datetime.now(timezone.utc)), -config.RETAIN_MONTHS)
+
+
+def is_partitioned(cur, table: str) -> bool:
+    cur.execute(
+        "SELECT 1 AS partitioned FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+        (table,),
+    )
+    return cur.fetchone() is not None
+
+
+def list_partitions(cur, table: str) -> List[str]:
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits AS i
+        JOIN pg_class AS c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (table,),
+    )
+    return [row["relname"] for row in cur.fetchall()]
+
+
+def ensure_month_partitions(cur, table: str, first_month: datetime, last_month: datetime) -> List[str]:
+    """
+    Create the monthly partitions from `first_month` through `last_month` that are missing.
+    Rows for such a month that already sit in `{table}_default` (the job creating partitions
+    did not run in time) are moved into the new partition, in the caller's transaction;
+    Postgres refuses to create a partition whose range the default partition still holds.
+    """
+    existing = set(list_partitions(cur, table))
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(table, month)
+        if name not in existing:
+            _create_month_partition(cur, table, name, month, f"{table}_default" in existing)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def _create_month_partition(cur, table: str, name: str, month: datetime, has_default: bool) -> None:
+    parent = sql.Identifier(table)
+    lower, upper = sql.Literal(month), sql.Literal(add_months(month, 1))
+    create = sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+        sql.Identifier(name), parent, lower, upper
+    )
+    stranded = False
+    if has_default:
+        default = sql.Identifier(f"{table}_default")
+        in_month = sql.SQL("created_at >= {} AND created_at < {}").format(lower, upper)
+        cur.execute(
+            sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE {}) AS stranded").format(default, in_month)
+        )
+        stranded = bool(cur.fetchone()["stranded"])
+    if not stranded:
+        cur.execute(create)
+        return
+    # Writers are held off (readers are not) until commit, so no row can land in the range mid-move.
+    moved = sql.Identifier(f"{name}_moved")
+    cur.execute(sql.SQL("LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE").format(parent))
+    cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {}) ON COMMIT DROP").format(moved, parent))
+    cur.execute(
+        sql.SQL("WITH gone AS (DELETE FROM {} WHERE {} RETURNING *) INSERT INTO {} SELECT * FROM gone").format(
+            default, in_month, moved
+        )
+    )
+    cur.execute(create)
+    cur.execute(sql.SQL("INSERT INTO {} SELECT * FROM {}").format(parent, moved))
+
+
+def ensure_upcoming_partitions(cur, now: Optional[datetime] = None, months_ahead: int = MONTHS_AHEAD) -> List[str]:
+    """
+    The default and this month's through `months_ahead` months' partitions of every partitioned
+    session table. Workers run this at startup, so creating them does not rest on the retention
+    job alone; an advisory lock keeps workers starting together from racing on the same DDL.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('mousefit_session_partitions'))")
+    this_month = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for table in PARTITIONED_TABLES:
+        # Databases created before partitioning keep plain tables until the migration converts them.
+        if not is_partitioned(cur, table):
+            continue
+        cur.execute(
+            sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} DEFAULT").format(
+                sql.Identifier(f"{table}_default"), sql.Identifier(table)
+            )
+        )
+        created.extend(ensure_month_partitions(cur, table, this_month, add_months(this_month, months_ahead)))
+    return created
+
+
+def expired_partitions(table: str, names: Iterable[str], cutoff_month: datetime) -> List[str]:
+    """Monthly partitions of `table` entirely older than `cutoff_month`, oldest first."""
+    months = {name: partition_month(table, name) for name in names}
+    return sorted(name for name, month in months.items() if month is not None and month < cutoff_month)
+
+
+# Compact per-day aggregates that outlive the raw rows (scripts/retain_session_data.py).
+HISTOGRAM_BUCKET_MM = 5
+ROLLUP_TABLES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS measurement_daily_histogram (
+        day DATE NOT NULL,
+        length_bucket_mm SMALLINT NOT NULL,
+        width_bucket_mm SMALLINT NOT NULL,
+        measurements INTEGER NOT NULL,
+        PRIMARY KEY (day, length_bucket_mm, width_bucket_mm)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS grip_daily_counts (
+        day DATE NOT NULL,
+        grip TEXT NOT NULL,
+        grips INTEGER NOT NULL,
+        confidence_sum DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (day, grip)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS report_daily_counts (
+        day DATE NOT NULL,
+        scoring_profile TEXT NOT NULL,
+        reports INTEGER NOT NULL,
+        PRIMARY KEY (day, scoring_profile)
+    )
+    """,
+)
+# Each folds the rows of `{source}` into its rollup, adding to days already rolled up.
+ROLLUP_SQL = {
+    "measurements": f"""
+        INSERT INTO measurement_daily_histogram AS h (day, length_bucket_mm, width_bucket_mm, measurements)
+        SELECT
+            (created_at AT TIME ZONE 'UTC')::date,
+            (floor(length_mm / {HISTOGRAM_BUCKET_MM}) * {HISTOGRAM_BUCKET_MM})::smallint,
+            (floor(width_mm / {HISTOGRAM_BUCKET_MM}) * {HISTOGRAM_BUCKET_MM})::smallint,
+            COUNT(*)
+        FROM {{source}}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, length_bucket_mm, width_bucket_mm)
+        DO UPDATE SET measurements = h.measurements + EXCLUDED.measurements
+    """,
+    "grips": """
+        INSERT INTO grip_daily_counts AS h (day, grip, grips, confidence_sum)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, grip, COUNT(*), SUM(confidence)
+        FROM {source}
+        GROUP BY 1, 2
+        ON CONFLICT (day, grip)
+        DO UPDATE SET grips = h.grips + EXCLUDED.grips, confidence_sum = h.confidence_sum + EXCLUDED.confidence_sum
+    """,
+    "reports": """
+        INSERT INTO report_daily_counts AS h (day, scoring_profile, reports)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, COALESCE(report_json ->> 'scoring_profile', 'classic'), COUNT(*)
+        FROM {source}
+        GROUP BY 1, 2
+        ON CONFLICT (day, scoring_profile)
+        DO UPDATE SET reports = h.reports + EXCLUDED.reports
+    """,
+}
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from backend import config
+
+
+def seed_fingerprint(email: Optional[str], display_name: Optional[str], avatar_url: Optional[str]) -> str:
+    return hashlib.sha1(json.dumps([email, display_name, avatar_url]).encode("utf-8")).hexdigest()
+
+
+class ProfileSeedCache:
+    """
+    Per-worker memory of the profile seed (email, display name, avatar from the token) last
+    written for each user, so requests repeating it can skip the profile upsert. Entries
+    expire after `ttl_sec`, which bounds how long a row changed or deleted elsewhere goes
+    unrepaired; the least recently written entries are evicted past `max_entries`.
+    """
+
+    def __init__(self, ttl_sec: float = 300.0, max_entries: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._ttl_sec = ttl_sec
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def matches(self, user_id: str, fingerprint: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            fresh = entry is not None and entry[0] == fingerprint and entry[1] > time.monotonic()
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return fresh
+
+    def remember(self, user_id: str, fingerprint: str) -> None:
+        if self._ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (fingerprint, time.monotonic() + self._ttl_sec)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+PROFILE_SEEDS = ProfileSeedCache(ttl_sec=config.PROFILE_SEED_TTL_SEC)
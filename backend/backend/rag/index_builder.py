@@ -410,6 +410,24 @@ def _collect_mice() -> Dict[Tuple[str, str, str], Dict[str, Any]]:
     return mice
 
 
+def input_files_fingerprint() -> Tuple[Tuple[str, int, int], ...]:
+    """(path, mtime_ns, size) of the index and the files it is built from; stat calls only.
+
+    Postgres rows are not covered: their changes arrive as catalog notifications.
+    """
+    paths = [config.RAG_EMBEDDINGS_PATH, *_dataset_files()]
+    if config.RAG_SOURCES_DIR.exists():
+        paths.extend(sorted(config.RAG_SOURCES_DIR.glob("*.md")))
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
 def _needs_rebuild(rebuild: bool = False) -> bool:
     if rebuild:
         return True
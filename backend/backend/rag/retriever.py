@@ -4,12 +4,13 @@ import json
 import math
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
 from backend import config
-from backend.rag.index_builder import build_embeddings
+from backend.catalog_events import CATALOG_LISTENER
+from backend.rag.index_builder import build_embeddings, input_files_fingerprint
 from backend.rag.schemas import RagPreferences, RagSource
 
 try:
@@ -27,6 +28,10 @@ except Exception:  # pragma: no cover - optional dependency
 
 _embedder: Optional[SentenceTransformer] = None
 _collection = None
+# Set once build_embeddings has confirmed the index; cleared by catalog notifications.
+_index_checked = False
+# The dataset/source files that check saw; nothing notifies when they change, so they are stat'ed per call.
+_index_files: Optional[Tuple[Tuple[str, int, int], ...]] = None
 
 
 def _get_embedder() -> Optional[SentenceTransformer]:
@@ -53,6 +58,29 @@ def _get_collection():
     return _collection
 
 
+def invalidate_index() -> None:
+    """Recheck (and if needed rebuild) the index on the next retrieve."""
+    global _index_checked
+    _index_checked = False
+
+
+def _ensure_index() -> int:
+    global _index_checked, _index_files
+    # Without a live catalog listener there is no push signal for Postgres rows, so keep checking per call.
+    files = input_files_fingerprint()
+    if _index_checked and CATALOG_LISTENER.connected and files == _index_files:
+        return 0
+    # Marked first so an invalidation that lands mid-build forces another check.
+    _index_checked = True
+    # Taken before the check, so a file edited mid-build (or the rebuilt index itself) triggers one more.
+    _index_files = files
+    try:
+        return build_embeddings(rebuild=False)
+    except Exception:
+        _index_checked = False
+        return 0
+
+
 def warmup() -> None:
     """Preload embedder / vector store to avoid first-request latency."""
     try:
@@ -115,10 +143,7 @@ def retrieve(query: str, prefs: Optional[RagPreferences] = None, k: int = 8) ->
     global _collection
     prefs = prefs or RagPreferences()
     query = query or ""
-    try:
-        rebuilt_count = build_embeddings(rebuild=False)
-    except Exception:
-        rebuilt_count = 0
+    rebuilt_count = _ensure_index()
     if rebuilt_count > 0:
         # Re-open collection after index rebuild so queries use latest dataset files.
         _collection = None
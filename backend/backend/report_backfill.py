@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.scoring import ColumnarCatalog, format_reason
+from backend.scoring_profiles import CLASSIC, SCORING_PROFILES, Hands, ScoringProfile
+
+Row = Dict[str, Any]
+
+# Recommendations per report, as generated by /api/report/generate.
+REPORT_TOP_K = 5
+# Everything a report's recommendations can depend on: the scored columns plus what is shown.
+FINGERPRINT_FIELDS = (
+    "brand",
+    "model",
+    "length_mm",
+    "width_mm",
+    "height_mm",
+    "weight_g",
+    "grips",
+    "hands",
+    "shape",
+    "hump",
+    "hump_bucket",
+    "side_profile",
+    "front_flare_raw",
+    "availability_status",
+)
+
+
+def mouse_fingerprints(rows: Sequence[Row]) -> Dict[str, str]:
+    return {
+        str(row["id"]): hashlib.sha1(
+            json.dumps([row.get(name) for name in FINGERPRINT_FIELDS], default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        for row in rows
+    }
+
+
+def changed_mice(old: Mapping[str, str], new: Mapping[str, str]) -> FrozenSet[str]:
+    """Mice added, removed or edited between two fingerprinted catalogs."""
+    return frozenset(mouse_id for mouse_id in old.keys() | new.keys() if old.get(mouse_id) != new.get(mouse_id))
+
+
+def memo_version(catalog_version: str, profile: ScoringProfile) -> str:
+    """The `reports.catalog_version` value /api/report/generate stores and memoizes on."""
+    return f"{catalog_version}:{profile.key}"
+
+
+def split_memo_version(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(catalog version, profile key); reports stored before memoization have neither."""
+    if not value or ":" not in value:
+        return None, None
+    catalog_version, _, profile_key = value.partition(":")
+    return catalog_version, profile_key
+
+
+@dataclass(frozen=True)
+class StaleReport:
+    id: int
+    report: Row
+    catalog_version: Optional[str]
+
+
+@dataclass(frozen=True)
+class Rescored:
+    id: int
+    # New recommendations, or None when the stored ones provably still hold.
+    recommendations: Optional[List[Row]]
+    profile: str
+
+
+class ReportRescorer:
+    """
+    Rescores stored reports against one catalog. A report whose catalog was fingerprinted is
+    left alone unless one of its recommendations changed or a changed mouse now scores at
+    least its k-th score: unchanged mice keep their scores, so nothing else can move.
+    """
+
+    def __init__(self, rows: Sequence[Row], known_fingerprints: Mapping[str, Mapping[str, str]]) -> None:
+        self.catalog = ColumnarCatalog.from_rows(rows)
+        self.fingerprints = mouse_fingerprints(rows)
+        self._known = known_fingerprints
+        self._positions = {mouse_id: idx for idx, mouse_id in enumerate(self.catalog.ids)}
+        self._diffs: Dict[str, Tuple[FrozenSet[str], ColumnarCatalog]] = {}
+
+    def _diff(self, old_version: Optional[str]) -> Optional[Tuple[FrozenSet[str], ColumnarCatalog]]:
+        if old_version is None or old_version not in self._known:
+            return None
+        if old_version not in self._diffs:
+            changed = changed_mice(self._known[old_version], self.fingerprints)
+            present = np.array(sorted(self._positions[mouse_id] for mouse_id in changed if mouse_id in self._positions))
+            self._diffs[old_version] = (changed, self.catalog.take(present.astype(np.intp)))
+        return self._diffs[old_version]
+
+    @staticmethod
+    def _hands(reports: Sequence[StaleReport]) -> Hands:
+        return Hands.of(
+            [float(item.report["measurement"]["length_mm"]) for item in reports],
+            [float(item.report["measurement"]["width_mm"]) for item in reports],
+            [(item.report.get("grip") or {}).get("grip") for item in reports],
+        )
+
+    def _unaffected(self, profile: ScoringProfile, reports: Sequence[StaleReport]) -> np.ndarray:
+        keep = np.zeros(len(reports), dtype=bool)
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for pos, item in enumerate(reports):
+            old_version, profile_key = split_memo_version(item.catalog_version)
+            # Reports scored under another profile definition, or an unknown catalog, are rescored.
+            if profile_key == profile.key and self._diff(old_version) is not None:
+                groups[old_version].append(pos)
+        for old_version, positions in groups.items():
+            changed, changed_catalog = self._diff(old_version)
+            batch = [reports[pos] for pos in positions]
+            kth = np.array(
+                [
+                    item.report["recommendations"][-1]["score"]
+                    if len(item.report.get("recommendations") or ()) >= REPORT_TOP_K
+                    else -np.inf
+                    for item in batch
+                ]
+            )
+            touched = np.array(
+                [any(rec["id"] in changed for rec in item.report.get("recommendations") or ()) for item in batch]
+            )
+            if len(changed_catalog):
+                start = 0
+                for hands in self._hands(batch).chunks(len(changed_catalog)):
+                    scores = profile.scores(changed_catalog, hands)
+                    stop = start + len(hands)
+                    touched[start:stop] |= (np.isfinite(scores) & (scores >= kth[start:stop, None])).any(axis=1)
+                    start = stop
+            keep[positions] = ~touched
+        return keep
+
+    def rescore(self, reports: Sequence[StaleReport]) -> List[Rescored]:
+        by_profile: Dict[str, List[int]] = defaultdict(list)
+        for pos, item in enumerate(reports):
+            by_profile[str(item.report.get("scoring_profile") or CLASSIC.name)].append(pos)
+
+        results: List[Optional[Rescored]] = [None] * len(reports)
+        for name, positions in by_profile.items():
+            profile = SCORING_PROFILES.get(name, CLASSIC)
+            batch = [reports[pos] for pos in positions]
+            keep = self._unaffected(profile, batch)
+            for pos in np.flatnonzero(keep):
+                results[positions[pos]] = Rescored(id=batch[pos].id, recommendations=None, profile=profile.name)
+            redo = np.flatnonzero(~keep)
+            if not len(redo):
+                continue
+            winners = profile.top_k(self.catalog, self._hands([batch[pos] for pos in redo]), REPORT_TOP_K)
+            for pos, items in zip(redo, winners):
+                recommendations = [
+                    {
+                        "id": self.catalog.ids[mouse.index],
+                        "brand": self.catalog.brands[mouse.index],
+                        "model": self.catalog.models[mouse.index],
+                        "score": mouse.score,
+                        "reason": format_reason(mouse.length_diff, mouse.width_diff, mouse.grip_match),
+                    }
+                    for mouse in items
+                ]
+                results[positions[pos]] = Rescored(
+                    id=batch[pos].id, recommendations=recommendations, profile=profile.name
+                )
+        return results  # type: ignore[return-value]
+
+
+def refreshed_report(report: Row, rescored: Rescored, created_at: str) -> Row:
+    """The stored report with new recommendations; no request produced it, so request_id is cleared."""
+    return {
+        **report,
+        "recommendations": rescored.recommendations,
+        "scoring_profile": rescored.profile,
+        "request_id": None,
+        "created_at": created_at,
+    }
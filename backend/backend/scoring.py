@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+LOGGER = logging.getLogger("mousefit.scoring")
+
+Row = Dict[str, Any]
+
+LENGTH_WEIGHT = 1.2
+WIDTH_WEIGHT = 1.4
+GRIP_MATCH_BONUS = 8.0
+GRIP_MISMATCH_PENALTY = 6.0
+# Per bitmask column (grips, hand sizes); values past this are logged and ignored.
+MAX_GRIP_BITS = 64
+
+# Hand sizes covered by FitLookupGrid; hands outside it are scored against the whole catalog.
+GRID_LENGTH_RANGE_MM = (150.0, 220.0)
+GRID_WIDTH_RANGE_MM = (70.0, 110.0)
+GRID_CELL_MM = 1.0
+GRID_TOP_K = 10
+# Neighbouring width cells share one coarse pruning pass before each cell is scored.
+GRID_BLOCK_CELLS = 10
+
+
+def _float_column(rows: Sequence[Row], field: str) -> np.ndarray:
+    values = [row.get(field) for row in rows]
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+
+def _bitmask_column(rows: Sequence[Row], field: str) -> Tuple[np.ndarray, Dict[str, int]]:
+    bits: Dict[str, int] = {}
+    masks = np.zeros(len(rows), dtype=np.uint64)
+    for idx, row in enumerate(rows):
+        mask = 0
+        for raw in row.get(field) or ():
+            value = str(raw).strip().lower()
+            if value not in bits:
+                if len(bits) >= MAX_GRIP_BITS:
+                    LOGGER.warning("%s_vocabulary_full value=%s", field, value)
+                    continue
+                bits[value] = 1 << len(bits)
+            mask |= bits[value]
+        masks[idx] = mask
+    return masks, bits
+
+
+def _shape_label(row: Row) -> Optional[str]:
+    value = str(row.get("shape") or "").strip().lower()
+    for label in ("ergo", "sym", "hybrid"):
+        if label in value:
+            return label
+    return "sym" if "ambi" in value else None
+
+
+def _hump_label(row: Row) -> Optional[str]:
+    # Synced rows carry hump_bucket; seed rows only have the free-text hump ("High (Back)").
+    value = str(row.get("hump_bucket") or row.get("hump") or "").strip().lower()
+    if "back" in value or "rear" in value:
+        return "back_high" if "high" in value else "back"
+    for label in ("center", "front"):
+        if label in value:
+            return label
+    return None
+
+
+def _side_label(row: Row) -> Optional[str]:
+    value = str(row.get("side_profile") or "").strip().lower()
+    return value or None
+
+
+def _flare_label(row: Row) -> Optional[str]:
+    value = str(row.get("front_flare_raw") or "").strip().lower()
+    if not value:
+        return None
+    return "straight" if value in {"none", "no", "flat", "straight"} else "flared"
+
+
+CATEGORY_LABELERS: Mapping[str, Callable[[Row], Optional[str]]] = {
+    "shape": _shape_label,
+    "hump": _hump_label,
+    "side_profile": _side_label,
+    "front_flare": _flare_label,
+}
+
+
+@dataclass(frozen=True)
+class CategoryColumn:
+    """Labels as small integer codes (-1 when missing) so matching is an integer compare."""
+
+    codes: np.ndarray
+    vocabulary: Mapping[str, int]
+
+    @classmethod
+    def from_labels(cls, labels: Sequence[Optional[str]]) -> "CategoryColumn":
+        vocabulary: Dict[str, int] = {}
+        codes = np.array(
+            [-1 if label is None else vocabulary.setdefault(label, len(vocabulary)) for label in labels],
+            dtype=np.int16,
+        )
+        return cls(codes=codes, vocabulary=vocabulary)
+
+    def codes_for(self, labels: Iterable[str]) -> np.ndarray:
+        return np.array([self.vocabulary[label] for label in labels if label in self.vocabulary], dtype=np.int16)
+
+
+@dataclass(frozen=True)
+class ColumnarCatalog:
+    """Contiguous per-field arrays over the catalog rows, in snapshot order."""
+
+    ids: Tuple[str, ...]
+    brands: Tuple[str, ...]
+    models: Tuple[str, ...]
+    length_mm: np.ndarray
+    width_mm: np.ndarray
+    height_mm: np.ndarray
+    weight_g: np.ndarray
+    grip_mask: np.ndarray
+    grip_bits: Mapping[str, int]
+    scorable: np.ndarray
+    hand_mask: np.ndarray
+    hand_bits: Mapping[str, int]
+    categories: Mapping[str, CategoryColumn]
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Row]) -> "ColumnarCatalog":
+        grip_mask, grip_bits = _bitmask_column(rows, "grips")
+        hand_mask, hand_bits = _bitmask_column(rows, "hands")
+        length = _float_column(rows, "length_mm")
+        width = _float_column(rows, "width_mm")
+        # Mirrors the old `if m.length_mm and m.width_mm` guard: missing or zero dims are skipped.
+        scorable = ~np.isnan(length) & ~np.isnan(width) & (length != 0) & (width != 0)
+        return cls(
+            ids=tuple(str(row.get("id")) for row in rows),
+            brands=tuple(str(row.get("brand") or "") for row in rows),
+            models=tuple(str(row.get("model") or "") for row in rows),
+            length_mm=length,
+            width_mm=width,
+            height_mm=_float_column(rows, "height_mm"),
+            weight_g=_float_column(rows, "weight_g"),
+            grip_mask=grip_mask,
+            grip_bits=grip_bits,
+            scorable=scorable,
+            hand_mask=hand_mask,
+            hand_bits=hand_bits,
+            categories={
+                name: CategoryColumn.from_labels([labeler(row) for row in rows])
+                for name, labeler in CATEGORY_LABELERS.items()
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, indices: np.ndarray) -> "ColumnarCatalog":
+        """Sub-catalog of `indices`, sharing label vocabularies so scores match the full catalog."""
+        return ColumnarCatalog(
+            ids=tuple(self.ids[idx] for idx in indices),
+            brands=tuple(self.brands[idx] for idx in indices),
+            models=tuple(self.models[idx] for idx in indices),
+            length_mm=self.length_mm[indices],
+            width_mm=self.width_mm[indices],
+            height_mm=self.height_mm[indices],
+            weight_g=self.weight_g[indices],
+            grip_mask=self.grip_mask[indices],
+            grip_bits=self.grip_bits,
+            scorable=self.scorable[indices],
+            hand_mask=self.hand_mask[indices],
+            hand_bits=self.hand_bits,
+            categories={
+                name: CategoryColumn(codes=column.codes[indices], vocabulary=column.vocabulary)
+                for name, column in self.categories.items()
+            },
+        )
+
+    def grip_bit(self, grip: Optional[str]) -> int:
+        if not grip:
+            return 0
+        return self.grip_bits.get(grip.strip().lower(), 0)
+
+
+@dataclass(frozen=True)
+class ScoredMouse:
+    index: int
+    score: float
+    length_diff: float
+    width_diff: float
+    grip_match: Optional[bool]
+
+
+def _grip_adjustment(grip_mask: np.ndarray, bit: int) -> np.ndarray:
+    has_grips = grip_mask != 0
+    matched = (grip_mask & np.uint64(bit)) != 0
+    return np.where(has_grips, np.where(matched, GRIP_MATCH_BONUS, -GRIP_MISMATCH_PENALTY), 0.0)
+
+
+def _bounded_scores(length_diff, width_diff, adjustment: Optional[np.ndarray]) -> np.ndarray:
+    # Built from monotone float operations only, so scores at the nearest and farthest
+    # diffs of a range bound every score inside it (see FitLookupGrid).
+    scores = np.maximum(0.0, 100.0 - (length_diff * LENGTH_WEIGHT + width_diff * WIDTH_WEIGHT))
+    if adjustment is not None:
+        scores = scores + adjustment
+    return np.round(scores, 2)
+
+
+def round_score(score: float) -> float:
+    """One score rounded exactly as the vectorized paths round (np.round), which can differ from round()."""
+    return float(np.round(score, 2))
+
+
+def fit_scores(
+    catalog: ColumnarCatalog,
+    length_mm: float,
+    width_mm: float,
+    grip: Optional[str],
+    indices: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (scores, length_diff, width_diff), over `indices` if given; unscorable rows get -inf."""
+    if indices is None:
+        indices = slice(None)
+    length_diff = np.abs(catalog.length_mm[indices] - length_mm)
+    width_diff = np.abs(catalog.width_mm[indices] - width_mm)
+    adjustment = _grip_adjustment(catalog.grip_mask[indices], catalog.grip_bit(grip)) if grip else None
+    scores = _bounded_scores(length_diff, width_diff, adjustment)
+    scores[~catalog.scorable[indices]] = -np.inf
+    return scores, length_diff, width_diff
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, ties broken by catalog order (same as a stable sort)."""
+    finite = int(np.count_nonzero(np.isfinite(scores)))
+    k = min(k, finite)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.flatnonzero(np.isfinite(scores))
+    ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return ordered[:k]
+
+
+def score_top_k(
+    catalog: ColumnarCatalog,
+    length_mm: float,
+    width_mm: float,
+    grip: Optional[str],
+    k: int = 5,
+    candidates: Optional[np.ndarray] = None,
+) -> List[ScoredMouse]:
+    """Top `k` by score, ties by catalog order; `candidates` (ascending indices) limits the scan."""
+    scores, length_diff, width_diff = fit_scores(catalog, length_mm, width_mm, grip, candidates)
+    bit = catalog.grip_bit(grip)
+    winners: List[ScoredMouse] = []
+    for pos in top_k_indices(scores, k):
+        idx = int(candidates[pos]) if candidates is not None else int(pos)
+        mask = int(catalog.grip_mask[idx])
+        grip_match = None if not grip or not mask else bool(mask & bit)
+        winners.append(
+            ScoredMouse(
+                index=idx,
+                score=float(scores[pos]),
+                length_diff=float(length_diff[pos]),
+                width_diff=float(width_diff[pos]),
+                grip_match=grip_match,
+            )
+        )
+    return winners
+
+
+class FitLookupGrid:
+    """
+    Precomputed shortlists over a grid of hand (length, width) cells, one grid per grip.
+
+    A cell keeps every mouse that could make the top `top_k` for some hand inside it: a
+    mouse is dropped only when `top_k` others beat it everywhere in the cell, comparing
+    its score at the cell's nearest edges against theirs at the farthest. Lookups then
+    rescore just the shortlist, so results equal `score_top_k` over the whole catalog.
+    Grids are built on first use per grip and live as long as the catalog snapshot.
+    """
+
+    def __init__(
+        self,
+        catalog: ColumnarCatalog,
+        top_k: int = GRID_TOP_K,
+        cell_mm: float = GRID_CELL_MM,
+        length_range_mm: Tuple[float, float] = GRID_LENGTH_RANGE_MM,
+        width_range_mm: Tuple[float, float] = GRID_WIDTH_RANGE_MM,
+        validate: bool = False,
+    ) -> None:
+        self._catalog = catalog
+        self.top_k = top_k
+        self.cell_mm = cell_mm
+        self._length_edges = length_range_mm[0] + cell_mm * np.arange(
+            int(np.ceil((length_range_mm[1] - length_range_mm[0]) / cell_mm)) + 1
+        )
+        self._width_edges = width_range_mm[0] + cell_mm * np.arange(
+            int(np.ceil((width_range_mm[1] - width_range_mm[0]) / cell_mm)) + 1
+        )
+        self._validate = validate
+        self._lock = threading.Lock()
+        # grip key -> (cell offsets, concatenated shortlists), CSR over row-major cells.
+        self._grids: Dict[Optional[int], Tuple[np.ndarray, np.ndarray]] = {}
+        self._mismatches = 0
+
+    @property
+    def mismatches(self) -> int:
+        return self._mismatches
+
+    def _grip_key(self, grip: Optional[str]) -> Optional[int]:
+        # An unknown grip still penalizes every mouse that lists grips, so it keys as bit 0.
+        return self._catalog.grip_bit(grip) if grip else None
+
+    def _cell(self, length_mm: float, width_mm: float) -> Optional[int]:
+        rows, cols = len(self._length_edges) - 1, len(self._width_edges) - 1
+        i = int(np.searchsorted(self._length_edges, length_mm, side="right")) - 1
+        j = int(np.searchsorted(self._width_edges, width_mm, side="right")) - 1
+        if not (0 <= i < rows and 0 <= j < cols):
+            return None
+        return i * cols + j
+
+    @staticmethod
+    def _diff_bounds(values: np.ndarray, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per (cell, mouse): smallest and largest |value - x| for x within the cell."""
+        lo = edges[:-1, None]
+        hi = edges[1:, None]
+        nearest = np.maximum(0.0, np.maximum(lo - values, values - hi))
+        farthest = np.maximum(np.abs(values - lo), np.abs(values - hi))
+        return nearest, farthest
+
+    @staticmethod
+    def _survivors(upper: np.ndarray, lower: np.ndarray, k: int) -> np.ndarray:
+        """
+        Per row of bounds: keep a mouse unless the k best guaranteed scores (ties by catalog
+        order, i.e. column position) all beat its best case.
+        """
+        if upper.shape[-1] <= k:
+            return np.ones(upper.shape, dtype=bool)
+        floor = -np.partition(-lower, k - 1, axis=-1)[..., k - 1 : k]
+        need = k - np.count_nonzero(lower > floor, axis=-1, keepdims=True)
+        last = np.argmax(np.cumsum(lower == floor, axis=-1) >= need, axis=-1)[..., None]
+        positions = np.arange(upper.shape[-1])
+        return (upper > floor) | ((upper == floor) & (positions <= last))
+
+    def _build(self, key: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        catalog = self._catalog
+        scorable = np.flatnonzero(catalog.scorable)
+        length_near, length_far = self._diff_bounds(catalog.length_mm[scorable], self._length_edges)
+        width_near, width_far = self._diff_bounds(catalog.width_mm[scorable], self._width_edges)
+        adjustment = None if key is None else _grip_adjustment(catalog.grip_mask[scorable], key)
+        # Bounds over blocks of neighbouring cells prune most mice before the per-cell pass.
+        cols = width_near.shape[0]
+        blocks = [slice(start, min(start + GRID_BLOCK_CELLS, cols)) for start in range(0, cols, GRID_BLOCK_CELLS)]
+        block_width_near = np.stack([width_near[block].min(axis=0) for block in blocks])
+        block_width_far = np.stack([width_far[block].max(axis=0) for block in blocks])
+
+        shortlists: List[np.ndarray] = []
+        for i in range(length_near.shape[0]):
+            block_keep = self._survivors(
+                _bounded_scores(length_near[i], block_width_near, adjustment),
+                _bounded_scores(length_far[i], block_width_far, adjustment),
+                self.top_k,
+            )
+            for block, survivors in zip(blocks, block_keep):
+                rows = np.flatnonzero(survivors)
+                block_adjustment = None if adjustment is None else adjustment[rows]
+                keep = self._survivors(
+                    _bounded_scores(length_near[i, rows], width_near[block, rows], block_adjustment),
+                    _bounded_scores(length_far[i, rows], width_far[block, rows], block_adjustment),
+                    self.top_k,
+                )
+                shortlists.extend(scorable[rows[cell]] for cell in keep)
+
+        counts = np.fromiter((len(items) for items in shortlists), dtype=np.int64, count=len(shortlists))
+        offsets = np.zeros(len(shortlists) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        members = np.concatenate(shortlists) if shortlists else np.empty(0, dtype=np.intp)
+        return offsets, members
+
+    def shortlist(self, length_mm: float, width_mm: float, grip: Optional[str]) -> Optional[np.ndarray]:
+        """Candidate indices for this hand, or None when it falls outside the grid."""
+        cell = self._cell(length_mm, width_mm)
+        if cell is None:
+            return None
+        offsets, members = self._grid(self._grip_key(grip))
+        return members[offsets[cell] : offsets[cell + 1]]
+
+    def _grid(self, key: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        grid = self._grids.get(key)
+        if grid is None:
+            with self._lock:
+                grid = self._grids.get(key)
+                if grid is None:
+                    grid = self._build(key)
+                    self._grids[key] = grid
+        return grid
+
+    def warm(self) -> None:
+        """Build the grids for no grip and for every grip in the catalog vocabulary."""
+        for key in (None, *self._catalog.grip_bits.values()):
+            self._grid(key)
+
+    def score_top_k(self, length_mm: float, width_mm: float, grip: Optional[str], k: int = 5) -> List[ScoredMouse]:
+        candidates = self.shortlist(length_mm, width_mm, grip) if k <= self.top_k else None
+        if candidates is None:
+            return score_top_k(self._catalog, length_mm, width_mm, grip, k)
+        winners = score_top_k(self._catalog, length_mm, width_mm, grip, k, candidates)
+        if self._validate:
+            expected = score_top_k(self._catalog, length_mm, width_mm, grip, k)
+            if winners != expected:
+                self._mismatches += 1
+                LOGGER.warning(
+                    "fit_grid_mismatch length_mm=%s width_mm=%s grip=%s grid=%s expected=%s",
+                    length_mm,
+                    width_mm,
+                    grip,
+                    [item.index for item in winners],
+                    [item.index for item in expected],
+                )
+                return expected
+        return winners
+
+
+def format_reason(length_diff: float, width_diff: float, grip_match: Optional[bool]) -> str:
+    reason_parts = [
+        f"Length off by {length_diff:.1f} mm",
+        f"width off by {width_diff:.1f} mm",
+    ]
+    if grip_match is True:
+        reason_parts.append("matches grip preference")
+    elif grip_match is False:
+        reason_parts.append("different grip profile")
+    return "; ".join(reason_parts)
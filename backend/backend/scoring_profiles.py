@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Iterator, List, Mapping, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from backend.scoring import (
+    GRIP_MATCH_BONUS,
+    GRIP_MISMATCH_PENALTY,
+    LENGTH_WEIGHT,
+    WIDTH_WEIGHT,
+    ColumnarCatalog,
+    ScoredMouse,
+    top_k_indices,
+)
+from backend.spatial import IDEAL_LENGTH_RATIO, IDEAL_WIDTH_RATIO
+
+BASE_SCORE = 100.0
+# Per-grip settings fall back to palm for unknown or missing grips, as target_mouse_dims does.
+DEFAULT_GRIP = "palm"
+# Hand-length buckets used by the frontend survey and by sync_eloshapes for `hands`.
+HAND_SIZE_LIMITS_MM = ((170.0, "small"), (190.0, "medium"))
+LARGEST_HAND_SIZE = "large"
+# Batches are scored this many (hand, mouse) cells at a time, bounding the score matrix.
+MAX_SCORE_CELLS = 1 << 22
+
+
+def hand_size(length_mm: float) -> str:
+    for limit, label in HAND_SIZE_LIMITS_MM:
+        if length_mm < limit:
+            return label
+    return LARGEST_HAND_SIZE
+
+
+@dataclass(frozen=True)
+class Hands:
+    """A batch of P hands as (P, 1) columns, so features broadcast them against (N,) catalog arrays."""
+
+    length_mm: np.ndarray
+    width_mm: np.ndarray
+    grips: Tuple[Optional[str], ...]
+
+    @classmethod
+    def of(
+        cls, length_mm: Sequence[float], width_mm: Sequence[float], grips: Sequence[Optional[str]]
+    ) -> "Hands":
+        return cls(
+            length_mm=np.asarray(length_mm, dtype=np.float64).reshape(-1, 1),
+            width_mm=np.asarray(width_mm, dtype=np.float64).reshape(-1, 1),
+            grips=tuple((grip or "").strip().lower() or None for grip in grips),
+        )
+
+    def __len__(self) -> int:
+        return len(self.grips)
+
+    def __getitem__(self, rows: slice) -> "Hands":
+        return Hands(length_mm=self.length_mm[rows], width_mm=self.width_mm[rows], grips=self.grips[rows])
+
+    def chunks(self, columns: int, cells: int = MAX_SCORE_CELLS) -> Iterator["Hands"]:
+        """Consecutive slices of at most `cells` (hand, mouse) pairs against `columns` mice."""
+        step = max(1, cells // max(1, columns))
+        for start in range(0, len(self), step):
+            yield self[start : start + step]
+
+    @property
+    def sizes(self) -> Tuple[str, ...]:
+        return tuple(hand_size(float(length)) for length in self.length_mm[:, 0])
+
+    def per_grip(self, values: Mapping[str, float], default: float) -> np.ndarray:
+        """(P, 1) column of a per-grip setting."""
+        column = [values.get(grip if grip in values else DEFAULT_GRIP, default) for grip in self.grips]
+        return np.array(column, dtype=np.float64).reshape(-1, 1)
+
+    def grip_groups(self) -> List[Tuple[str, np.ndarray]]:
+        """Row indices per distinct grip key (missing grips group under DEFAULT_GRIP)."""
+        keys = [grip or DEFAULT_GRIP for grip in self.grips]
+        return [(key, np.flatnonzero([k == key for k in keys])) for key in dict.fromkeys(keys)]
+
+
+class Feature(Protocol):
+    def evaluate(self, catalog: ColumnarCatalog, hands: Hands) -> np.ndarray:
+        """(P, N) points for every hand against every mouse."""
+
+
+@dataclass(frozen=True)
+class DistancePenalty:
+    """
+    `weight` points per unit `column` misses its target by, past `tolerance`. The target is
+    hand[`source`] * scale + offset (scale and offset per grip), or just the offset when
+    `source` is None. Mice missing the column cost nothing.
+    """
+
+    column: str
+    weight: float
+    source: Optional[str] = None
+    scale: Mapping[str, float] = field(default_factory=dict)
+    offset: Mapping[str, float] = field(default_factory=dict)
+    tolerance: float = 0.0
+
+    def target(self, hands: Hands) -> np.ndarray:
+        base = getattr(hands, self.source) if self.source else 0.0
+        return base * hands.per_grip(self.scale, 1.0) + hands.per_grip(self.offset, 0.0)
+
+    def evaluate(self, catalog: ColumnarCatalog, hands: Hands) -> np.ndarray:
+        values = getattr(catalog, self.column)
+        # In place throughout: these run over every (hand, mouse) cell of the batch.
+        miss = np.subtract(values, self.target(hands))
+        np.abs(miss, out=miss)
+        if self.tolerance:
+            miss -= self.tolerance
+            np.maximum(miss, 0.0, out=miss)
+        miss *= self.weight
+        missing = np.isnan(values)
+        if missing.any():
+            miss[:, missing] = 0.0
+        return miss
+
+
+@dataclass(frozen=True)
+class MembershipMatch:
+    """
+    +`bonus` when a mouse's bitmask `column` ("grips" or "hands") includes the hand's grip or
+    size, -`penalty` when it lists only others. Mice listing nothing, and hands without a
+    grip, are neutral.
+    """
+
+    column: str
+    bonus: float
+    penalty: float
+
+    def evaluate(self, catalog: ColumnarCatalog, hands: Hands) -> np.ndarray:
+        if self.column == "grips":
+            masks, bits, keys = catalog.grip_mask, catalog.grip_bits, hands.grips
+        else:
+            masks, bits, keys = catalog.hand_mask, catalog.hand_bits, hands.sizes
+        # One (N,) row per distinct key, gathered out to the batch; an unknown value keys as
+        # bit 0, so it counts as a mismatch like score_top_k.
+        distinct = list(dict.fromkeys(keys))
+        table = np.zeros((len(distinct), len(masks)), dtype=np.float64)
+        for pos, key in enumerate(distinct):
+            if key is not None:
+                matched = (masks & np.uint64(bits.get(key, 0))) != 0
+                table[pos] = np.where(masks != 0, np.where(matched, self.bonus, -self.penalty), 0.0)
+        return table[[distinct.index(key) for key in keys]]
+
+
+@dataclass(frozen=True)
+class CategoryPreference:
+    """
+    +`bonus` when a mouse's `column` label is preferred for the hand's grip, -`penalty` when
+    it is another label. Unlabeled mice and grips without preferences are neutral.
+    """
+
+    column: str
+    preferred: Mapping[str, Tuple[str, ...]]
+    bonus: float
+    penalty: float
+
+    def evaluate(self, catalog: ColumnarCatalog, hands: Hands) -> np.ndarray:
+        category = catalog.categories[self.column]
+        labeled = category.codes >= 0
+        points = np.zeros((len(hands), len(catalog)), dtype=np.float64)
+        # One vectorized pass per distinct grip in the batch, never per mouse.
+        for grip, rows in hands.grip_groups():
+            if grip not in self.preferred:
+                continue
+            hit = np.isin(category.codes, category.codes_for(self.preferred[grip]))
+            points[rows] = np.where(labeled, np.where(hit, self.bonus, -self.penalty), 0.0)
+        return points
+
+
+@dataclass(frozen=True)
+class ScoringProfile:
+    """
+    A named set of weighted features. `fit` penalties come off BASE_SCORE, floored at zero;
+    `adjustments` are added after the floor. Mice without length and width score -inf.
+    """
+
+    name: str
+    fit: Tuple[DistancePenalty, ...]
+    adjustments: Tuple[Feature, ...] = ()
+
+    @property
+    def key(self) -> str:
+        """Name plus a digest of the definition, so memoized reports follow weight changes."""
+        digest = hashlib.sha1(repr(self).encode("utf-8")).hexdigest()[:8]
+        return f"{self.name}-{digest}"
+
+    def scores(self, catalog: ColumnarCatalog, hands: Hands) -> np.ndarray:
+        """(P, N) scores for every hand in the batch against the whole catalog."""
+        scores = np.zeros((len(hands), len(catalog)), dtype=np.float64)
+        for feature in self.fit:
+            scores += feature.evaluate(catalog, hands)
+        np.subtract(BASE_SCORE, scores, out=scores)
+        np.maximum(scores, 0.0, out=scores)
+        for feature in self.adjustments:
+            scores += feature.evaluate(catalog, hands)
+        np.round(scores, 2, out=scores)
+        scores[:, ~catalog.scorable] = -np.inf
+        return scores
+
+    def _targets(self, hands: Hands) -> Tuple[np.ndarray, np.ndarray]:
+        targets = {feature.column: feature.target(hands) for feature in self.fit}
+        return targets.get("length_mm", hands.length_mm), targets.get("width_mm", hands.width_mm)
+
+    def top_k(self, catalog: ColumnarCatalog, hands: Hands, k: int = 5) -> List[List[ScoredMouse]]:
+        """Per hand, the `k` best mice with ties in catalog order; diffs are against this profile's targets."""
+        results: List[List[ScoredMouse]] = []
+        for chunk in hands.chunks(len(catalog)):
+            results.extend(self._top_k_chunk(catalog, chunk, k))
+        return results
+
+    def _top_k_chunk(self, catalog: ColumnarCatalog, hands: Hands, k: int) -> List[List[ScoredMouse]]:
+        scores = self.scores(catalog, hands)
+        length_target, width_target = self._targets(hands)
+        results: List[List[ScoredMouse]] = []
+        for row, grip in enumerate(hands.grips):
+            bit = np.uint64(catalog.grip_bit(grip))
+            winners = top_k_indices(scores[row], k)
+            length_diff = np.abs(catalog.length_mm[winners] - length_target[row, 0])
+            width_diff = np.abs(catalog.width_mm[winners] - width_target[row, 0])
+            masks = catalog.grip_mask[winners]
+            results.append(
+                [
+                    ScoredMouse(
+                        index=int(idx),
+                        score=float(scores[row, idx]),
+                        length_diff=float(length_diff[pos]),
+                        width_diff=float(width_diff[pos]),
+                        grip_match=None if not grip or not masks[pos] else bool(masks[pos] & bit),
+                    )
+                    for pos, idx in enumerate(winners)
+                ]
+            )
+        return results
+
+
+# Same formula as scoring.fit_scores, which FitLookupGrid accelerates.
+CLASSIC = ScoringProfile(
+    name="classic",
+    fit=(
+        DistancePenalty("length_mm", LENGTH_WEIGHT, source="length_mm"),
+        DistancePenalty("width_mm", WIDTH_WEIGHT, source="width_mm"),
+    ),
+    adjustments=(MembershipMatch("grips", GRIP_MATCH_BONUS, GRIP_MISMATCH_PENALTY),),
+)
+
+# Grip-aware targets from the frontend's sizing model plus the catalog's shape columns.
+SHAPE = ScoringProfile(
+    name="shape",
+    fit=(
+        DistancePenalty("length_mm", 1.2, source="length_mm", scale=IDEAL_LENGTH_RATIO, tolerance=2.0),
+        DistancePenalty("width_mm", 1.4, source="width_mm", scale=IDEAL_WIDTH_RATIO, tolerance=1.5),
+        DistancePenalty("height_mm", 1.5, offset={"palm": 41.0, "claw": 38.5, "fingertip": 37.2}, tolerance=1.5),
+        DistancePenalty("weight_g", 0.25, offset={"palm": 65.0, "claw": 65.0, "fingertip": 45.0}, tolerance=10.0),
+    ),
+    adjustments=(
+        MembershipMatch("grips", 6.0, 4.0),
+        MembershipMatch("hands", 4.0, 3.0),
+        CategoryPreference("shape", {"claw": ("sym",), "fingertip": ("sym",)}, 2.0, 2.0),
+        CategoryPreference(
+            "hump",
+            {"palm": ("center", "back"), "claw": ("back_high", "back"), "fingertip": ("center", "front")},
+            3.0,
+            2.0,
+        ),
+        CategoryPreference("side_profile", {"claw": ("slanted",)}, 2.0, 1.0),
+        CategoryPreference("front_flare", {"fingertip": ("flared",)}, 1.0, 0.0),
+    ),
+)
+
+SCORING_PROFILES: Mapping[str, ScoringProfile] = {profile.name: profile for profile in (CLASSIC, SHAPE)}
+
+
+class UnknownProfile(ValueError):
+    pass
+
+
+def parse_variants(spec: str) -> Tuple[Tuple[str, int], ...]:
+    """'classic=50,shape=50' -> (('classic', 50), ('shape', 50)); unknown names or bad weights raise."""
+    variants = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCORING_PROFILES:
+            raise UnknownProfile(f"Unknown scoring profile: {name}")
+        variants.append((name, int(weight or 1)))
+    if any(weight < 0 for _, weight in variants):
+        raise ValueError("Variant weights must be non-negative.")
+    return tuple(variants)
+
+
+def resolve_profile(
+    requested: Optional[str],
+    session_id: str,
+    default: str = CLASSIC.name,
+    variants: Sequence[Tuple[str, int]] = (),
+) -> ScoringProfile:
+    """
+    An explicit `requested` name wins; otherwise a session is bucketed into `variants` by a
+    stable hash of its id, so it sees the same profile on every report; otherwise `default`.
+    """
+    if requested:
+        profile = SCORING_PROFILES.get(requested.strip().lower())
+        if profile is None:
+            raise UnknownProfile(f"Unknown scoring profile: {requested}")
+        return profile
+    total = sum(weight for _, weight in variants)
+    if total > 0:
+        bucket = int(hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:8], 16) % total
+        for name, weight in variants:
+            if bucket < weight:
+                return SCORING_PROFILES[name]
+            bucket -= weight
+    return SCORING_PROFILES.get(default, CLASSIC)
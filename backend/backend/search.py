@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+SEARCH_FIELDS = ("brand", "model", "variant", "source_handle")
+MAX_QUERY_TOKENS = 8
+MIN_FUZZY_LENGTH = 3
+MAX_FUZZY_CANDIDATES = 8
+# Narrow candidates through a dense mask while a token's postings are at most this many
+# times the candidate count; past that, checking each candidate's own terms is cheaper.
+MASK_FILTER_RATIO = 16
+# Queries whose rarest token still covers this share of the catalog (first keystrokes) are
+# memoized per index; the index is rebuilt with each snapshot, so entries never go stale.
+BROAD_QUERY_SHARE = 8
+BROAD_CACHE_SIZE = 1024
+FIRST_CHUNK = 64
+
+# Per query token: a whole-term hit beats a prefix hit, which beats a typo-tolerant hit.
+EXACT_WEIGHT = 3
+PREFIX_WEIGHT = 2
+FUZZY_WEIGHT = 1
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    if text is None:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f"${term}$"
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _max_edits(term: str) -> int:
+    return 1 if len(term) < 8 else 2
+
+
+def _within_edits(a: str, b: str, limit: int) -> bool:
+    """Edit distance (adjacent transpositions count once) <= limit, abandoning hopeless rows."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    index: int
+    score: int
+
+
+class SearchIndex:
+    """
+    Token index over brand/model/variant/source_handle for typeahead lookups.
+
+    The sorted term list is a flattened prefix trie: every prefix maps to a contiguous
+    term range, and postings are stored term-major so that range is one slice of
+    `_posting_docs`. Alphabetic terms also get a trigram index for typo tolerance.
+    Ranking is per-token match quality, ties broken by catalog order.
+    """
+
+    def __init__(self, rows: Sequence[Mapping[str, Any]], fields: Iterable[str] = SEARCH_FIELDS) -> None:
+        fields = tuple(fields)
+        self._size = len(rows)
+        doc_terms: List[Tuple[int, str]] = []
+        for idx, row in enumerate(rows):
+            seen = set()
+            for field in fields:
+                seen.update(tokenize(row.get(field)))
+            doc_terms.extend((idx, term) for term in seen)
+
+        self._terms: List[str] = sorted({term for _, term in doc_terms})
+        term_ids: Dict[str, int] = {term: tid for tid, term in enumerate(self._terms)}
+        docs = np.fromiter((idx for idx, _ in doc_terms), dtype=np.int32, count=len(doc_terms))
+        tids = np.fromiter((term_ids[term] for _, term in doc_terms), dtype=np.int32, count=len(doc_terms))
+        order = np.lexsort((docs, tids))
+        self._posting_docs = docs[order]
+        self._term_offsets = np.searchsorted(tids[order], np.arange(len(self._terms) + 1)).astype(np.int64)
+        # Doc-major copy (CSR) so other query tokens are checked per candidate, not per posting.
+        order = np.lexsort((tids, docs))
+        self._doc_terms = tids[order]
+        self._doc_offsets = np.searchsorted(docs[order], np.arange(self._size + 1)).astype(np.int64)
+
+        grams: Dict[str, List[int]] = {}
+        for tid, term in enumerate(self._terms):
+            if len(term) >= MIN_FUZZY_LENGTH and term.isalpha():
+                for gram in set(_trigrams(term)):
+                    grams.setdefault(gram, []).append(tid)
+        self._grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        self._term_lengths = np.array([len(term) for term in self._terms], dtype=np.int16)
+        self._broad_cache: Dict[Tuple[Tuple[str, ...], int], List[SearchHit]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self._terms, prefix)
+        hi = bisect_left(self._terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        return lo, hi
+
+    def _docs(self, lo: int, hi: int) -> np.ndarray:
+        return self._posting_docs[self._term_offsets[lo] : self._term_offsets[hi]]
+
+    def _fuzzy_terms(self, token: str) -> List[int]:
+        if len(token) < MIN_FUZZY_LENGTH or not token.isalpha():
+            return []
+        chunks = [self._grams[gram] for gram in set(_trigrams(token)) if gram in self._grams]
+        if not chunks:
+            return []
+        limit = _max_edits(token)
+        shared = np.bincount(np.concatenate(chunks))
+        # Each edit destroys at most three trigrams of the padded term.
+        candidates = np.flatnonzero(shared >= max(1, len(token) - 3 * limit))
+        candidates = candidates[np.abs(self._term_lengths[candidates] - len(token)) <= limit]
+        # Most shared trigrams first, so the verification budget goes to the likeliest terms.
+        candidates = candidates[np.argsort(-shared[candidates], kind="stable")][:MAX_FUZZY_CANDIDATES]
+        return [int(tid) for tid in candidates if _within_edits(token, self._terms[tid], limit)]
+
+    def _candidate_terms(self, candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Flattened term ids of `candidates` plus the segment start of each candidate."""
+        starts = self._doc_offsets[candidates]
+        counts = self._doc_offsets[candidates + 1] - starts
+        segments = np.zeros(len(candidates), dtype=np.int64)
+        np.cumsum(counts[:-1], out=segments[1:])
+        positions = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(segments - starts, counts)
+        return self._doc_terms[positions], segments
+
+    def _score(
+        self, candidates: np.ndarray, matchers: Sequence[Tuple[np.ndarray, int, int]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        terms, segments = self._candidate_terms(candidates)
+        keep = np.ones(len(candidates), dtype=bool)
+        scores = np.zeros(len(candidates), dtype=np.int16)
+        for term_ranges, weight, exact in matchers:
+            if len(term_ranges) == 1:
+                lo, hi = term_ranges[0]
+                hit_terms = (terms >= lo) & (terms < hi)
+            else:
+                hit_terms = np.isin(terms, term_ranges[:, 0])
+            hit = np.logical_or.reduceat(hit_terms, segments)
+            keep &= hit
+            scores += hit * weight
+            if exact >= 0:
+                scores += np.logical_or.reduceat(terms == exact, segments) * (EXACT_WEIGHT - PREFIX_WEIGHT)
+        return keep, scores
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        tokens = tuple(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+        if not tokens or limit <= 0 or self._size == 0:
+            return []
+        cached = self._broad_cache.get((tokens, limit))
+        if cached is not None:
+            return list(cached)
+
+        # Per token: (term ranges it matches, weight, exact term id or -1) and its postings.
+        matchers: List[Tuple[np.ndarray, int, int]] = []
+        postings: List[np.ndarray] = []
+        for token in tokens:
+            lo, hi = self._prefix_range(token)
+            if lo < hi:
+                exact = lo if self._terms[lo] == token else -1
+                matchers.append((np.array([[lo, hi]], dtype=np.int64), PREFIX_WEIGHT, exact))
+                postings.append(self._docs(lo, hi))
+                continue
+            fuzzy = self._fuzzy_terms(token)
+            if not fuzzy:
+                return []
+            ids = np.array(fuzzy, dtype=np.int64)
+            matchers.append((np.column_stack((ids, ids + 1)), FUZZY_WEIGHT, -1))
+            postings.append(np.concatenate([self._docs(tid, tid + 1) for tid in fuzzy]))
+
+        # Drive from the rarest token, then intersect with the others from rarest up.
+        order = sorted(range(len(postings)), key=lambda pos: len(postings[pos]))
+        mask = np.zeros(self._size, dtype=bool)
+        driver = postings[order[0]]
+        mask[driver] = True
+        broad = len(driver) * BROAD_QUERY_SHARE > self._size
+        candidates = np.flatnonzero(mask) if broad else np.unique(driver)
+        mask[driver] = False
+        for pos in order[1:]:
+            docs = postings[pos]
+            if len(docs) > MASK_FILTER_RATIO * len(candidates):
+                break
+            mask[docs] = True
+            candidates = candidates[mask[candidates]]
+            mask[docs] = False
+            if len(candidates) == 0:
+                return []
+
+        best = sum(EXACT_WEIGHT if exact >= 0 else weight for _, weight, exact in matchers)
+        kept: List[np.ndarray] = []
+        kept_scores: List[np.ndarray] = []
+        best_hits = 0
+        # Candidates are in catalog order, so once `limit` of them reach the best possible
+        # score nothing later can outrank them and the remaining chunks are skipped.
+        start, size = 0, FIRST_CHUNK
+        while start < len(candidates):
+            chunk = candidates[start : start + size]
+            start, size = start + size, size * 4
+            keep, scores = self._score(chunk, matchers)
+            kept.append(chunk[keep])
+            kept_scores.append(scores[keep])
+            best_hits += int(np.count_nonzero(kept_scores[-1] == best))
+            if best_hits >= limit:
+                break
+
+        matched = np.concatenate(kept)
+        matched_scores = np.concatenate(kept_scores)
+        hits: List[SearchHit] = []
+        # Few distinct score levels, and candidates are already in catalog order within each.
+        for level in np.unique(matched_scores)[::-1]:
+            for idx in matched[matched_scores == level][: limit - len(hits)]:
+                hits.append(SearchHit(index=int(idx), score=int(level)))
+            if len(hits) >= limit:
+                break
+        if broad:
+            if len(self._broad_cache) >= BROAD_CACHE_SIZE:
+                self._broad_cache.clear()
+            self._broad_cache[(tokens, limit)] = list(hits)
+        return hits
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from backend import config
+
+KINDS = ("measurement", "grip")
+
+
+@dataclass(frozen=True)
+class CachedRow:
+    id: int
+    value: Any
+
+
+@dataclass(frozen=True)
+class SessionState:
+    measurement: CachedRow
+    grip: CachedRow
+
+
+class _UserState:
+    __slots__ = ("expires_at", "rows")
+
+    def __init__(self, expires_at: float) -> None:
+        self.expires_at = expires_at
+        # kind -> the row this worker last committed for the caller; a missing kind is unknown.
+        self.rows: Dict[str, CachedRow] = {}
+
+
+class SessionStateCache:
+    """
+    Per-worker LRU of the measurement and grip each (session, user) last wrote through this
+    worker. A caller's own newest row is what the database read resolves for them (their rows
+    win over guest rows), so a report right after measure -> grip on the same worker needs only
+    the memo lookup. Entries are trusted without a database check for `ttl_sec` after the
+    write, the window in which a row written for the session on another worker can be missed.
+    At most `max_sessions` sessions are kept.
+    """
+
+    def __init__(self, ttl_sec: float = 10.0, max_sessions: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._ttl_sec = ttl_sec
+        self._max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[Optional[str], _UserState]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str, user_id: Optional[str]) -> Optional[SessionState]:
+        """Both rows for the caller, or None unless both were written here and are fresh."""
+        with self._lock:
+            users = self._sessions.get(session_id)
+            state = users.get(user_id) if users is not None else None
+            if state is None or state.expires_at <= time.monotonic() or len(state.rows) < len(KINDS):
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return SessionState(measurement=state.rows["measurement"], grip=state.rows["grip"])
+
+    def record_write(self, session_id: str, user_id: Optional[str], kind: str, row_id: int, value: Any) -> None:
+        """A row this worker just committed; it is now the caller's latest of its kind."""
+        if self._ttl_sec <= 0:
+            return
+        with self._lock:
+            users = self._sessions.get(session_id)
+            if users is None:
+                users = self._sessions[session_id] = {}
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            now = time.monotonic()
+            state = users.get(user_id)
+            if state is None or state.expires_at <= now:
+                state = users[user_id] = _UserState(now + self._ttl_sec)
+            else:
+                state.expires_at = now + self._ttl_sec
+            state.rows[kind] = CachedRow(row_id, value)
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session whose rows were written without their ids (buffered or bulk writes)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+SESSION_STATE = SessionStateCache(ttl_sec=config.SESSION_STATE_TTL_SEC, max_sessions=config.SESSION_STATE_MAX_SESSIONS)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TARGET_POINTS_PER_CELL = 16
+MIN_CELL_MM = 0.25
+MAX_CELL_MM = 10.0
+
+# Hand -> shell ratios, kept in step with frontend/public/src/js/report-matcher-core.js.
+IDEAL_LENGTH_RATIO = {"palm": 0.7, "claw": 0.62, "fingertip": 0.55}
+IDEAL_WIDTH_RATIO = {"palm": 0.7, "claw": 0.68, "fingertip": 0.64}
+
+
+def target_mouse_dims(hand_length_mm: float, hand_width_mm: float, grip: Optional[str]) -> Tuple[float, float]:
+    key = (grip or "palm").strip().lower()
+    if key not in IDEAL_LENGTH_RATIO:
+        key = "palm"
+    return (
+        round(hand_length_mm * IDEAL_LENGTH_RATIO[key], 1),
+        round(hand_width_mm * IDEAL_WIDTH_RATIO[key], 1),
+    )
+
+
+@dataclass(frozen=True)
+class Neighbor:
+    index: int
+    distance_mm: float
+
+
+class FitGridIndex:
+    """
+    Uniform grid over (length_mm, width_mm) buckets; height is carried per point and used
+    for the distance and tolerance check when the query supplies it. A query only visits
+    the cells overlapping its tolerance box, so cost tracks local density, not catalog size.
+    """
+
+    def __init__(
+        self,
+        length_mm: np.ndarray,
+        width_mm: np.ndarray,
+        height_mm: np.ndarray,
+        cell_mm: Optional[float] = None,
+    ) -> None:
+        self._points = np.column_stack((length_mm, width_mm, height_mm)).astype(np.float64, copy=False)
+        indexed = np.flatnonzero(~np.isnan(length_mm) & ~np.isnan(width_mm))
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        self.cell_mm = cell_mm or self._auto_cell_mm(self._points[indexed, :2])
+        if indexed.size == 0:
+            return
+
+        keys = np.floor(self._points[indexed, :2] / self.cell_mm).astype(np.int64)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse))[:-1]
+        for key, members in zip(unique_keys, np.split(indexed[order], splits)):
+            self._cells[(int(key[0]), int(key[1]))] = members
+
+    @staticmethod
+    def _auto_cell_mm(points: np.ndarray) -> float:
+        # Size cells so an average occupied cell holds a handful of mice at any catalog size.
+        if len(points) == 0:
+            return MAX_CELL_MM
+        extent = np.ptp(points, axis=0)
+        area = float(max(extent[0], 1.0) * max(extent[1], 1.0))
+        cell = float(np.sqrt(area * TARGET_POINTS_PER_CELL / len(points)))
+        return min(MAX_CELL_MM, max(MIN_CELL_MM, cell))
+
+    def __len__(self) -> int:
+        return sum(members.size for members in self._cells.values())
+
+    def _ring(self, center: Tuple[int, int], radius: int, bounds: Tuple[range, range]) -> List[np.ndarray]:
+        ci, cj = center
+        rows, cols = bounds
+        if radius == 0:
+            cells = [(ci, cj)]
+        else:
+            cells = [(ci + di, cj + dj) for di in (-radius, radius) for dj in range(-radius, radius + 1)]
+            cells += [(ci + di, cj + dj) for dj in (-radius, radius) for di in range(-radius + 1, radius)]
+        return [
+            members
+            for cell in cells
+            if cell[0] in rows and cell[1] in cols and (members := self._cells.get(cell)) is not None
+        ]
+
+    def query(
+        self,
+        length_mm: float,
+        width_mm: float,
+        height_mm: Optional[float] = None,
+        k: int = 10,
+        tolerance_mm: float = 10.0,
+    ) -> List[Neighbor]:
+        if k <= 0 or not self._cells:
+            return []
+        cell = self.cell_mm
+        center = (int(np.floor(length_mm / cell)), int(np.floor(width_mm / cell)))
+        bounds = (
+            range(int(np.floor((length_mm - tolerance_mm) / cell)), int(np.floor((length_mm + tolerance_mm) / cell)) + 1),
+            range(int(np.floor((width_mm - tolerance_mm) / cell)), int(np.floor((width_mm + tolerance_mm) / cell)) + 1),
+        )
+        max_radius = max(center[0] - bounds[0].start, bounds[0].stop - 1 - center[0],
+                         center[1] - bounds[1].start, bounds[1].stop - 1 - center[1])
+        target = np.array([length_mm, width_mm] + ([] if height_mm is None else [height_mm]))
+
+        found: List[np.ndarray] = []
+        found_dist: List[np.ndarray] = []
+        for radius in range(max_radius + 1):
+            chunks = self._ring(center, radius, bounds)
+            if chunks:
+                candidates = np.concatenate(chunks)
+                points = self._points[candidates, : target.size]
+                deltas = points - target
+                # NaN heights fail the comparison, so rows without a height drop out of 3D queries.
+                within = np.all(np.abs(deltas) <= tolerance_mm, axis=1)
+                found.append(candidates[within])
+                found_dist.append(np.sqrt(np.sum(deltas[within] ** 2, axis=1)))
+            # Anything outside ring `radius` is at least radius * cell away from the query point.
+            total = sum(chunk.size for chunk in found)
+            if total >= k and np.partition(np.concatenate(found_dist), k - 1)[k - 1] < radius * cell:
+                break
+
+        if not found:
+            return []
+        candidates = np.concatenate(found)
+        distances = np.concatenate(found_dist)
+        order = np.lexsort((candidates, distances))[:k]
+        return [Neighbor(index=int(candidates[i]), distance_mm=float(distances[i])) for i in order]
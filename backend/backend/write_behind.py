@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import psycopg
+except Exception:  # pragma: no cover - optional in limited test envs
+    psycopg = None
+
+from backend import config
+
+LOGGER = logging.getLogger("mousefit.write_behind")
+
+# Column order of the rows callers offer, per table.
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "measurements": ("session_id", "user_id", "length_mm", "width_mm", "length_cm", "width_cm", "created_at"),
+    "grips": ("session_id", "user_id", "grip", "confidence", "created_at"),
+}
+NULLABLE_COLUMNS = frozenset({"user_id"})
+
+PendingRow = Tuple[str, Tuple[Any, ...]]
+
+
+def copy_rows(cur, table: str, rows: Iterable[Tuple[Any, ...]]) -> None:
+    """COPY rows, in TABLE_COLUMNS order, into a session table within the cursor's transaction."""
+    with cur.copy(f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def storable(table: str, row: Tuple[Any, ...]) -> bool:
+    """Whether COPY can take the row: the right arity, no NULs in NOT NULL columns, NUL-free text, finite numbers."""
+    columns = TABLE_COLUMNS[table]
+    if len(row) != len(columns):
+        return False
+    for column, value in zip(columns, row):
+        if value is None:
+            if column not in NULLABLE_COLUMNS:
+                return False
+        elif isinstance(value, str):
+            # Postgres text cannot hold NUL bytes.
+            if "\x00" in value:
+                return False
+        elif isinstance(value, float) and not math.isfinite(value):
+            return False
+    return True
+
+
+def _row_error(exc: BaseException) -> bool:
+    # Errors one bad row causes; anything else (a lost connection, a full disk) fails every row alike.
+    return psycopg is not None and isinstance(exc, (psycopg.DataError, psycopg.IntegrityError))
+
+
+class WriteBehindBuffer:
+    """
+    Bounded per-worker queue of session rows (measurements, grips) that a background thread
+    COPYs into Postgres in one transaction per batch, instead of one pool checkout and commit
+    per request. Rows are acknowledged before they are durable: a crash loses whatever is
+    still queued, at most `max_rows` rows or about `flush_interval_sec` of traffic.
+
+    `offer` refuses rows (the caller writes synchronously) when the buffer is not running, is
+    full, or the row could not be stored. A batch the database rejects for one of its rows is
+    retried row by row; rows that still fail are logged and kept in `dead_letters` instead of
+    blocking the queue. A batch that fails for any other reason stays at the head of the queue
+    and is retried.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 5000,
+        flush_interval_sec: float = 0.01,
+        max_batch: int = 1000,
+        synchronous_commit: bool = True,
+        retry_delay_sec: float = 0.5,
+        max_dead_letters: int = 100,
+    ) -> None:
+        self._max_rows = max_rows
+        self._flush_interval_sec = flush_interval_sec
+        self._max_batch = max_batch
+        self._synchronous_commit = synchronous_commit
+        self._retry_delay_sec = retry_delay_sec
+        self._lock = threading.Lock()
+        # Held for the whole of a flush, so waiting on it means earlier batches have committed.
+        self._flush_lock = threading.Lock()
+        self._rows: Deque[PendingRow] = deque()
+        self._sessions: Counter = Counter()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connect: Optional[Callable[[], Any]] = None
+        # The most recent rows the database would not take, for inspection; older ones are only logged.
+        self.dead_letters: Deque[PendingRow] = deque(maxlen=max_dead_letters)
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.refused = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, connect: Callable[[], Any]) -> None:
+        """`connect()` returns a connection context manager, e.g. a pool checkout."""
+        with self._lock:
+            if self.running:
+                return
+            self._connect = connect
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mousefit-write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_sec: float = 10.0) -> None:
+        """Stop accepting rows and flush what is queued; call before the pool closes."""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_sec)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            LOGGER.exception("write_behind_shutdown_flush_failed pending=%d", self.pending)
+
+    def offer(self, table: str, row: Tuple[Any, ...]) -> bool:
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown write-behind table: {table}")
+        if not storable(table, row):
+            # Never acknowledge a row the flush could not write; the caller's synchronous insert reports the error.
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            if self._stop.is_set() or not self.running or len(self._rows) >= self._max_rows:
+                self.refused += 1
+                return False
+            self._rows.append((table, row))
+            self._sessions[row[0]] += 1
+            if len(self._rows) >= self._max_batch:
+                self._wake.set()
+        return True
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def has_pending(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions[session_id] > 0
+
+    def flush_session(self, session_id: str) -> None:
+        """Commit everything queued before reading or synchronously writing this session's rows."""
+        if self.has_pending(session_id):
+            self.flush()
+
+    def flush(self) -> int:
+        """Drain the queue from the calling thread; raises if a batch cannot be written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return written
+                self._write(batch)
+                written += len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "refused": self.refused,
+            "rejected": self.rejected,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def _take(self) -> List[PendingRow]:
+        with self._lock:
+            count = min(len(self._rows), self._max_batch)
+            return [self._rows.popleft() for _ in range(count)]
+
+    def _write(self, batch: List[PendingRow]) -> None:
+        try:
+            self._copy(batch)
+        except Exception as exc:
+            with self._lock:
+                self.failures += 1
+            if not _row_error(exc):
+                self._requeue(batch)
+                raise
+            self._write_one_by_one(batch)
+            return
+        self._done(batch)
+
+    def _write_one_by_one(self, batch: List[PendingRow]) -> None:
+        """Isolate the rows that failed a batch; the others are written in a transaction each."""
+        for idx, item in enumerate(batch):
+            try:
+                self._copy([item])
+            except Exception as exc:
+                if not _row_error(exc):
+                    self._requeue(batch[idx:])
+                    raise
+                table, row = item
+                LOGGER.error("write_behind_row_dead_lettered table=%s session_id=%r error=%s", table, row[0], exc)
+                with self._lock:
+                    self.dead_letters.append(item)
+                    self.dead_lettered += 1
+                self._done([item], written=False)
+            else:
+                self._done([item])
+
+    def _copy(self, batch: List[PendingRow]) -> None:
+        by_table: Dict[str, List[Tuple[Any, ...]]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+        assert self._connect is not None, "write-behind buffer was never started"
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                if not self._synchronous_commit:
+                    cur.execute("SET LOCAL synchronous_commit = off")
+                for table, rows in by_table.items():
+                    copy_rows(cur, table, rows)
+            conn.commit()
+
+    def _requeue(self, batch: List[PendingRow]) -> None:
+        with self._lock:
+            self._rows.extendleft(reversed(batch))
+
+    def _done(self, batch: List[PendingRow], written: bool = True) -> None:
+        with self._lock:
+            if written:
+                self.flushes += 1
+                self.flushed += len(batch)
+            for _table, row in batch:
+                self._sessions[row[0]] -= 1
+                if self._sessions[row[0]] <= 0:
+                    del self._sessions[row[0]]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_interval_sec)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                LOGGER.exception("write_behind_flush_failed pending=%d", self.pending)
+                self._stop.wait(self._retry_delay_sec)
+
+
+WRITE_BEHIND = WriteBehindBuffer(
+    max_rows=config.WRITE_BEHIND_MAX_ROWS,
+    flush_interval_sec=config.WRITE_BEHIND_FLUSH_MS / 1000.0,
+    max_batch=config.WRITE_BEHIND_BATCH,
+    synchronous_commit=config.WRITE_BEHIND_SYNC_COMMIT,
+)
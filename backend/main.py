@@ -3,17 +3,23 @@ from __future__ import annotations
 import json
 import logging
 import os
+import re
 import time
 import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Literal, Optional
+from typing import Annotated, Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import AwareDatetime, BaseModel, Field, TypeAdapter, ValidationError, field_validator
+from psycopg import Pipeline
 from psycopg.rows import dict_row
 try:
     from psycopg_pool import ConnectionPool
@@ -21,9 +27,39 @@ except Exception:  # pragma: no cover - optional in limited test envs
     ConnectionPool = None  # type: ignore[assignment]
 
 from backend import config
-from backend.auth import AuthError, parse_bearer_token, verify_bearer_token
+from backend.auth import (
+    VERIFIED_TOKENS,
+    AuthError,
+    parse_bearer_token,
+    start_jwks_refresh,
+    stop_jwks_refresh,
+    verify_bearer_token,
+)
 from backend.api.routes_rag import router as rag_router
+from backend.catalog import CATALOG, CatalogSnapshot, encode_json
+from backend.catalog_events import CATALOG_LISTENER, notify_catalog_changed
+from backend.catalog_query import MAX_PAGE_SIZE, InvalidCursor, build_query, run_query
+from backend.http_cache import conditional_response
+from backend.idempotency import (
+    CLAIM_LEASE_SEC,
+    CLAIM_SQL,
+    COMPLETE_SQL,
+    IDEMPOTENCY,
+    MAX_KEY_LENGTH,
+    RELEASE_SQL,
+    StoredResponse,
+    request_fingerprint,
+    scoped_key,
+)
 from backend.metrics import METRICS
+from backend.partitions import ROLLUP_TABLES_DDL, ensure_upcoming_partitions, session_cutoff
+from backend.profile_seeds import PROFILE_SEEDS, seed_fingerprint
+from backend.rag.retriever import invalidate_index as invalidate_rag_index
+from backend.scoring import format_reason, round_score
+from backend.scoring_profiles import CLASSIC, Hands, ScoringProfile, UnknownProfile, parse_variants, resolve_profile
+from backend.session_state import SESSION_STATE, SessionState
+from backend.spatial import target_mouse_dims
+from backend.write_behind import WRITE_BEHIND, copy_rows
 
 try:
     import sentry_sdk
@@ -32,6 +68,8 @@ except Exception:  # pragma: no cover - optional dependency
 
 DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
 _POOL: Optional[ConnectionPool] = None
+# A checkout the current request already holds (see _idempotent); get_conn() hands it out again.
+_REQUEST_CONN: ContextVar[Optional[Any]] = ContextVar("mousefit_request_conn", default=None)
 LOGGER = logging.getLogger("mousefit.api")
 
 
@@ -91,9 +129,30 @@ def get_pool() -> ConnectionPool:
 
 
 def get_conn():
+    conn = _REQUEST_CONN.get()
+    if conn is not None:
+        return nullcontext(conn)
     return get_pool().connection()
 
 
+def ensure_session_partitions() -> None:
+    """
+    This month's and the next few months' session partitions, at every worker start, so rows
+    keep landing in monthly partitions even when the retention job has stopped running.
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                created = ensure_upcoming_partitions(cur)
+            conn.commit()
+    except Exception:
+        # The app role may lack CREATE on the schema; the retention job covers that deployment.
+        LOGGER.exception("session_partitions_ensure_failed")
+        return
+    if created:
+        LOGGER.info("session_partitions_created names=%s", ",".join(created))
+
+
 def _ensure_columns(conn, table_name: str, required: Dict[str, str]) -> None:
     with conn.cursor() as cur:
         cur.execute(
@@ -169,47 +228,62 @@ def init_db() -> None:
                     discount_code TEXT,
                     price_usd NUMERIC,
                     price_status TEXT,
-                    source_payload JSONB,
                     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
                     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
                 )
                 """
             )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS mouse_sources (
+                    mouse_id TEXT PRIMARY KEY REFERENCES mice (id) ON DELETE CASCADE,
+                    source TEXT,
+                    payload JSONB NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS measurements (
-                    id BIGSERIAL PRIMARY KEY,
+                    id BIGSERIAL,
                     session_id TEXT NOT NULL,
                     user_id TEXT,
                     length_mm DOUBLE PRECISION NOT NULL,
                     width_mm DOUBLE PRECISION NOT NULL,
                     length_cm DOUBLE PRECISION NOT NULL,
                     width_cm DOUBLE PRECISION NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                )
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at)
                 """
             )
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS grips (
-                    id BIGSERIAL PRIMARY KEY,
+                    id BIGSERIAL,
                     session_id TEXT NOT NULL,
                     user_id TEXT,
                     grip TEXT NOT NULL,
                     confidence DOUBLE PRECISION NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                )
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at)
                 """
             )
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS reports (
-                    id BIGSERIAL PRIMARY KEY,
+                    id BIGSERIAL,
                     session_id TEXT NOT NULL,
                     user_id TEXT,
                     report_json JSONB NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                )
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    measurement_id BIGINT,
+                    grip_id BIGINT,
+                    catalog_version TEXT,
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at)
                 """
             )
             cur.execute(
@@ -224,6 +298,21 @@ def init_db() -> None:
                 )
                 """
             )
+            for ddl in ROLLUP_TABLES_DDL:
+                cur.execute(ddl)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    status_code SMALLINT,
+                    body BYTEA,
+                    expires_at TIMESTAMPTZ NOT NULL
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_expires_at_idx ON idempotency_keys (expires_at)")
+            ensure_upcoming_partitions(cur)
             _ensure_source_handle_unique_index(conn)
             cur.execute("CREATE INDEX IF NOT EXISTS mice_availability_status_idx ON mice (availability_status)")
             cur.execute("CREATE INDEX IF NOT EXISTS mice_brand_model_idx ON mice (brand, model)")
@@ -258,7 +347,6 @@ def init_db() -> None:
                 "discount_code": "TEXT",
                 "price_usd": "NUMERIC",
                 "price_status": "TEXT",
-                "source_payload": "JSONB",
                 "created_at": "TIMESTAMPTZ NOT NULL DEFAULT NOW()",
                 "updated_at": "TIMESTAMPTZ NOT NULL DEFAULT NOW()",
             },
@@ -282,6 +370,9 @@ def init_db() -> None:
             "reports",
             {
                 "user_id": "TEXT",
+                "measurement_id": "BIGINT",
+                "grip_id": "BIGINT",
+                "catalog_version": "TEXT",
             },
         )
         conn.commit()
@@ -450,6 +541,7 @@ def seed_mice_from_json_if_empty() -> int:
                     for row in seed_rows
                 ],
             )
+            notify_catalog_changed(cur)
         conn.commit()
 
     LOGGER.info("mice_seed_loaded count=%s source=%s", len(seed_rows), config.DATASET_DIR / "mice.json")
@@ -525,7 +617,41 @@ class Mouse(BaseModel):
     discount_code: Optional[str] = None
     price_usd: Optional[float] = None
     price_status: Optional[str] = None
-    source_payload: Optional[Dict[str, Any]] = None
+
+
+MAX_BATCH_IDS = 200
+MAX_SEARCH_QUERY_LENGTH = 100
+MAX_SEARCH_RESULTS = 50
+
+
+class MouseBatchIn(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class MouseBatchOut(BaseModel):
+    mice: List[Mouse]
+    missing: List[str]
+
+
+class MouseSourceOut(BaseModel):
+    id: str
+    source: Optional[str] = None
+    source_handle: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None
+    updated_at: Optional[str] = None
+
+
+class NearestMouse(BaseModel):
+    distance_mm: float
+    mouse: Mouse
+
+
+class NearestMiceOut(BaseModel):
+    target_length_mm: float
+    target_width_mm: float
+    target_height_mm: Optional[float] = None
+    tolerance_mm: float
+    results: List[NearestMouse]
 
 
 class MeasurementIn(BaseModel):
@@ -560,6 +686,40 @@ class GripOut(BaseModel):
     created_at: str
 
 
+class IngestMeasurementIn(MeasurementIn):
+    type: Literal["measurement"]
+    # When the device captured the row; defaults to when it is ingested.
+    created_at: Optional[AwareDatetime] = None
+
+
+class IngestGripIn(GripIn):
+    type: Literal["grip"]
+    created_at: Optional[AwareDatetime] = None
+
+
+INGEST_RECORD = TypeAdapter(Annotated[Union[IngestMeasurementIn, IngestGripIn], Field(discriminator="type")])
+MAX_INGEST_RECORDS = 10000
+MAX_INGEST_LINE_BYTES = 4096
+# Device clocks drift; capture times further ahead than this are rejected.
+MAX_INGEST_CLOCK_SKEW = timedelta(minutes=5)
+
+
+class IngestLineResult(BaseModel):
+    line: int
+    type: Optional[str] = None
+    status: Literal["accepted", "rejected"]
+    errors: Optional[List[Dict[str, Any]]] = None
+
+
+class IngestOut(BaseModel):
+    request_id: Optional[str] = None
+    accepted: int
+    rejected: int
+    measurements: int
+    grips: int
+    results: List[IngestLineResult]
+
+
 class MouseRecommendation(BaseModel):
     id: str
     brand: str
@@ -568,6 +728,26 @@ class MouseRecommendation(BaseModel):
     reason: str
 
 
+MAX_FIT_PROFILES = 5000
+MAX_FIT_TOP_K = 50
+# Profiles are scored in chunks of about this many (profile, mouse) cells, so the
+# score matrix stays a few MB however large the batch or the catalog.
+FIT_SCORE_CHUNK_CELLS = 1 << 20
+
+
+class FitProfileIn(BaseModel):
+    id: Optional[str] = Field(None, max_length=100)
+    length_mm: float = Field(..., gt=0, le=400)
+    width_mm: float = Field(..., gt=0, le=300)
+    grip: Optional[str] = Field(None, max_length=32)
+
+
+class FitScoreIn(BaseModel):
+    profiles: List[FitProfileIn] = Field(..., min_length=1, max_length=MAX_FIT_PROFILES)
+    k: int = Field(5, ge=1, le=MAX_FIT_TOP_K)
+    scoring_profile: Optional[str] = Field(None, max_length=40)
+
+
 class Report(BaseModel):
     session_id: str
     user_id: Optional[str] = None
@@ -575,10 +755,17 @@ class Report(BaseModel):
     grip: Optional[GripOut]
     recommendations: List[MouseRecommendation]
     summary: str
+    scoring_profile: Optional[str] = None
     request_id: Optional[str] = None
     created_at: str
 
 
+REPORT_JSON = TypeAdapter(Report)
+_REPORT_ETAG_RE = re.compile(r'"report-(\d+)"')
+# Parsed at import so a bad MOUSEFIT_SCORING_VARIANTS fails startup, not the first report.
+SCORING_VARIANTS = parse_variants(config.SCORING_VARIANTS)
+
+
 class ProfileOut(BaseModel):
     id: str
     email: Optional[str] = None
@@ -662,7 +849,8 @@ app.add_middleware(
     allow_origin_regex=CORS_ORIGIN_REGEX or None,
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Request-ID"],
+    allow_headers=["Authorization", "Content-Type", "X-Request-ID", "Idempotency-Key"],
+    expose_headers=["X-Request-ID", "X-Next-Cursor", "X-Total-Count", "Idempotent-Replayed"],
 )
 
 
@@ -694,7 +882,11 @@ async def request_context_middleware(request: Request, call_next):
     token = parse_bearer_token(auth_header)
     if token and config.ENABLE_AUTH:
         try:
-            auth_ctx = verify_bearer_token(token)
+            # Cached tokens are served on the loop; anything else (signature check, a JWKS
+            # fetch for an unknown kid) runs on a worker thread so it cannot stall other requests.
+            auth_ctx = VERIFIED_TOKENS.get(token, count_miss=False)
+            if auth_ctx is None:
+                auth_ctx = await run_in_threadpool(verify_bearer_token, token)
             request.state.user_id = auth_ctx.user_id
             request.state.auth_claims = auth_ctx.claims
         except AuthError as exc:
@@ -757,10 +949,25 @@ def on_startup() -> None:
     if os.getenv("MOUSEFIT_SKIP_STARTUP", "0").strip().lower() in {"1", "true", "yes", "on"}:
         return
     init_pool()
+    if config.WRITE_BEHIND:
+        WRITE_BEHIND.start(get_conn)
+    if config.ENABLE_AUTH and config.SUPABASE_JWKS_URL:
+        start_jwks_refresh()
     auto_schema_init = os.getenv("MOUSEFIT_AUTO_SCHEMA_INIT", "0").strip().lower() in {"1", "true", "yes", "on"}
     if auto_schema_init:
         init_db()
+    else:
+        ensure_session_partitions()
     seed_mice_from_json_if_empty()
+    if config.CATALOG_LISTEN:
+        CATALOG_LISTENER.subscribe(_on_catalog_changed)
+        CATALOG_LISTENER.start(_require_database_url())
+    try:
+        snapshot = _catalog_snapshot()
+        snapshot.list_body.warm()
+        snapshot.fit_grid.warm()
+    except Exception:
+        LOGGER.exception("catalog_warmup_failed")
     warm = os.getenv("MOUSEFIT_WARMUP_RAG", "0").strip().lower() in {"1", "true", "yes", "on"}
     if warm:
         try:
@@ -773,53 +980,76 @@ def on_startup() -> None:
 
 @app.on_event("shutdown")
 def on_shutdown() -> None:
+    CATALOG_LISTENER.stop()
+    stop_jwks_refresh()
+    WRITE_BEHIND.stop()
     close_pool()
 
 
-def row_to_mouse(row: Dict[str, Any]) -> Mouse:
-    grips = [str(x) for x in _as_list(row.get("grips"))]
-    hands = [str(x) for x in _as_list(row.get("hands"))]
-    affiliate_links = _as_list(row.get("affiliate_links"))
-    affiliate_links = [x for x in affiliate_links if isinstance(x, dict)]
+def _trusted_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
 
+
+def _mouse_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mouse-shaped dict for a row read from our own `mice` table, built without pydantic.
+    Column types are fixed by the schema, so this only applies the coercions `Mouse` would
+    (numeric -> float, JSONB/text lists -> lists) and keeps the model's field order.
+    """
     ergo_raw = row.get("ergo")
     wired_raw = row.get("wired")
-    ergo = None if ergo_raw is None else bool(ergo_raw)
-    wired = None if wired_raw is None else bool(wired_raw)
-
-    return Mouse(
-        id=str(row.get("id")),
-        brand=str(row.get("brand") or ""),
-        model=str(row.get("model") or ""),
-        variant=row.get("variant"),
-        length_mm=row.get("length_mm"),
-        width_mm=row.get("width_mm"),
-        height_mm=row.get("height_mm"),
-        weight_g=row.get("weight_g"),
-        ergo=ergo,
-        wired=wired,
-        shape=row.get("shape"),
-        hump=row.get("hump"),
-        grips=grips,
-        hands=hands,
-        product_url=row.get("product_url"),
-        image_url=row.get("image_url"),
-        source_handle=row.get("source_handle"),
-        availability_status=row.get("availability_status"),
-        shape_raw=row.get("shape_raw"),
-        hump_raw=row.get("hump_raw"),
-        hump_bucket=row.get("hump_bucket"),
-        front_flare_raw=row.get("front_flare_raw"),
-        side_curvature_raw=row.get("side_curvature_raw"),
-        side_profile=row.get("side_profile"),
-        hand_compatibility=row.get("hand_compatibility"),
-        affiliate_links=affiliate_links,
-        brand_discount=row.get("brand_discount"),
-        discount_code=row.get("discount_code"),
-        price_usd=(None if row.get("price_usd") is None else float(row["price_usd"])),
-        price_status=row.get("price_status"),
-        source_payload=_as_dict(row.get("source_payload")),
-    )
+    return {
+        "id": str(row.get("id")),
+        "brand": str(row.get("brand") or ""),
+        "model": str(row.get("model") or ""),
+        "variant": row.get("variant"),
+        "length_mm": _trusted_float(row.get("length_mm")),
+        "width_mm": _trusted_float(row.get("width_mm")),
+        "height_mm": _trusted_float(row.get("height_mm")),
+        "weight_g": _trusted_float(row.get("weight_g")),
+        "ergo": None if ergo_raw is None else bool(ergo_raw),
+        "wired": None if wired_raw is None else bool(wired_raw),
+        "shape": row.get("shape"),
+        "hump": row.get("hump"),
+        "grips": [str(x) for x in _as_list(row.get("grips"))],
+        "hands": [str(x) for x in _as_list(row.get("hands"))],
+        "product_url": row.get("product_url"),
+        "image_url": row.get("image_url"),
+        "source_handle": row.get("source_handle"),
+        "availability_status": row.get("availability_status"),
+        "shape_raw": row.get("shape_raw"),
+        "hump_raw": row.get("hump_raw"),
+        "hump_bucket": row.get("hump_bucket"),
+        "front_flare_raw": row.get("front_flare_raw"),
+        "side_curvature_raw": row.get("side_curvature_raw"),
+        "side_profile": row.get("side_profile"),
+        "hand_compatibility": row.get("hand_compatibility"),
+        "affiliate_links": [x for x in _as_list(row.get("affiliate_links")) if isinstance(x, dict)],
+        "brand_discount": row.get("brand_discount"),
+        "discount_code": row.get("discount_code"),
+        "price_usd": _trusted_float(row.get("price_usd")),
+        "price_status": row.get("price_status"),
+    }
+
+
+def row_to_mouse(row: Dict[str, Any]) -> Mouse:
+    return Mouse(**_mouse_payload(row))
+
+
+def _catalog_snapshot(conn=None) -> CatalogSnapshot:
+    # Reuse the caller's connection when it already holds one, instead of a second pool checkout.
+    conn_factory = (lambda: nullcontext(conn)) if conn is not None else (lambda: get_conn())
+    return CATALOG.get(conn_factory, _mouse_payload)
+
+
+def _on_catalog_changed(watermark: Optional[str]) -> None:
+    # Runs on the listener thread: drop stale state, then rebuild here rather than on a request.
+    CATALOG.invalidate(watermark)
+    invalidate_rag_index()
+    if _POOL is not None:
+        snapshot = _catalog_snapshot()
+        snapshot.list_body.warm()
+        snapshot.fit_grid.warm()
 
 
 def _request_user_id(request: Request) -> Optional[str]:
@@ -946,8 +1176,48 @@ def _normalize_optional_timestamp(value: Any) -> Optional[str]:
     return parsed.astimezone(timezone.utc).isoformat()
 
 
-def _upsert_profile(
-    conn,
+PROFILE_COLUMNS = "id, email, display_name, metadata, created_at, updated_at"
+MEASUREMENT_COLUMNS = "session_id, user_id, length_mm, width_mm, length_cm, width_cm, created_at"
+
+_PROFILE_EMAIL_SQL = "COALESCE(EXCLUDED.email, profiles.email)"
+_PROFILE_DISPLAY_NAME_SQL = """CASE
+            WHEN %s THEN EXCLUDED.display_name
+            ELSE COALESCE(profiles.display_name, EXCLUDED.display_name)
+        END"""
+_PROFILE_METADATA_SQL = """CASE
+            WHEN EXCLUDED.metadata IS NULL THEN profiles.metadata
+            ELSE COALESCE(profiles.metadata, '{}'::jsonb) || EXCLUDED.metadata
+        END"""
+# The WHERE guard leaves an unchanged row alone: no new tuple version, no WAL, no
+# updated_at bump. Such a conflict returns no row from RETURNING.
+_PROFILE_UPSERT_SQL = f"""
+    INSERT INTO profiles (id, email, display_name, metadata, updated_at)
+    VALUES (%s, %s, %s, %s::jsonb, NOW())
+    ON CONFLICT (id) DO UPDATE
+    SET email = {_PROFILE_EMAIL_SQL},
+        display_name = {_PROFILE_DISPLAY_NAME_SQL},
+        metadata = {_PROFILE_METADATA_SQL},
+        updated_at = NOW()
+    WHERE (profiles.email, profiles.display_name, profiles.metadata) IS DISTINCT FROM (
+        {_PROFILE_EMAIL_SQL},
+        {_PROFILE_DISPLAY_NAME_SQL},
+        {_PROFILE_METADATA_SQL}
+    )
+"""
+
+
+def _one_round_trip(conn):
+    """
+    Pipeline mode when the driver supports it: BEGIN, the statements and COMMIT are sent
+    together and their results read back once, when the block exits. Fetch after it.
+    """
+    pipeline = getattr(conn, "pipeline", None)
+    if pipeline is None or not Pipeline.is_supported():
+        return nullcontext()
+    return pipeline()
+
+
+def _profile_upsert_params(
     user_id: str,
     email: Optional[str],
     display_name: Optional[str] = None,
@@ -955,7 +1225,7 @@ def _upsert_profile(
     theme: Optional[str] = None,
     metadata_updates: Optional[Dict[str, Any]] = None,
     update_display_name: bool = False,
-) -> None:
+) -> tuple:
     metadata_patch: Dict[str, Any] = dict(metadata_updates or {})
     normalized_theme = _normalize_theme(theme)
     if normalized_theme:
@@ -964,43 +1234,102 @@ def _upsert_profile(
     if normalized_avatar:
         metadata_patch["avatar_url"] = normalized_avatar
     metadata_json = json.dumps(metadata_patch) if metadata_patch else None
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO profiles (id, email, display_name, metadata, updated_at)
-            VALUES (%s, %s, %s, %s::jsonb, NOW())
-            ON CONFLICT (id) DO UPDATE
-            SET email = COALESCE(EXCLUDED.email, profiles.email),
-                display_name = CASE
-                    WHEN %s THEN EXCLUDED.display_name
-                    ELSE COALESCE(profiles.display_name, EXCLUDED.display_name)
-                END,
-                metadata = CASE
-                    WHEN EXCLUDED.metadata IS NULL THEN profiles.metadata
-                    ELSE COALESCE(profiles.metadata, '{}'::jsonb) || EXCLUDED.metadata
-                END,
-                updated_at = NOW()
-            """,
-            (user_id, email, display_name, metadata_json, update_display_name),
-        )
+    # The display-name CASE appears in both SET and the guard.
+    return (user_id, email, display_name, metadata_json, update_display_name, update_display_name)
+
+
+def _profile_seed_stored(
+    user_id: Optional[str], email: Optional[str], display_name: Optional[str], avatar_url: Optional[str]
+) -> bool:
+    """Whether this worker recently stored exactly this token seed for the user."""
+    return bool(user_id) and PROFILE_SEEDS.matches(user_id, seed_fingerprint(email, display_name, avatar_url))
+
+
+def _remember_profile_seed(
+    user_id: Optional[str], email: Optional[str], display_name: Optional[str], avatar_url: Optional[str]
+) -> None:
+    """Call once a seed upsert has committed."""
+    if user_id:
+        PROFILE_SEEDS.remember(user_id, seed_fingerprint(email, display_name, avatar_url))
+
+
+def _profile_upsert_cte(
+    user_id: Optional[str],
+    email: Optional[str],
+    display_name: Optional[str] = None,
+    avatar_url: Optional[str] = None,
+) -> tuple[str, tuple]:
+    """
+    `WITH profile AS (...)` prefix that rides along with a session write; empty for guests
+    and for seeds this worker already stored (see _remember_profile_seed).
+    """
+    if not user_id or _profile_seed_stored(user_id, email, display_name, avatar_url):
+        return "", ()
+    params = _profile_upsert_params(user_id, email, display_name=display_name, avatar_url=avatar_url)
+    return f"WITH profile AS ({_PROFILE_UPSERT_SQL} RETURNING id)\n", params
 
 
-def _read_profile_row(conn, user_id: str) -> Optional[Dict[str, Any]]:
+def _upsert_profile(
+    conn,
+    user_id: str,
+    email: Optional[str],
+    display_name: Optional[str] = None,
+    avatar_url: Optional[str] = None,
+    theme: Optional[str] = None,
+    metadata_updates: Optional[Dict[str, Any]] = None,
+    update_display_name: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Upsert, commit and return the stored profile row in one round trip. When the guard
+    skips the update, the row is read back from the table instead.
+    """
+    params = _profile_upsert_params(
+        user_id,
+        email,
+        display_name=display_name,
+        avatar_url=avatar_url,
+        theme=theme,
+        metadata_updates=metadata_updates,
+        update_display_name=update_display_name,
+    )
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id, email, display_name, metadata, created_at, updated_at
-            FROM profiles
-            WHERE id = %s
-            """,
-            (user_id,),
-        )
+        with _one_round_trip(conn):
+            cur.execute(
+                f"""
+                WITH upsert AS ({_PROFILE_UPSERT_SQL} RETURNING {PROFILE_COLUMNS})
+                SELECT {PROFILE_COLUMNS} FROM upsert
+                UNION ALL
+                SELECT {PROFILE_COLUMNS} FROM profiles WHERE id = %s AND NOT EXISTS (SELECT 1 FROM upsert)
+                """,
+                (*params, user_id),
+            )
+            conn.commit()
         row = cur.fetchone()
     if not row:
         return None
     return row
 
 
+def _seeded_profile(
+    conn,
+    user_id: str,
+    email: Optional[str],
+    display_name: Optional[str] = None,
+    avatar_url: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """The caller's profile row, upserting the token seed unless this worker already stored it."""
+    if _profile_seed_stored(user_id, email, display_name, avatar_url):
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {PROFILE_COLUMNS} FROM profiles WHERE id = %s", (user_id,))
+            row = cur.fetchone()
+        if row:
+            return row
+        PROFILE_SEEDS.forget(user_id)
+    row = _upsert_profile(conn, user_id, email, display_name=display_name, avatar_url=avatar_url)
+    _remember_profile_seed(user_id, email, display_name, avatar_url)
+    return row
+
+
 def _row_to_profile(row: Dict[str, Any], request_id: str) -> ProfileOut:
     metadata = _as_dict(row.get("metadata")) or {}
     theme = _normalize_theme(metadata.get("theme"))
@@ -1047,36 +1376,84 @@ def _require_authenticated_user(request: Request) -> tuple[str, Optional[str]]:
     return user_id, _request_user_email(request)
 
 
-def latest_measurement(conn, session_id: str, user_id: Optional[str]) -> Optional[MeasurementOut]:
+def _latest_session_row_sql(table: str, columns: str) -> str:
+    # The caller's own row wins over a guest row for the same session, in a single scan of the session's rows.
+    # The created_at bound (session_cutoff) keeps the scan to the recent monthly partitions.
+    return f"""
+        SELECT {columns}
+        FROM {table}
+        WHERE session_id = %s AND (user_id = %s OR user_id IS NULL) AND created_at >= %s
+        ORDER BY (user_id IS NULL), id DESC
+        LIMIT 1
+    """
+
+
+def _memo_report_sql(measurement_id: str, grip_id: str) -> str:
+    # The report already built from exactly these inputs against the current catalog, if any.
+    return f"""
+        SELECT (report_json - 'request_id')::text AS report_text
+        FROM reports
+        WHERE session_id = %s
+          AND user_id IS NOT DISTINCT FROM %s
+          AND created_at >= %s
+          AND measurement_id = {measurement_id}
+          AND grip_id IS NOT DISTINCT FROM {grip_id}
+          AND catalog_version = %s
+        ORDER BY id DESC
+        LIMIT 1
+    """
+
+
+@dataclass(frozen=True)
+class SessionInputs:
+    measurement: Optional[MeasurementOut]
+    grip: Optional[GripOut]
+    measurement_id: Optional[int] = None
+    grip_id: Optional[int] = None
+    # A report already built from exactly these inputs against the current catalog, if any,
+    # rendered by Postgres without its request_id (see _splice_request_id).
+    memo_report_text: Optional[str] = None
+
+
+def latest_session_inputs(
+    conn,
+    session_id: str,
+    user_id: Optional[str],
+    catalog_version: str,
+    profile_cte: tuple[str, tuple] = ("", ()),
+) -> SessionInputs:
+    """
+    Latest measurement and grip for a session, preferring the caller's rows over guest rows,
+    plus the report memoized for (measurement id, grip id, catalog version), in one statement.
+    `profile_cte` lets the caller's profile upsert ride along; it is committed in the same flush.
+    When this worker just wrote both of the caller's rows (SESSION_STATE), only the memo is read.
+    """
+    cached = SESSION_STATE.get(session_id, user_id)
+    if cached is not None:
+        return _cached_session_inputs(conn, session_id, user_id, catalog_version, cached, profile_cte)
+    cte_sql, cte_params = profile_cte
+    cutoff = session_cutoff()
+    measurement_columns = f"id AS measurement_id, {MEASUREMENT_COLUMNS}"
+    grip_columns = (
+        "id AS grip_id, user_id AS grip_user_id, grip, confidence AS grip_confidence, created_at AS grip_created_at"
+    )
     with conn.cursor() as cur:
-        row = None
-        if user_id:
-            cur.execute(
-                """
-                SELECT session_id, user_id, length_mm, width_mm, length_cm, width_cm, created_at
-                FROM measurements
-                WHERE session_id = %s AND user_id = %s
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (session_id, user_id),
-            )
-            row = cur.fetchone()
-        if row is None:
+        with _one_round_trip(conn):
             cur.execute(
-                """
-                SELECT session_id, user_id, length_mm, width_mm, length_cm, width_cm, created_at
-                FROM measurements
-                WHERE session_id = %s AND user_id IS NULL
-                ORDER BY id DESC
-                LIMIT 1
+                f"""
+                {cte_sql}SELECT m.*, g.*, r.report_text AS memo_report_text
+                FROM (SELECT 1) AS anchor
+                LEFT JOIN ({_latest_session_row_sql("measurements", measurement_columns)}) AS m ON TRUE
+                LEFT JOIN ({_latest_session_row_sql("grips", grip_columns)}) AS g ON TRUE
+                LEFT JOIN LATERAL ({_memo_report_sql("m.measurement_id", "g.grip_id")}) AS r ON TRUE
                 """,
-                (session_id,),
+                (*cte_params, *(session_id, user_id, cutoff) * 3, catalog_version),
             )
-            row = cur.fetchone()
-    if not row:
-        return None
-    return MeasurementOut(
+            conn.commit()
+        row = cur.fetchone() or {}
+    if row.get("session_id") is None:
+        return SessionInputs(measurement=None, grip=None)
+    measurement = MeasurementOut(
         session_id=row["session_id"],
         length_mm=float(row["length_mm"]),
         width_mm=float(row["width_mm"]),
@@ -1085,43 +1462,52 @@ def latest_measurement(conn, session_id: str, user_id: Optional[str]) -> Optiona
         user_id=row.get("user_id"),
         created_at=_iso_ts(row["created_at"]),
     )
+    grip = None
+    if row.get("grip") is not None:
+        grip = GripOut(
+            session_id=session_id,
+            grip=row["grip"],
+            confidence=float(row["grip_confidence"]),
+            user_id=row.get("grip_user_id"),
+            created_at=_iso_ts(row["grip_created_at"]),
+        )
+    grip_id = row.get("grip_id") if grip is not None else None
+    return SessionInputs(
+        measurement=measurement,
+        grip=grip,
+        measurement_id=row.get("measurement_id"),
+        grip_id=grip_id,
+        memo_report_text=row.get("memo_report_text"),
+    )
 
 
-def latest_grip(conn, session_id: str, user_id: Optional[str]) -> Optional[GripOut]:
+def _cached_session_inputs(
+    conn,
+    session_id: str,
+    user_id: Optional[str],
+    catalog_version: str,
+    state: SessionState,
+    profile_cte: tuple[str, tuple],
+) -> SessionInputs:
+    cte_sql, cte_params = profile_cte
+    measurement_id = state.measurement.id
+    grip_id = state.grip.id
     with conn.cursor() as cur:
-        row = None
-        if user_id:
+        with _one_round_trip(conn):
+            # Only the reports index is probed; measurements and grips are not read at all.
             cur.execute(
-                """
-                SELECT session_id, user_id, grip, confidence, created_at
-                FROM grips
-                WHERE session_id = %s AND user_id = %s
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (session_id, user_id),
+                f"{cte_sql}SELECT ({_memo_report_sql('%s', '%s')}) AS memo_report_text",
+                (*cte_params, session_id, user_id, session_cutoff(), measurement_id, grip_id, catalog_version),
             )
-            row = cur.fetchone()
-        if row is None:
-            cur.execute(
-                """
-                SELECT session_id, user_id, grip, confidence, created_at
-                FROM grips
-                WHERE session_id = %s AND user_id IS NULL
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (session_id,),
-            )
-            row = cur.fetchone()
-    if not row:
-        return None
-    return GripOut(
-        session_id=row["session_id"],
-        grip=row["grip"],
-        confidence=float(row["confidence"]),
-        user_id=row.get("user_id"),
-        created_at=_iso_ts(row["created_at"]),
+            conn.commit()
+        row = cur.fetchone() or {}
+    # Copies: the report path stamps its request_id onto the inputs.
+    return SessionInputs(
+        measurement=state.measurement.value.model_copy(),
+        grip=state.grip.value.model_copy(),
+        measurement_id=measurement_id,
+        grip_id=grip_id,
+        memo_report_text=row.get("memo_report_text"),
     )
 
 
@@ -1129,26 +1515,70 @@ def score_mouse(mouse: Mouse, measurement: MeasurementOut, grip: Optional[GripOu
     length_diff = abs((mouse.length_mm or 0) - measurement.length_mm)
     width_diff = abs((mouse.width_mm or 0) - measurement.width_mm)
     base_score = max(0.0, 100 - (length_diff * 1.2 + width_diff * 1.4))
-    reason_parts = [
-        f"Length off by {length_diff:.1f} mm",
-        f"width off by {width_diff:.1f} mm",
-    ]
+    grip_match: Optional[bool] = None
     if grip and mouse.grips:
-        if grip.grip.lower() in [g.lower() for g in mouse.grips]:
-            base_score += 8
-            reason_parts.append("matches grip preference")
-        else:
-            base_score -= 6
-            reason_parts.append("different grip profile")
+        grip_match = grip.grip.lower() in [g.lower() for g in mouse.grips]
+        base_score += 8 if grip_match else -6
     return MouseRecommendation(
         id=mouse.id,
         brand=mouse.brand,
         model=mouse.model,
-        score=round(base_score, 2),
-        reason="; ".join(reason_parts),
+        score=round_score(base_score),
+        reason=format_reason(length_diff, width_diff, grip_match),
     )
 
 
+def recommend_mice(
+    snapshot: CatalogSnapshot,
+    measurement: MeasurementOut,
+    grip: Optional[GripOut],
+    k: int = 5,
+    profile: ScoringProfile = CLASSIC,
+) -> List[MouseRecommendation]:
+    columns = snapshot.columns
+    grip_name = grip.grip if grip else None
+    if profile is CLASSIC:
+        # The precomputed lookup grid implements exactly the classic formula.
+        winners = snapshot.fit_grid.score_top_k(measurement.length_mm, measurement.width_mm, grip_name, k)
+    else:
+        hands = Hands.of([measurement.length_mm], [measurement.width_mm], [grip_name])
+        winners = profile.top_k(columns, hands, k)[0]
+    return [
+        MouseRecommendation(
+            id=columns.ids[item.index],
+            brand=columns.brands[item.index],
+            model=columns.models[item.index],
+            score=item.score,
+            reason=format_reason(item.length_diff, item.width_diff, item.grip_match),
+        )
+        for item in winners
+    ]
+
+
+def _fit_score_lines(snapshot: CatalogSnapshot, payload: FitScoreIn, profile: ScoringProfile):
+    columns = snapshot.columns
+    chunk = max(1, FIT_SCORE_CHUNK_CELLS // max(1, len(columns)))
+    for start in range(0, len(payload.profiles), chunk):
+        batch = payload.profiles[start : start + chunk]
+        hands = Hands.of(
+            [item.length_mm for item in batch], [item.width_mm for item in batch], [item.grip for item in batch]
+        )
+        lines = []
+        for offset, (item, winners) in enumerate(zip(batch, profile.top_k(columns, hands, payload.k))):
+            recommendations = [
+                {
+                    "id": columns.ids[mouse.index],
+                    "brand": columns.brands[mouse.index],
+                    "model": columns.models[mouse.index],
+                    "score": mouse.score,
+                    "reason": format_reason(mouse.length_diff, mouse.width_diff, mouse.grip_match),
+                }
+                for mouse in winners
+            ]
+            lines.append(encode_json({"index": start + offset, "id": item.id, "recommendations": recommendations}))
+        yield b"\n".join(lines) + b"\n"
+
+
 @app.get("/api/health")
 def health(request: Request) -> dict:
     return {"ok": True, "request_id": _request_id(request)}
@@ -1160,6 +1590,11 @@ def metrics(request: Request) -> dict:
         "ok": True,
         "request_id": _request_id(request),
         "metrics": METRICS.snapshot(),
+        "profile_seed_cache": {"hits": PROFILE_SEEDS.hits, "misses": PROFILE_SEEDS.misses},
+        "session_state_cache": {"hits": SESSION_STATE.hits, "misses": SESSION_STATE.misses},
+        "write_behind": WRITE_BEHIND.stats(),
+        "idempotency": IDEMPOTENCY.stats(),
+        "auth_token_cache": VERIFIED_TOKENS.stats(),
     }
 
 
@@ -1168,9 +1603,7 @@ def get_profile_me(request: Request) -> ProfileOut:
     user_id, user_email = _require_authenticated_user(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
     with get_conn() as conn:
-        _upsert_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
-        row = _read_profile_row(conn, user_id)
-        conn.commit()
+        row = _seeded_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
     if not row:
         raise HTTPException(status_code=500, detail={"code": "profile_missing", "message": "Profile could not be read."})
     return _row_to_profile(row, _request_id(request))
@@ -1181,9 +1614,7 @@ def get_me(request: Request) -> MeOut:
     user_id, user_email = _require_authenticated_user(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
     with get_conn() as conn:
-        _upsert_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
-        row = _read_profile_row(conn, user_id)
-        conn.commit()
+        row = _seeded_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
     if not row:
         raise HTTPException(status_code=500, detail={"code": "profile_missing", "message": "Profile could not be read."})
     return _row_to_me(row, _request_id(request))
@@ -1194,7 +1625,7 @@ def update_profile_me(payload: ProfileUpdateIn, request: Request) -> ProfileOut:
     user_id, user_email = _require_authenticated_user(request)
     _, seed_avatar_url = _request_profile_seed(request)
     with get_conn() as conn:
-        _upsert_profile(
+        row = _upsert_profile(
             conn,
             user_id,
             user_email,
@@ -1203,8 +1634,6 @@ def update_profile_me(payload: ProfileUpdateIn, request: Request) -> ProfileOut:
             theme=payload.theme,
             update_display_name=True,
         )
-        row = _read_profile_row(conn, user_id)
-        conn.commit()
     if not row:
         raise HTTPException(status_code=500, detail={"code": "profile_missing", "message": "Profile could not be read."})
     return _row_to_profile(row, _request_id(request))
@@ -1215,7 +1644,7 @@ def complete_survey(request: Request) -> MeOut:
     user_id, user_email = _require_authenticated_user(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
     with get_conn() as conn:
-        _upsert_profile(
+        row = _upsert_profile(
             conn,
             user_id,
             user_email,
@@ -1226,8 +1655,7 @@ def complete_survey(request: Request) -> MeOut:
                 "survey_dismissed_until": None,
             },
         )
-        row = _read_profile_row(conn, user_id)
-        conn.commit()
+    _remember_profile_seed(user_id, user_email, seed_display_name, seed_avatar_url)
     if not row:
         raise HTTPException(status_code=500, detail={"code": "profile_missing", "message": "Profile could not be read."})
     return _row_to_me(row, _request_id(request))
@@ -1239,7 +1667,7 @@ def dismiss_survey(request: Request) -> MeOut:
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
     dismissed_until = (datetime.now(timezone.utc) + timedelta(hours=24)).isoformat()
     with get_conn() as conn:
-        _upsert_profile(
+        row = _upsert_profile(
             conn,
             user_id,
             user_email,
@@ -1247,135 +1675,557 @@ def dismiss_survey(request: Request) -> MeOut:
             avatar_url=seed_avatar_url,
             metadata_updates={"survey_dismissed_until": dismissed_until},
         )
-        row = _read_profile_row(conn, user_id)
-        conn.commit()
+    _remember_profile_seed(user_id, user_email, seed_display_name, seed_avatar_url)
     if not row:
         raise HTTPException(status_code=500, detail={"code": "profile_missing", "message": "Profile could not be read."})
     return _row_to_me(row, _request_id(request))
 
 
 @app.get("/api/mice", response_model=List[Mouse])
-def list_mice(response: Response) -> List[Mouse]:
-    response.headers["Cache-Control"] = "public, max-age=300"
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM mice ORDER BY brand, model")
-            rows = cur.fetchall()
-    return [row_to_mouse(row) for row in rows]
+def list_mice(
+    request: Request,
+    length_mm_min: Optional[float] = Query(None),
+    length_mm_max: Optional[float] = Query(None),
+    width_mm_min: Optional[float] = Query(None),
+    width_mm_max: Optional[float] = Query(None),
+    height_mm_min: Optional[float] = Query(None),
+    height_mm_max: Optional[float] = Query(None),
+    weight_g_min: Optional[float] = Query(None),
+    weight_g_max: Optional[float] = Query(None),
+    price_usd_min: Optional[float] = Query(None),
+    price_usd_max: Optional[float] = Query(None),
+    shape: Optional[List[str]] = Query(None),
+    hump_bucket: Optional[List[str]] = Query(None),
+    availability_status: Optional[List[str]] = Query(None),
+    grip: Optional[List[str]] = Query(None),
+    wired: Optional[bool] = Query(None),
+    sort: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+) -> Response:
+    headers = {"Cache-Control": "public, max-age=300"}
+    try:
+        query = build_query(
+            {
+                "length_mm": (length_mm_min, length_mm_max),
+                "width_mm": (width_mm_min, width_mm_max),
+                "height_mm": (height_mm_min, height_mm_max),
+                "weight_g": (weight_g_min, weight_g_max),
+                "price_usd": (price_usd_min, price_usd_max),
+            },
+            shapes=shape,
+            hump_buckets=hump_bucket,
+            availability=availability_status,
+            grips=grip,
+            wired=wired,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail={"code": "invalid_query", "message": str(exc)}) from exc
+
+    snapshot = _catalog_snapshot()
+    if query.is_default:
+        return conditional_response(request, snapshot.list_body, headers=headers)
+
+    try:
+        page = run_query(snapshot, query)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail={"code": "invalid_cursor", "message": str(exc)}) from exc
+    headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    body = b"[" + b",".join(snapshot.item_json[str(row["id"])] for row in page.rows) + b"]"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/mice/nearest", response_model=NearestMiceOut)
+def nearest_mice(
+    hand_length_mm: float = Query(..., gt=0),
+    hand_width_mm: float = Query(..., gt=0),
+    grip: Optional[str] = Query(None),
+    height_mm: Optional[float] = Query(None, gt=0),
+    tolerance_mm: float = Query(10.0, gt=0, le=50),
+    k: int = Query(10, ge=1, le=50),
+) -> Response:
+    snapshot = _catalog_snapshot()
+    target_length, target_width = target_mouse_dims(hand_length_mm, hand_width_mm, grip)
+    neighbors = snapshot.fit_index.query(target_length, target_width, height_mm, k=k, tolerance_mm=tolerance_mm)
+    rows = snapshot.rows
+    payload = {
+        "target_length_mm": target_length,
+        "target_width_mm": target_width,
+        "target_height_mm": height_mm,
+        "tolerance_mm": tolerance_mm,
+        "results": [{"distance_mm": round(n.distance_mm, 2), "mouse": rows[n.index]} for n in neighbors],
+    }
+    return Response(content=encode_json(payload), media_type="application/json")
+
+
+@app.get("/api/mice/search", response_model=List[Mouse])
+def search_mice(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+) -> Response:
+    snapshot = _catalog_snapshot()
+    hits = snapshot.search_index.search(q, limit=limit)
+    body = b"[" + b",".join(snapshot.item_json[str(snapshot.rows[hit.index]["id"])] for hit in hits) + b"]"
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "public, max-age=300"})
+
+
+@app.post("/api/mice/batch", response_model=MouseBatchOut)
+def get_mice_batch(payload: MouseBatchIn) -> Response:
+    snapshot = _catalog_snapshot()
+    found: List[bytes] = []
+    missing: List[str] = []
+    # Preserve request order; repeated ids are returned once.
+    for mouse_id in dict.fromkeys(payload.ids):
+        body = snapshot.item_json.get(mouse_id)
+        if body is None:
+            missing.append(mouse_id)
+        else:
+            found.append(body)
+    content = b'{"mice":[' + b",".join(found) + b'],"missing":' + encode_json(missing) + b"}"
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/api/mice/{mouse_id}", response_model=Mouse)
-def get_mouse(mouse_id: str) -> Mouse:
+def get_mouse(mouse_id: str, request: Request) -> Response:
+    body = _catalog_snapshot().item_body(mouse_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail={"code": "not_found", "message": "Mouse not found"})
+    return conditional_response(request, body, headers={"Cache-Control": "public, max-age=300"})
+
+
+@app.get("/api/mice/{mouse_id}/source", response_model=MouseSourceOut)
+def get_mouse_source(mouse_id: str) -> MouseSourceOut:
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT * FROM mice WHERE id = %s", (mouse_id,))
+            cur.execute(
+                """
+                SELECT mice.id, mice.source_handle, mouse_sources.source, mouse_sources.payload, mouse_sources.updated_at
+                FROM mice
+                LEFT JOIN mouse_sources ON mouse_sources.mouse_id = mice.id
+                WHERE mice.id = %s
+                """,
+                (mouse_id,),
+            )
             row = cur.fetchone()
     if not row:
         raise HTTPException(status_code=404, detail={"code": "not_found", "message": "Mouse not found"})
-    return row_to_mouse(row)
+    return MouseSourceOut(
+        id=str(row["id"]),
+        source=row.get("source"),
+        source_handle=row.get("source_handle"),
+        payload=_as_dict(row.get("payload")),
+        updated_at=_normalize_optional_timestamp(row.get("updated_at")),
+    )
+
+
+def _idempotent(request: Request, payload: Optional[BaseModel], handler: Callable[[], Any]) -> Any:
+    """
+    Run `handler` at most once per Idempotency-Key (scoped to the caller) within the TTL.
+    A retry gets the first successful response's bytes back without reaching the write path;
+    reusing a key for a different request is rejected. Requests without the header run as usual.
+    """
+    key = request.headers.get("idempotency-key")
+    if key is None or not IDEMPOTENCY.enabled:
+        return handler()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "invalid_idempotency_key",
+                "message": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters.",
+            },
+        )
+    scoped = scoped_key(_request_user_id(request), key)
+    fingerprint = request_fingerprint(
+        request.method, request.url.path, request.url.query, payload.model_dump_json() if payload is not None else ""
+    )
+    stored = IDEMPOTENCY.get(scoped)
+    if stored is None:
+        running = IDEMPOTENCY.begin(scoped, fingerprint)
+        if running is not None:
+            raise _idempotency_conflict(running, fingerprint)
+        try:
+            # One checkout for the claim, the handler and the completion.
+            with get_conn() as conn:
+                token = _REQUEST_CONN.set(conn)
+                try:
+                    stored = _claim_idempotency_key(conn, scoped, fingerprint)
+                    if stored is None:
+                        return _run_idempotent(conn, scoped, fingerprint, handler)
+                finally:
+                    _REQUEST_CONN.reset(token)
+        finally:
+            IDEMPOTENCY.end(scoped)
+        IDEMPOTENCY.put(scoped, stored)
+    if stored.fingerprint != fingerprint:
+        raise _idempotency_conflict(stored.fingerprint, fingerprint)
+    IDEMPOTENCY.record_replay()
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _idempotency_conflict(holder: Optional[str], fingerprint: str) -> HTTPException:
+    """
+    Why a request cannot run under a key another request (`holder`, its fingerprint) holds.
+    A different request is refused the same way whether the holder is still running or done;
+    a holder whose fingerprint is unknown (claimed concurrently on another worker) is in progress.
+    """
+    if holder is not None and holder != fingerprint:
+        return HTTPException(
+            status_code=422,
+            detail={
+                "code": "idempotency_key_reused",
+                "message": "Idempotency-Key was already used for another request.",
+            },
+        )
+    return HTTPException(
+        status_code=409,
+        detail={
+            "code": "idempotency_key_in_progress",
+            "message": "A request with this Idempotency-Key is still running.",
+        },
+    )
+
+
+def _claim_idempotency_key(conn, scoped: str, fingerprint: str) -> Optional[StoredResponse]:
+    """None when this request now owns the key; otherwise the stored response to replay."""
+    with conn.cursor() as cur:
+        with _one_round_trip(conn):
+            cur.execute(CLAIM_SQL, (scoped, fingerprint, CLAIM_LEASE_SEC, scoped))
+            conn.commit()
+        row = cur.fetchone()
+    if row["claimed"]:
+        return None
+    if row.get("status_code") is None:
+        raise _idempotency_conflict(row.get("fingerprint"), fingerprint)
+    return StoredResponse(fingerprint=row["fingerprint"], status_code=int(row["status_code"]), body=bytes(row["body"]))
+
+
+def _run_idempotent(conn, scoped: str, fingerprint: str, handler: Callable[[], Any]) -> Response:
+    try:
+        result = handler()
+    except BaseException:
+        _finish_idempotency_key(conn, RELEASE_SQL, (scoped,))
+        raise
+    if isinstance(result, Response):
+        response = result
+    else:
+        response = Response(content=result.model_dump_json(), media_type="application/json")
+    stored = StoredResponse(fingerprint=fingerprint, status_code=response.status_code, body=bytes(response.body))
+    params = (stored.status_code, stored.body, IDEMPOTENCY.ttl_sec, scoped, fingerprint)
+    if _finish_idempotency_key(conn, COMPLETE_SQL, params):
+        IDEMPOTENCY.put(scoped, stored)
+    return response
+
+
+def _finish_idempotency_key(conn, query: str, params: tuple) -> bool:
+    # The response stands either way; an unrecorded claim just lapses after CLAIM_LEASE_SEC.
+    try:
+        # The handler shared the connection: drop whatever it left uncommitted, as a pool return would.
+        conn.rollback()
+        with conn.cursor() as cur:
+            with _one_round_trip(conn):
+                cur.execute(query, params)
+                conn.commit()
+    except Exception:
+        LOGGER.exception("idempotency_key_update_failed")
+        return False
+    return True
 
 
 @app.post("/api/measurements", response_model=MeasurementOut)
 def save_measurement(payload: MeasurementIn, request: Request) -> MeasurementOut:
+    return _idempotent(request, payload, lambda: _save_measurement(payload, request))
+
+
+def _save_measurement(payload: MeasurementIn, request: Request) -> MeasurementOut:
     created_at = utc_now()
     length_cm = round(payload.length_mm / 10, 2)
     width_cm = round(payload.width_mm / 10, 2)
     user_id = _request_user_id(request)
     user_email = _request_user_email(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
-    with get_conn() as conn:
-        if user_id:
-            _upsert_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO measurements (session_id, user_id, length_mm, width_mm, length_cm, width_cm, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    payload.session_id,
-                    user_id,
-                    payload.length_mm,
-                    payload.width_mm,
-                    length_cm,
-                    width_cm,
-                    created_at,
-                ),
-            )
-        conn.commit()
-    return MeasurementOut(
+    profile_sql, profile_params = _profile_upsert_cte(
+        user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url
+    )
+    measurement = MeasurementOut(
         session_id=payload.session_id,
         length_mm=payload.length_mm,
         width_mm=payload.width_mm,
         length_cm=length_cm,
         width_cm=width_cm,
         user_id=user_id,
-        request_id=_request_id(request),
         created_at=created_at,
     )
+    values = (payload.session_id, user_id, payload.length_mm, payload.width_mm, length_cm, width_cm, created_at)
+    # Rows that carry a profile upsert are written synchronously, as is everything when the buffer is off or full.
+    if profile_sql or not WRITE_BEHIND.offer("measurements", values):
+        WRITE_BEHIND.flush_session(payload.session_id)
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                with _one_round_trip(conn):
+                    cur.execute(
+                        f"""
+                        {profile_sql}INSERT INTO measurements (session_id, user_id, length_mm, width_mm, length_cm, width_cm, created_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (*profile_params, *values),
+                    )
+                    conn.commit()
+                row = cur.fetchone()
+        _remember_profile_seed(user_id, user_email, seed_display_name, seed_avatar_url)
+        SESSION_STATE.record_write(payload.session_id, user_id, "measurement", row["id"], measurement)
+    else:
+        # Buffered rows get their ids on flush; the next read resolves the session from the database.
+        SESSION_STATE.forget(payload.session_id)
+    return measurement.model_copy(update={"request_id": _request_id(request)})
 
 
 @app.post("/api/grip", response_model=GripOut)
 def save_grip(payload: GripIn, request: Request) -> GripOut:
+    return _idempotent(request, payload, lambda: _save_grip(payload, request))
+
+
+def _save_grip(payload: GripIn, request: Request) -> GripOut:
     created_at = utc_now()
     confidence = payload.confidence or 0.0
     user_id = _request_user_id(request)
     user_email = _request_user_email(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
+    profile_sql, profile_params = _profile_upsert_cte(
+        user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url
+    )
+    grip = GripOut(
+        session_id=payload.session_id, grip=payload.grip, confidence=confidence, user_id=user_id, created_at=created_at
+    )
+    values = (payload.session_id, user_id, payload.grip, confidence, created_at)
+    if profile_sql or not WRITE_BEHIND.offer("grips", values):
+        WRITE_BEHIND.flush_session(payload.session_id)
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                with _one_round_trip(conn):
+                    cur.execute(
+                        f"""
+                        {profile_sql}INSERT INTO grips (session_id, user_id, grip, confidence, created_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (*profile_params, *values),
+                    )
+                    conn.commit()
+                row = cur.fetchone()
+        _remember_profile_seed(user_id, user_email, seed_display_name, seed_avatar_url)
+        SESSION_STATE.record_write(payload.session_id, user_id, "grip", row["id"], grip)
+    else:
+        SESSION_STATE.forget(payload.session_id)
+    return grip.model_copy(update={"request_id": _request_id(request)})
+
+
+async def _ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    (line number, line) for each non-blank line of a streamed NDJSON body, as chunks arrive.
+    Lines over `max_line_bytes` are yielded as None without being held in memory.
+    """
+    line_no = 0
+    pending = b""
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            line_no += 1
+            line = pending + chunk[start:end]
+            if overflow or len(line) > max_line_bytes:
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+            pending, overflow, start = b"", False, end + 1
+        rest = chunk[start:]
+        if overflow or len(pending) + len(rest) > max_line_bytes:
+            pending, overflow = b"", True
+        else:
+            pending += rest
+    if overflow or pending.strip():
+        yield line_no + 1, None if overflow else pending
+
+
+def _ingest_rejection(line_no: int, error_type: str, message: str) -> IngestLineResult:
+    return IngestLineResult(line=line_no, status="rejected", errors=[{"type": error_type, "loc": [], "msg": message}])
+
+
+def _copy_ingested_rows(
+    rows: Dict[str, List[tuple]],
+    user_id: Optional[str],
+    email: Optional[str],
+    display_name: Optional[str],
+    avatar_url: Optional[str],
+) -> None:
+    """Load validated ingestion rows, and the caller's profile seed, in one transaction."""
+    # Rows this worker still has queued for these sessions are older; commit them first.
+    sessions = {row[0] for table_rows in rows.values() for row in table_rows}
+    for session_id in sessions:
+        WRITE_BEHIND.flush_session(session_id)
+    profile_sql, profile_params = _profile_upsert_cte(user_id, email, display_name=display_name, avatar_url=avatar_url)
     with get_conn() as conn:
-        if user_id:
-            _upsert_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO grips (session_id, user_id, grip, confidence, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
+            if profile_sql:
+                cur.execute(f"{profile_sql}SELECT id FROM profile", profile_params)
+            for table, table_rows in rows.items():
+                if table_rows:
+                    copy_rows(cur, table, table_rows)
+        conn.commit()
+    _remember_profile_seed(user_id, email, display_name, avatar_url)
+    for session_id in sessions:
+        SESSION_STATE.forget(session_id)
+
+
+@app.post("/api/ingest", response_model=IngestOut)
+async def ingest_session_rows(request: Request) -> IngestOut:
+    """
+    Bulk measurements and grips from an NDJSON body, one `{"type": "measurement"|"grip", ...}`
+    record per line. Lines are validated as the body streams in; invalid lines are reported
+    and skipped, and the valid ones are COPYed in a single transaction.
+    """
+    user_id = _request_user_id(request)
+    now = datetime.now(timezone.utc)
+    ingested_at = now.isoformat()
+    rows: Dict[str, List[tuple]] = {"measurements": [], "grips": []}
+    results: List[IngestLineResult] = []
+    async for line_no, line in _ndjson_lines(request.stream(), MAX_INGEST_LINE_BYTES):
+        if len(results) >= MAX_INGEST_RECORDS:
+            raise HTTPException(
+                status_code=413,
+                detail={"code": "payload_too_large", "message": f"At most {MAX_INGEST_RECORDS} records per request."},
+            )
+        if line is None:
+            results.append(
+                _ingest_rejection(line_no, "line_too_long", f"Lines are limited to {MAX_INGEST_LINE_BYTES} bytes.")
+            )
+            continue
+        try:
+            record = INGEST_RECORD.validate_json(line)
+        except ValidationError as exc:
+            errors = exc.errors(include_url=False, include_context=False, include_input=False)
+            results.append(IngestLineResult(line=line_no, status="rejected", errors=errors))
+            continue
+        if record.created_at is not None and record.created_at > now + MAX_INGEST_CLOCK_SKEW:
+            results.append(_ingest_rejection(line_no, "created_at_in_future", "created_at is in the future."))
+            continue
+        created_at = record.created_at.astimezone(timezone.utc).isoformat() if record.created_at else ingested_at
+        if isinstance(record, IngestMeasurementIn):
+            rows["measurements"].append(
                 (
-                    payload.session_id,
+                    record.session_id,
                     user_id,
-                    payload.grip,
-                    confidence,
+                    record.length_mm,
+                    record.width_mm,
+                    round(record.length_mm / 10, 2),
+                    round(record.width_mm / 10, 2),
                     created_at,
-                ),
+                )
             )
-        conn.commit()
-    return GripOut(
-        session_id=payload.session_id,
-        grip=payload.grip,
-        confidence=confidence,
-        user_id=user_id,
+        else:
+            rows["grips"].append((record.session_id, user_id, record.grip, record.confidence or 0.0, created_at))
+        results.append(IngestLineResult(line=line_no, type=record.type, status="accepted"))
+
+    accepted = len(rows["measurements"]) + len(rows["grips"])
+    if accepted:
+        seed_display_name, seed_avatar_url = _request_profile_seed(request)
+        await run_in_threadpool(
+            _copy_ingested_rows, rows, user_id, _request_user_email(request), seed_display_name, seed_avatar_url
+        )
+    return IngestOut(
         request_id=_request_id(request),
-        created_at=created_at,
+        accepted=accepted,
+        rejected=len(results) - accepted,
+        measurements=len(rows["measurements"]),
+        grips=len(rows["grips"]),
+        results=results,
+    )
+
+
+def _splice_request_id(report_text: str, request_id: str) -> bytes:
+    """Append `request_id` to a stored report rendered without one, without parsing it."""
+    head = report_text.rstrip()[:-1].rstrip()
+    separator = "" if head.endswith("{") else ", "
+    return f'{head}{separator}"request_id": {json.dumps(request_id)}}}'.encode("utf-8")
+
+
+def _report_etag(report_id: int) -> str:
+    # Weak: a stored report never changes, but each response carries its own request_id.
+    return f'W/"report-{report_id}"'
+
+
+@app.post("/api/fit/score")
+def score_fit_batch(payload: FitScoreIn) -> StreamingResponse:
+    """Score many hands against the catalog without storing anything; one NDJSON line per hand, in order."""
+    try:
+        profile = resolve_profile(payload.scoring_profile, "", config.SCORING_PROFILE)
+    except UnknownProfile as exc:
+        raise HTTPException(status_code=400, detail={"code": "invalid_query", "message": str(exc)}) from exc
+    # Resolved before streaming starts, so every line is scored against the same catalog.
+    snapshot = _catalog_snapshot()
+    return StreamingResponse(
+        _fit_score_lines(snapshot, payload, profile),
+        media_type="application/x-ndjson",
+        headers={"X-Scoring-Profile": profile.name, "X-Catalog-Version": snapshot.version},
     )
 
 
 @app.post("/api/report/generate", response_model=Report)
-def generate_report(request: Request, session_id: str = Query(...)) -> Report:
+def generate_report(
+    request: Request, session_id: str = Query(...), profile: Optional[str] = Query(None, max_length=40)
+) -> Response:
+    return _idempotent(request, None, lambda: _generate_report(request, session_id, profile))
+
+
+def _generate_report(request: Request, session_id: str, profile: Optional[str]) -> Response:
+    try:
+        scoring = resolve_profile(profile, session_id, config.SCORING_PROFILE, SCORING_VARIANTS)
+    except UnknownProfile as exc:
+        raise HTTPException(status_code=400, detail={"code": "invalid_query", "message": str(exc)}) from exc
     user_id = _request_user_id(request)
     user_email = _request_user_email(request)
     seed_display_name, seed_avatar_url = _request_profile_seed(request)
+    profile_cte = _profile_upsert_cte(user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
+    # Read-your-writes: rows this worker buffered for the session are committed before they are read.
+    WRITE_BEHIND.flush_session(session_id)
     with get_conn() as conn:
-        if user_id:
-            _upsert_profile(conn, user_id, user_email, display_name=seed_display_name, avatar_url=seed_avatar_url)
-        measurement = latest_measurement(conn, session_id, user_id)
+        snapshot = _catalog_snapshot(conn)
+        memo_version = f"{snapshot.version}:{scoring.key}"
+        # Round trip 1 reads the inputs and any memoized report (plus the profile upsert);
+        # round trip 2, skipped on a memo hit, stores the new report.
+        inputs = latest_session_inputs(conn, session_id, user_id, memo_version, profile_cte)
+        _remember_profile_seed(user_id, user_email, seed_display_name, seed_avatar_url)
+        measurement, grip = inputs.measurement, inputs.grip
         if not measurement:
             raise HTTPException(
                 status_code=404,
                 detail={"code": "not_found", "message": "No measurement found for session_id"},
             )
-        grip = latest_grip(conn, session_id, user_id)
+        if inputs.memo_report_text is not None:
+            return Response(
+                content=_splice_request_id(inputs.memo_report_text, _request_id(request)),
+                media_type="application/json",
+            )
+
         measurement.request_id = _request_id(request)
         if grip is not None:
             grip.request_id = _request_id(request)
 
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM mice")
-            mice = [row_to_mouse(row) for row in cur.fetchall()]
-
-        scored = [score_mouse(m, measurement, grip) for m in mice if m.length_mm and m.width_mm]
-        scored.sort(key=lambda x: x.score, reverse=True)
-        top = scored[:5]
+        top = recommend_mice(snapshot, measurement, grip, profile=scoring)
 
         if grip:
             summary = (
@@ -1395,70 +2245,63 @@ def generate_report(request: Request, session_id: str = Query(...)) -> Report:
             grip=grip,
             recommendations=top,
             summary=summary,
+            scoring_profile=scoring.name,
             request_id=_request_id(request),
             created_at=utc_now(),
         )
+        # Serialized once by pydantic-core; the same bytes are stored and returned.
+        body = REPORT_JSON.dump_json(report)
 
-        with conn.cursor() as cur:
+        with conn.cursor() as cur, _one_round_trip(conn):
             cur.execute(
                 """
-                INSERT INTO reports (session_id, user_id, report_json, created_at)
-                VALUES (%s, %s, %s::jsonb, %s)
+                INSERT INTO reports (
+                    session_id, user_id, report_json, created_at, measurement_id, grip_id, catalog_version
+                )
+                VALUES (%s, %s, %s::jsonb, %s, %s, %s, %s)
                 """,
-                (session_id, user_id, json.dumps(report.model_dump()), report.created_at),
+                (
+                    session_id,
+                    user_id,
+                    body.decode("utf-8"),
+                    report.created_at,
+                    inputs.measurement_id,
+                    inputs.grip_id,
+                    memo_version,
+                ),
             )
-        conn.commit()
+            conn.commit()
 
-    return report
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/api/report/latest", response_model=Report)
-def latest_report(request: Request, session_id: str = Query(...)) -> Report:
+def latest_report(request: Request, session_id: str = Query(...)) -> Response:
     user_id = _request_user_id(request)
+    # Reports the client already holds come back without a body; see _report_etag.
+    known_ids = [int(value) for value in _REPORT_ETAG_RE.findall(request.headers.get("if-none-match") or "")]
     with get_conn() as conn:
         with conn.cursor() as cur:
-            row = None
-            if user_id:
-                cur.execute(
-                    """
-                    SELECT report_json
-                    FROM reports
-                    WHERE session_id = %s AND user_id = %s
-                    ORDER BY id DESC
-                    LIMIT 1
-                    """,
-                    (session_id, user_id),
-                )
-                row = cur.fetchone()
-            if row is None:
-                cur.execute(
-                    """
-                    SELECT report_json
-                    FROM reports
-                    WHERE session_id = %s AND user_id IS NULL
-                    ORDER BY id DESC
-                    LIMIT 1
-                    """,
-                    (session_id,),
-                )
-                row = cur.fetchone()
+            cur.execute(
+                _latest_session_row_sql(
+                    "reports",
+                    "id, CASE WHEN id = ANY(%s) THEN NULL ELSE (report_json - 'request_id')::text END AS report_text",
+                ),
+                (known_ids, session_id, user_id, session_cutoff()),
+            )
+            row = cur.fetchone()
 
     if not row:
         raise HTTPException(status_code=404, detail={"code": "not_found", "message": "No report found for session_id"})
 
-    report_json = row.get("report_json")
-    if isinstance(report_json, dict):
-        report = Report.model_validate(report_json)
-        report.request_id = _request_id(request)
-        return report
-    if isinstance(report_json, str):
-        try:
-            report = Report.model_validate_json(report_json)
-            report.request_id = _request_id(request)
-            return report
-        except ValueError:
-            pass
-    raise HTTPException(status_code=500, detail={"code": "invalid_report", "message": "Invalid stored report format"})
+    headers = {"ETag": _report_etag(row["id"]), "Cache-Control": "private, no-cache"}
+    if row.get("report_text") is None:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=_splice_request_id(row["report_text"], _request_id(request)),
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @app.post("/api/agent/chat")
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+
+os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+try:
+    import psycopg
+    from psycopg.rows import dict_row
+    from psycopg.types.json import Jsonb
+except Exception:  # pragma: no cover - optional for --help in limited environments
+    psycopg = None
+    dict_row = None
+    Jsonb = None
+
+import main as api_main  # noqa: E402
+from backend import config  # noqa: E402
+from backend.catalog import CatalogCache, CatalogSnapshot, encode_json  # noqa: E402
+from backend.report_backfill import (  # noqa: E402
+    ReportRescorer,
+    Rescored,
+    StaleReport,
+    memo_version,
+    mouse_fingerprints,
+    refreshed_report,
+)
+from backend.scoring_profiles import SCORING_PROFILES  # noqa: E402
+
+# Fingerprints of this many recent catalogs are kept; reports older than that are fully rescored.
+KEEP_FINGERPRINTS = 20
+
+STALE_REPORTS_SQL = """
+    SELECT r.id, r.session_id, r.user_id, r.measurement_id, r.grip_id, r.catalog_version, r.report_json
+    FROM reports AS r
+    WHERE r.id > %s
+      AND (r.catalog_version IS NULL OR r.catalog_version <> ALL(%s))
+      AND NOT EXISTS (
+          SELECT 1 FROM reports AS newer
+          WHERE newer.session_id = r.session_id
+            AND newer.user_id IS NOT DISTINCT FROM r.user_id
+            AND newer.id > r.id
+      )
+    ORDER BY r.id
+    LIMIT %s
+"""
+
+# Skipped when the session got a newer report (from a user) after the chunk was read.
+INSERT_REPORT_SQL = """
+    INSERT INTO reports (session_id, user_id, report_json, created_at, measurement_id, grip_id, catalog_version)
+    SELECT %s, %s, %s::jsonb, %s, %s, %s, %s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM reports
+        WHERE session_id = %s AND user_id IS NOT DISTINCT FROM %s AND id > %s
+    )
+"""
+
+CHECKPOINT_SQL = """
+    INSERT INTO report_backfill_checkpoints (catalog_version, last_report_id, rescored, restamped, updated_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (catalog_version) DO UPDATE SET
+        last_report_id = EXCLUDED.last_report_id,
+        rescored = report_backfill_checkpoints.rescored + EXCLUDED.rescored,
+        restamped = report_backfill_checkpoints.restamped + EXCLUDED.restamped,
+        updated_at = NOW()
+"""
+
+_RESCORER: Optional[ReportRescorer] = None
+
+
+def _init_worker(rows: Sequence[Dict[str, Any]], known: Mapping[str, Mapping[str, str]]) -> None:
+    # Each worker builds the columnar catalog once and reuses it for every chunk.
+    global _RESCORER
+    _RESCORER = ReportRescorer(rows, known)
+
+
+def _rescore_chunk(reports: List[StaleReport]) -> List[Rescored]:
+    assert _RESCORER is not None
+    return _RESCORER.rescore(reports)
+
+
+def ensure_backfill_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_fingerprints (
+                catalog_version TEXT PRIMARY KEY,
+                fingerprints JSONB NOT NULL,
+                recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_backfill_checkpoints (
+                catalog_version TEXT PRIMARY KEY,
+                last_report_id BIGINT NOT NULL DEFAULT 0,
+                rescored INTEGER NOT NULL DEFAULT 0,
+                restamped INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                completed_at TIMESTAMPTZ
+            )
+            """
+        )
+    conn.commit()
+
+
+def record_fingerprints(conn, snapshot: CatalogSnapshot, store: bool = True) -> Dict[str, Dict[str, str]]:
+    """Store this catalog's fingerprints and return those of the other recent catalogs."""
+    with conn.cursor() as cur:
+        if store:
+            _store_fingerprints(cur, snapshot)
+        cur.execute(
+            "SELECT catalog_version, fingerprints FROM catalog_fingerprints WHERE catalog_version <> %s",
+            (snapshot.version,),
+        )
+        known = {row["catalog_version"]: row["fingerprints"] for row in cur.fetchall()}
+    conn.commit()
+    return known
+
+
+def _store_fingerprints(cur, snapshot: CatalogSnapshot) -> None:
+    cur.execute(
+        """
+        INSERT INTO catalog_fingerprints (catalog_version, fingerprints)
+        VALUES (%s, %s)
+        ON CONFLICT (catalog_version) DO NOTHING
+        """,
+        (snapshot.version, Jsonb(mouse_fingerprints(snapshot.rows))),
+    )
+    cur.execute(
+        """
+        DELETE FROM catalog_fingerprints
+        WHERE catalog_version NOT IN (
+            SELECT catalog_version FROM catalog_fingerprints ORDER BY recorded_at DESC LIMIT %s
+        )
+        """,
+        (KEEP_FINGERPRINTS,),
+    )
+
+
+def read_checkpoint(conn, version: str, restart: bool) -> int:
+    with conn.cursor() as cur:
+        if restart:
+            cur.execute("DELETE FROM report_backfill_checkpoints WHERE catalog_version = %s", (version,))
+            conn.commit()
+            return 0
+        cur.execute("SELECT last_report_id FROM report_backfill_checkpoints WHERE catalog_version = %s", (version,))
+        row = cur.fetchone()
+    return int(row["last_report_id"]) if row else 0
+
+
+def fetch_stale(conn, after_id: int, current: List[str], limit: int) -> List[Dict[str, Any]]:
+    with conn.cursor() as cur:
+        cur.execute(STALE_REPORTS_SQL, (after_id, current, limit))
+        return cur.fetchall()
+
+
+def write_chunk(
+    conn,
+    version: str,
+    rows: Sequence[Dict[str, Any]],
+    results: Sequence[Rescored],
+    dry_run: bool,
+) -> Tuple[int, int]:
+    """Insert rescored reports and restamp unaffected ones, then checkpoint, in one transaction."""
+    by_id = {int(row["id"]): row for row in rows}
+    restamp: Dict[str, List[int]] = defaultdict(list)
+    inserts = []
+    created_at = api_main.utc_now()
+    for item in results:
+        row = by_id[item.id]
+        target = memo_version(version, SCORING_PROFILES[item.profile])
+        if item.recommendations is None:
+            restamp[target].append(item.id)
+            continue
+        body = encode_json(refreshed_report(row["report_json"], item, created_at)).decode("utf-8")
+        inserts.append(
+            (
+                row["session_id"],
+                row["user_id"],
+                body,
+                created_at,
+                row["measurement_id"],
+                row["grip_id"],
+                target,
+                row["session_id"],
+                row["user_id"],
+                item.id,
+            )
+        )
+    restamped = sum(len(ids) for ids in restamp.values())
+    if dry_run:
+        return len(inserts), restamped
+    with conn.cursor() as cur:
+        for target, ids in restamp.items():
+            cur.execute("UPDATE reports SET catalog_version = %s WHERE id = ANY(%s)", (target, ids))
+        if inserts:
+            cur.executemany(INSERT_REPORT_SQL, inserts)
+        cur.execute(CHECKPOINT_SQL, (version, max(by_id), len(inserts), restamped))
+    conn.commit()
+    return len(inserts), restamped
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rescore stored reports that predate the current catalog.")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Reports per scoring chunk.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Scoring processes; 0 scores in this process.",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint for this catalog.")
+    parser.add_argument("--dry-run", action="store_true", help="Count what would change; write nothing.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.chunk_size <= 0:
+        print("chunk-size must be > 0", file=sys.stderr)
+        return 2
+    if psycopg is None or dict_row is None:
+        print("psycopg is required for the report backfill.", file=sys.stderr)
+        return 2
+    if not config.DATABASE_URL:
+        print("DATABASE_URL is required.", file=sys.stderr)
+        return 2
+
+    snapshot = CatalogCache(check_interval_sec=0).get(
+        lambda: psycopg.connect(config.DATABASE_URL, row_factory=dict_row), api_main._mouse_payload
+    )
+    current = [memo_version(snapshot.version, profile) for profile in SCORING_PROFILES.values()]
+    print(f"[backfill] Catalog {snapshot.version}: {len(snapshot.rows)} mice")
+
+    started = time.monotonic()
+    rescored = restamped = 0
+    with psycopg.connect(config.DATABASE_URL, row_factory=dict_row) as conn:
+        ensure_backfill_schema(conn)
+        known = record_fingerprints(conn, snapshot, store=not args.dry_run)
+        after_id = read_checkpoint(conn, snapshot.version, args.restart and not args.dry_run)
+        if after_id:
+            print(f"[backfill] Resuming after report {after_id}")
+
+        executor = (
+            ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(snapshot.rows, known))
+            if args.workers > 0
+            else None
+        )
+        if executor is None:
+            _init_worker(snapshot.rows, known)
+        # Chunks are written (and checkpointed) strictly in id order, a few ahead in flight.
+        in_flight: Deque[Tuple[List[Dict[str, Any]], Future]] = deque()
+        try:
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max(1, args.workers) * 2:
+                    rows = fetch_stale(conn, after_id, current, args.chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    after_id = int(rows[-1]["id"])
+                    reports = [
+                        StaleReport(
+                            id=int(row["id"]), report=row["report_json"], catalog_version=row["catalog_version"]
+                        )
+                        for row in rows
+                    ]
+                    if executor is not None:
+                        pending = executor.submit(_rescore_chunk, reports)
+                    else:
+                        pending = Future()
+                        pending.set_result(_rescore_chunk(reports))
+                    in_flight.append((rows, pending))
+                if not in_flight:
+                    break
+                rows, pending = in_flight.popleft()
+                inserted, kept = write_chunk(conn, snapshot.version, rows, pending.result(), args.dry_run)
+                rescored += inserted
+                restamped += kept
+                print(f"[backfill] Through report {rows[-1]['id']}: rescored={rescored} restamped={restamped}")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if not args.dry_run:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE report_backfill_checkpoints SET completed_at = NOW() WHERE catalog_version = %s",
+                    (snapshot.version,),
+                )
+            conn.commit()
+
+    elapsed = time.monotonic() - started
+    print(f"[backfill] Done in {elapsed:.1f}s: rescored={rescored} restamped={restamped} dry_run={args.dry_run}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+import main as api_main  # noqa: E402
+from backend import auth, config  # noqa: E402
+
+ISSUER = "https://bench.invalid/auth/v1"
+
+
+class _LocalJwks:
+    # Stands in for PyJWKClient with its key set already fetched: what every request but the first pays.
+    def __init__(self, public_key: Any) -> None:
+        self._signing_key = type("BenchSigningKey", (), {"key": public_key})()
+
+    def get_signing_key_from_jwt(self, token: str) -> Any:
+        jwt.get_unverified_header(token)
+        return self._signing_key
+
+
+def _signed_token(algorithm: str) -> tuple[str, Any]:
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    claims = {
+        "sub": "bench-user",
+        "email": "bench@example.com",
+        "aud": "authenticated",
+        "iss": ISSUER,
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, private_key, algorithm=algorithm, headers={"kid": "bench"}), private_key.public_key()
+
+
+def _middleware_call(loop: asyncio.AbstractEventLoop, headers: dict) -> Callable[[], Any]:
+    # request_context_middleware around a no-op endpoint: only what the middleware itself costs.
+    raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    async def call_next(_request: Request) -> Response:
+        return Response(b"{}", media_type="application/json")
+
+    def call() -> None:
+        scope = {"type": "http", "method": "GET", "path": "/api/health", "headers": raw_headers, "query_string": b""}
+        loop.run_until_complete(api_main.request_context_middleware(Request(scope), call_next))
+
+    return call
+
+
+def _median_us(fn: Callable[[], Any], requests: int, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(requests):
+            fn()
+        samples.append((time.perf_counter() - started) / requests * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark bearer-token overhead with and without the claims cache.")
+    parser.add_argument("--algorithms", default="RS256,ES256,EdDSA", help="Comma-separated signing algorithms.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per timed repeat.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    config.ENABLE_AUTH = True
+    config.SUPABASE_JWT_ISSUER = ISSUER
+    config.SUPABASE_JWT_AUDIENCE = "authenticated"
+    logging.disable(logging.INFO)
+    loop = asyncio.new_event_loop()
+
+    baseline_us = _median_us(_middleware_call(loop, {}), args.requests, args.repeats)
+    print(f"[bench-auth] Middleware without a token: {baseline_us:.1f} us/request")
+    print(f"{'alg':>6}  {'verify_us':>10}  {'cached_us':>10}  {'middleware_us':>14}  {'cached_mw_us':>13}  {'speedup':>8}")
+    for algorithm in [part.strip() for part in args.algorithms.split(",") if part.strip()]:
+        token, public_key = _signed_token(algorithm)
+        auth._jwks_client = lambda public_key=public_key: _LocalJwks(public_key)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def verify() -> None:
+            assert auth.verify_bearer_token(token).user_id == "bench-user"
+
+        auth.VERIFIED_TOKENS = api_main.VERIFIED_TOKENS = auth.VerifiedTokenCache(max_entries=0)
+        verify_us = _median_us(verify, args.requests, args.repeats)
+        middleware_us = _median_us(_middleware_call(loop, headers), args.requests, args.repeats)
+        auth.VERIFIED_TOKENS = api_main.VERIFIED_TOKENS = auth.VerifiedTokenCache()
+        cached_us = _median_us(verify, args.requests, args.repeats)
+        cached_middleware_us = _median_us(_middleware_call(loop, headers), args.requests, args.repeats)
+        print(
+            f"{algorithm:>6}  {verify_us:>10.1f}  {cached_us:>10.2f}  {middleware_us:>14.1f}"
+            f"  {cached_middleware_us:>13.1f}  {middleware_us / cached_middleware_us:>7.1f}x"
+        )
+    loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
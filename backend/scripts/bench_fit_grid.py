@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import config  # noqa: E402
+from backend.scoring import (  # noqa: E402
+    GRID_LENGTH_RANGE_MM,
+    GRID_WIDTH_RANGE_MM,
+    ColumnarCatalog,
+    FitLookupGrid,
+    score_top_k,
+)
+
+GRIPS: List[Optional[str]] = [None, "palm", "claw", "fingertip"]
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Seed catalog shells jittered and repeated up to `count` rows."""
+    seed_rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(count):
+        base = seed_rows[idx % len(seed_rows)]
+        jitter = 0.0 if idx < len(seed_rows) else rng.uniform(-3, 3)
+        rows.append(
+            {
+                "id": f"bench-{idx}",
+                "length_mm": None if base.get("length_mm") is None else float(base["length_mm"]) + jitter,
+                "width_mm": None if base.get("width_mm") is None else float(base["width_mm"]) + jitter / 2,
+                "grips": base.get("grips") or [],
+            }
+        )
+    return rows
+
+
+def hands(count: int, seed: int = 7) -> List[Tuple[float, float, Optional[str]]]:
+    rng = random.Random(seed)
+    return [
+        (
+            round(rng.uniform(*GRID_LENGTH_RANGE_MM), 1),
+            round(rng.uniform(*GRID_WIDTH_RANGE_MM), 1),
+            rng.choice(GRIPS),
+        )
+        for _ in range(count)
+    ]
+
+
+def _percentile(samples: List[float], share: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark FitLookupGrid against a full catalog scan.")
+    parser.add_argument("--sizes", default="464,5000,50000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--validate", action="store_true", help="Fail on any grid/full-scan difference.")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'rows':>7}  {'build_ms':>9}  {'avg_list':>8}  {'max_list':>8}  "
+        f"{'scan_p50':>8}  {'grid_p50':>8}  {'grid_p99':>8}  {'mismatch':>8}"
+    )
+    for size in (int(part) for part in args.sizes.split(",") if part.strip()):
+        catalog = ColumnarCatalog.from_rows(synthetic_rows(size))
+        grid = FitLookupGrid(catalog, validate=args.validate)
+        started = time.perf_counter()
+        for grip in GRIPS:
+            grid.shortlist(GRID_LENGTH_RANGE_MM[0], GRID_WIDTH_RANGE_MM[0], grip)
+        build_ms = (time.perf_counter() - started) * 1000
+        shortlists = [grid.shortlist(length, width, grip) for length, width, grip in hands(500)]
+        lengths = [len(items) for items in shortlists if items is not None]
+
+        scan, lookup = [], []
+        for length, width, grip in hands(args.queries):
+            started = time.perf_counter()
+            score_top_k(catalog, length, width, grip, args.k)
+            scan.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            grid.score_top_k(length, width, grip, args.k)
+            lookup.append((time.perf_counter() - started) * 1000)
+        lookup.sort()
+        print(
+            f"{size:>7}  {build_ms:>9.1f}  {np.mean(lengths):>8.1f}  {max(lengths):>8}  "
+            f"{statistics.median(scan):>8.3f}  {statistics.median(lookup):>8.3f}  {_percentile(lookup, 0.99):>8.3f}"
+            f"  {grid.mismatches:>8}"
+        )
+        if args.validate and grid.mismatches:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
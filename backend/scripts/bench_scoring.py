@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import main as api_main  # noqa: E402
+from backend.catalog import CatalogSnapshot  # noqa: E402
+
+GRIP_CHOICES = [[], ["palm"], ["claw"], ["fingertip"], ["palm", "claw"], ["claw", "fingertip"]]
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(count):
+        rows.append(
+            api_main.row_to_mouse(
+                {
+                    "id": f"bench-{idx}",
+                    "brand": f"Brand {idx % 40}",
+                    "model": f"Model {idx}",
+                    "length_mm": round(rng.uniform(105, 135), 1),
+                    "width_mm": round(rng.uniform(52, 75), 1),
+                    "height_mm": round(rng.uniform(35, 45), 1),
+                    "weight_g": round(rng.uniform(40, 120), 1),
+                    "grips": rng.choice(GRIP_CHOICES),
+                }
+            ).model_dump()
+        )
+    return rows
+
+
+def _time_ms(fn: Callable[[], Any], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark report scoring: per-row pydantic loop vs NumPy engine.")
+    parser.add_argument("--sizes", default="500,50000,500000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--legacy-max", type=int, default=50000, help="Skip the legacy loop above this size.")
+    args = parser.parse_args(argv)
+
+    measurement = api_main.MeasurementOut(
+        session_id="bench", length_mm=128.0, width_mm=66.0, length_cm=12.8, width_cm=6.6, created_at="bench"
+    )
+    grip = api_main.GripOut(session_id="bench", grip="claw", confidence=1.0, created_at="bench")
+
+    print(f"{'rows':>9}  {'legacy_ms':>10}  {'numpy_ms':>9}  {'speedup':>8}")
+    for size in (int(part) for part in args.sizes.split(",") if part.strip()):
+        rows = synthetic_rows(size)
+        snapshot = CatalogSnapshot.build("bench", rows)
+
+        def numpy_path() -> None:
+            api_main.recommend_mice(snapshot, measurement, grip)
+
+        def legacy_path() -> None:
+            mice = [api_main.Mouse(**row) for row in rows]
+            scored = [api_main.score_mouse(m, measurement, grip) for m in mice if m.length_mm and m.width_mm]
+            scored.sort(key=lambda x: x.score, reverse=True)
+
+        numpy_ms = _time_ms(numpy_path, args.repeats)
+        if size <= args.legacy_max:
+            legacy_ms = _time_ms(legacy_path, max(1, args.repeats // 2))
+            print(f"{size:>9}  {legacy_ms:>10.2f}  {numpy_ms:>9.3f}  {legacy_ms / numpy_ms:>7.1f}x")
+        else:
+            print(f"{size:>9}  {'skipped':>10}  {numpy_ms:>9.3f}  {'-':>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
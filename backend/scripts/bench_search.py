@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import config  # noqa: E402
+from backend.search import SearchIndex  # noqa: E402
+
+VARIANTS = [None, "Wireless", "Mini", "SE", "8K"]
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Brand names and model words drawn from the seed catalog, recombined to `count` rows."""
+    seed_rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))
+    brands = sorted({str(row["brand"]) for row in seed_rows if row.get("brand")})
+    words = sorted({word for row in seed_rows for word in str(row.get("model") or "").split()})
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(count):
+        brand = rng.choice(brands)
+        model = f"{' '.join(rng.sample(words, 2))} {rng.randint(1, 999)}"
+        handle = f"{brand} {model} {idx}".lower().replace(" ", "-")
+        rows.append({"brand": brand, "model": model, "variant": rng.choice(VARIANTS), "source_handle": handle})
+    return rows
+
+
+def typeahead_queries(rows: List[Dict[str, Any]], count: int, typo_rate: float, seed: int = 7) -> List[str]:
+    """Every keystroke prefix of a random 'brand model', with a dropped character now and then."""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        row = rng.choice(rows)
+        text = f"{row['brand']} {row['model']}".lower()
+        typo_at = rng.randrange(len(text)) if rng.random() < typo_rate else None
+        for cut in range(1, len(text) + 1):
+            prefix = text[:cut]
+            if typo_at is not None and typo_at < cut - 1:
+                prefix = prefix[:typo_at] + prefix[typo_at + 1 :]
+            queries.append(prefix)
+    return queries[:count]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /api/mice/search index latency.")
+    parser.add_argument("--sizes", default="464,10000,100000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--typo-rate", type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>8}  {'terms':>7}  {'build_ms':>9}  {'p50_ms':>7}  {'p99_ms':>7}  {'max_ms':>7}")
+    for size in (int(part) for part in args.sizes.split(",") if part.strip()):
+        rows = synthetic_rows(size)
+        started = time.perf_counter()
+        index = SearchIndex(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        for query in typeahead_queries(rows, args.queries, args.typo_rate):
+            started = time.perf_counter()
+            index.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"{size:>8}  {index.term_count:>7}  {build_ms:>9.1f}  {statistics.median(samples):>7.3f}"
+            f"  {p99:>7.3f}  {samples[-1]:>7.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
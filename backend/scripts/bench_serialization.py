@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import main as api_main  # noqa: E402
+from backend.catalog import CatalogSnapshot, encode_json  # noqa: E402
+
+GRIP_CHOICES = [[], ["palm"], ["claw"], ["fingertip"], ["palm", "claw"], ["claw", "fingertip"]]
+MICE_ADAPTER = TypeAdapter(List[api_main.Mouse])
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"bench-{idx}",
+            "brand": f"Brand {idx % 40}",
+            "model": f"Model {idx}",
+            "variant": rng.choice([None, "Wireless", "Mini"]),
+            "length_mm": round(rng.uniform(105, 135), 1),
+            "width_mm": round(rng.uniform(52, 75), 1),
+            "height_mm": round(rng.uniform(35, 45), 1),
+            "weight_g": round(rng.uniform(40, 120), 1),
+            "ergo": rng.random() < 0.4,
+            "wired": rng.random() < 0.5,
+            "shape": rng.choice(["ergonomic", "symmetrical"]),
+            "grips": rng.choice(GRIP_CHOICES),
+            "hands": ["right"],
+            "product_url": f"https://example.com/mice/{idx}",
+            "source_handle": f"bench-{idx}",
+            "availability_status": "available",
+            "affiliate_links": [{"label": "Store", "url": f"https://example.com/buy/{idx}"}],
+            "price_usd": round(rng.uniform(30, 180), 2),
+        }
+        for idx in range(count)
+    ]
+
+
+def legacy_path(rows: List[Dict[str, Any]]) -> bytes:
+    # What `response_model=List[Mouse]` did per request: build models, re-validate, then encode.
+    mice = [api_main.row_to_mouse(row) for row in rows]
+    validated = MICE_ADAPTER.validate_python([mouse.model_dump() for mouse in mice])
+    content = MICE_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows: List[Dict[str, Any]]) -> bytes:
+    # The serialization half of a snapshot rebuild; requests then reuse `list_json` as-is.
+    return b"[" + b",".join(encode_json(api_main._mouse_payload(row)) for row in rows) + b"]"
+
+
+def _time_ms(fn: Callable[[], Any], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark catalog serialization: pydantic response path vs fast path.")
+    parser.add_argument("--sizes", default="50000", help="Comma-separated synthetic catalog sizes.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    datasets = [("mice.json", api_main._seed_mice_rows_from_json())]
+    datasets += [("synthetic", synthetic_rows(int(part))) for part in args.sizes.split(",") if part.strip()]
+
+    print(f"{'dataset':>10}  {'rows':>7}  {'legacy_ms':>10}  {'fast_ms':>10}  {'request_ms':>10}  {'speedup':>8}")
+    for name, rows in datasets:
+        assert json.loads(legacy_path(rows)) == json.loads(fast_path(rows))
+        legacy_ms = _time_ms(lambda: legacy_path(rows), args.repeats)
+        fast_ms = _time_ms(lambda: fast_path(rows), args.repeats)
+        snapshot = CatalogSnapshot.build("bench", [api_main._mouse_payload(row) for row in rows])
+        request_ms = _time_ms(lambda: snapshot.list_body.variant("identity"), args.repeats)
+        print(
+            f"{name:>10}  {len(rows):>7}  {legacy_ms:>10.2f}  {fast_ms:>10.2f}  {request_ms:>10.4f}"
+            f"  {legacy_ms / fast_ms:>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.rows import dict_row
+except Exception:  # pragma: no cover - optional for --help in limited environments
+    psycopg = None
+    sql = None
+    dict_row = None
+
+from backend import config  # noqa: E402
+from backend.idempotency import PURGE_SQL  # noqa: E402
+from backend.partitions import (  # noqa: E402
+    MONTHS_AHEAD,
+    PARTITIONED_TABLES,
+    ROLLUP_SQL,
+    ROLLUP_TABLES_DDL,
+    add_months,
+    ensure_upcoming_partitions,
+    expired_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Roll expired months of session data into daily aggregates, then drop or archive them."
+    )
+    parser.add_argument(
+        "--retain-months",
+        type=int,
+        default=config.RETAIN_MONTHS,
+        help="Whole months of raw rows to keep before the current one.",
+    )
+    parser.add_argument(
+        "--months-ahead", type=int, default=MONTHS_AHEAD, help="Monthly partitions to keep created ahead."
+    )
+    parser.add_argument(
+        "--archive-schema",
+        default="",
+        help="Detach expired partitions into this schema instead of dropping them.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be retired; change nothing.")
+    return parser.parse_args(argv)
+
+
+def retire_partition(conn, table: str, name: str, archive_schema: str, dry_run: bool) -> int:
+    """Fold one monthly partition into the rollups and drop (or archive) it, in one transaction."""
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT COUNT(*) AS count FROM {}").format(sql.Identifier(name)))
+        count = int(cur.fetchone()["count"])
+        if dry_run:
+            conn.rollback()
+            return count
+        cur.execute(sql.SQL(ROLLUP_SQL[table]).format(source=sql.Identifier(name)))
+        partition = sql.Identifier(name)
+        if archive_schema:
+            cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(sql.Identifier(table), partition))
+            cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(partition, sql.Identifier(archive_schema)))
+        else:
+            cur.execute(sql.SQL("DROP TABLE {}").format(partition))
+    conn.commit()
+    return count
+
+
+def retire_default_rows(conn, table: str, cutoff: datetime, archive_schema: str, dry_run: bool) -> int:
+    """Rows older than `cutoff` that landed in the default partition go the same way."""
+    default = sql.Identifier(f"{table}_default")
+    with conn.cursor() as cur:
+        if dry_run:
+            cur.execute(
+                sql.SQL("SELECT COUNT(*) AS count FROM {} WHERE created_at < {}").format(default, sql.Literal(cutoff))
+            )
+            count = int(cur.fetchone()["count"])
+            conn.rollback()
+            return count
+        # One statement: the deleted rows feed the rollup (and the archive copy) directly.
+        ctes = [
+            sql.SQL("gone AS (DELETE FROM {} WHERE created_at < {} RETURNING *)").format(default, sql.Literal(cutoff))
+        ]
+        if archive_schema:
+            archive = sql.Identifier(archive_schema, f"{table}_default_archive")
+            cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} (LIKE {})").format(archive, sql.Identifier(table)))
+            ctes.append(sql.SQL("archived AS (INSERT INTO {} SELECT * FROM gone)").format(archive))
+        rollup = sql.SQL(ROLLUP_SQL[table]).format(source=sql.Identifier("gone"))
+        ctes.append(sql.SQL("rolled AS ({})").format(rollup))
+        cur.execute(sql.SQL("WITH {} SELECT COUNT(*) AS count FROM gone").format(sql.SQL(", ").join(ctes)))
+        count = int(cur.fetchone()["count"])
+    conn.commit()
+    return count
+
+
+def main(argv: List[str], now: Optional[datetime] = None) -> int:
+    args = parse_args(argv)
+    if args.retain_months < 0 or args.months_ahead < 0:
+        print("retain-months and months-ahead must be >= 0", file=sys.stderr)
+        return 2
+    if psycopg is None or dict_row is None:
+        print("psycopg is required for session data retention.", file=sys.stderr)
+        return 2
+    if not config.DATABASE_URL:
+        print("DATABASE_URL is required.", file=sys.stderr)
+        return 2
+
+    this_month = month_start(now or datetime.now(timezone.utc))
+    cutoff = add_months(this_month, -args.retain_months)
+    print(f"[retain] Keeping rows from {cutoff:%Y-%m-%d}; archive={args.archive_schema or 'none'}")
+    with psycopg.connect(config.DATABASE_URL, row_factory=dict_row) as conn:
+        with conn.cursor() as cur:
+            for ddl in ROLLUP_TABLES_DDL:
+                cur.execute(ddl)
+            if args.archive_schema and not args.dry_run:
+                cur.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(args.archive_schema)))
+        conn.commit()
+
+        if not args.dry_run:
+            # Rows already stranded in a *_default partition for these months are moved into them.
+            with conn.cursor() as cur:
+                created = ensure_upcoming_partitions(cur, this_month, args.months_ahead)
+            conn.commit()
+            if created:
+                print(f"[retain] created {', '.join(created)}")
+
+        for table in PARTITIONED_TABLES:
+            with conn.cursor() as cur:
+                partitioned = is_partitioned(cur, table)
+                names = list_partitions(cur, table) if partitioned else []
+            conn.commit()
+            if not partitioned:
+                print(f"[retain] {table}: not partitioned; run the alembic migrations first")
+                continue
+
+            retired = 0
+            for name in expired_partitions(table, names, cutoff):
+                count = retire_partition(conn, table, name, args.archive_schema, args.dry_run)
+                retired += count
+                print(f"[retain] {table}: {'would retire' if args.dry_run else 'retired'} {name} ({count} rows)")
+            if f"{table}_default" in names:
+                count = retire_default_rows(conn, table, cutoff, args.archive_schema, args.dry_run)
+                retired += count
+                if count:
+                    print(f"[retain] {table}: {count} expired rows in {table}_default")
+            print(f"[retain] {table}: rows rolled up={retired} dry_run={args.dry_run}")
+
+        if not args.dry_run:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('idempotency_keys') IS NOT NULL AS present")
+                if cur.fetchone()["present"]:
+                    cur.execute(PURGE_SQL)
+                    print(f"[retain] idempotency_keys: purged {cur.rowcount} expired keys")
+            conn.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -20,6 +20,12 @@ DEFAULT_ELOSHAPES_BASE_URL = os.getenv("ELOSHAPES_BASE_URL", "https://www.elosha
 DEFAULT_TIMEOUT_SEC = float(os.getenv("ELOSHAPES_TIMEOUT_SEC", "45"))
 DEFAULT_PAGE_SIZE = int(os.getenv("ELOSHAPES_PAGE_SIZE", "500"))
 
+# Kept in step with backend/catalog_events.py; API workers LISTEN on this channel.
+CATALOG_CHANNEL = "mousefit_catalog"
+CATALOG_NOTIFY_SQL = (
+    "SELECT pg_notify(%s, COALESCE(EXTRACT(EPOCH FROM MAX(updated_at)), 0)::text || ':' || COUNT(*)) FROM mice"
+)
+
 
 def slugify(value: str) -> str:
     out: List[str] = []
@@ -382,12 +388,21 @@ def ensure_mice_schema(conn) -> None:
                 discount_code TEXT,
                 price_usd NUMERIC,
                 price_status TEXT,
-                source_payload JSONB,
                 created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
                 updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
             )
             """
         )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mouse_sources (
+                mouse_id TEXT PRIMARY KEY REFERENCES mice (id) ON DELETE CASCADE,
+                source TEXT,
+                payload JSONB NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+            """
+        )
         cur.execute(
             """
             SELECT indexdef
@@ -443,12 +458,11 @@ INSERT INTO mice (
     discount_code,
     price_usd,
     price_status,
-    source_payload,
     updated_at
 ) VALUES (
     %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
     %s::jsonb, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-    %s::jsonb, %s, %s, %s, %s, %s::jsonb, NOW()
+    %s::jsonb, %s, %s, %s, %s, NOW()
 )
 ON CONFLICT (id) DO UPDATE SET
     id = EXCLUDED.id,
@@ -481,7 +495,15 @@ ON CONFLICT (id) DO UPDATE SET
     discount_code = EXCLUDED.discount_code,
     price_usd = EXCLUDED.price_usd,
     price_status = EXCLUDED.price_status,
-    source_payload = EXCLUDED.source_payload,
+    updated_at = NOW()
+"""
+
+SOURCE_UPSERT_SQL = """
+INSERT INTO mouse_sources (mouse_id, source, payload, updated_at)
+VALUES (%s, %s, %s::jsonb, NOW())
+ON CONFLICT (mouse_id) DO UPDATE SET
+    source = EXCLUDED.source,
+    payload = EXCLUDED.payload,
     updated_at = NOW()
 """
 
@@ -528,11 +550,21 @@ def upsert_mice(conn, mice_rows: List[Dict[str, Any]]) -> int:
                     row["discount_code"],
                     row["price_usd"],
                     row["price_status"],
-                    json.dumps(row["source_payload"]),
                 )
                 for row in mice_rows
             ],
         )
+        # Raw upstream rows are provenance only; keep them out of the hot mice table.
+        cur.executemany(
+            SOURCE_UPSERT_SQL,
+            [
+                (row["id"], row["source"], json.dumps(row["source_payload"]))
+                for row in mice_rows
+                if row.get("source_payload") is not None
+            ],
+        )
+        # Delivered on commit; every API worker drops its catalog snapshot and RAG index check.
+        cur.execute(CATALOG_NOTIFY_SQL, (CATALOG_CHANNEL,))
     conn.commit()
     return len(mice_rows)
 
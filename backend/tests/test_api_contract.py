@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import sys
-from datetime import datetime, timezone
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from importlib import util
 from pathlib import Path
+from types import SimpleNamespace
 
 os.environ.setdefault("MOUSEFIT_SKIP_STARTUP", "1")
 
@@ -19,7 +26,19 @@ assert spec and spec.loader
 api_main = util.module_from_spec(spec)
 sys.modules[spec.name] = api_main
 spec.loader.exec_module(api_main)
+import pytest
+
 from backend.auth import AuthError
+from backend.profile_seeds import ProfileSeedCache
+from backend.session_state import SessionStateCache
+from backend.write_behind import WriteBehindBuffer
+
+
+@pytest.fixture(autouse=True)
+def _fresh_worker_caches(monkeypatch):
+    # Seeds and session rows remembered by one test would otherwise skip queries in the next.
+    monkeypatch.setattr(api_main, "PROFILE_SEEDS", ProfileSeedCache(), raising=True)
+    monkeypatch.setattr(api_main, "SESSION_STATE", SessionStateCache(), raising=True)
 
 
 class _DummyConn:
@@ -33,6 +52,9 @@ class _DummyConn:
         raise AssertionError("cursor() should not be called in this test path")
 
 
+_CUTOFF = datetime(2026, 7, 20, tzinfo=timezone.utc)
+
+
 class _LatestCursor:
     def __init__(self) -> None:
         self._row = None
@@ -44,12 +66,14 @@ class _LatestCursor:
         return False
 
     def execute(self, query, params):
-        if "user_id = %s" in query:
-            # Simulate no user-specific row.
-            self._row = None
-            return
-        # Fallback guest row.
+        # One statement reads both inputs; the caller's rows sort ahead of guest rows.
+        assert "ORDER BY (user_id IS NULL), id DESC" in query
+        # Every session read is bounded to the lookback, so Postgres prunes older monthly partitions.
+        assert query.count("created_at >= %s") == 3
+        assert params == ("session-1", "user-1", _CUTOFF) * 3 + ("v1",)
+        # Simulate no user-specific rows: the guest measurement wins, and there is no grip.
         self._row = {
+            "measurement_id": 11,
             "session_id": params[0],
             "user_id": None,
             "length_mm": 190.0,
@@ -57,6 +81,11 @@ class _LatestCursor:
             "length_cm": 19.0,
             "width_cm": 9.5,
             "created_at": datetime.now(timezone.utc),
+            "grip_id": None,
+            "grip_user_id": None,
+            "grip": None,
+            "grip_confidence": None,
+            "grip_created_at": None,
         }
 
     def fetchone(self):
@@ -67,6 +96,9 @@ class _LatestConn:
     def cursor(self):
         return _LatestCursor()
 
+    def commit(self):
+        return None
+
 
 class _ProfileCursor:
     def __init__(self, conn: "_ProfileConn") -> None:
@@ -80,8 +112,10 @@ class _ProfileCursor:
         return False
 
     def execute(self, query, params):
+        self._conn.statements.append(query)
         if "INSERT INTO profiles" in query:
-            user_id, email, display_name, metadata_json, update_display_name = params
+            user_id, email, display_name, metadata_json, update_display_name = params[:5]
+            before = dict(self._conn.profile)
             profile = self._conn.profile
             profile["id"] = user_id
             if email is not None:
@@ -93,11 +127,13 @@ class _ProfileCursor:
                 metadata = dict(profile.get("metadata") or {})
                 metadata.update(patch)
                 profile["metadata"] = metadata
-            profile["updated_at"] = datetime.now(timezone.utc)
-            self._row = None
+            # The IS DISTINCT FROM guard: only a changed row is rewritten.
+            if profile != before:
+                profile["updated_at"] = datetime.now(timezone.utc)
+                self._conn.writes += 1
+            self._row = dict(profile) if "RETURNING id, email, display_name" in query else None
             return
-
-        if "SELECT id, email, display_name, metadata, created_at, updated_at" in query:
+        if query.startswith("SELECT") and "FROM profiles WHERE id = %s" in query:
             self._row = dict(self._conn.profile)
             return
 
@@ -118,6 +154,9 @@ class _ProfileConn:
             "created_at": now,
             "updated_at": now,
         }
+        self.statements: list = []
+        self.round_trips = 0
+        self.writes = 0
 
     def __enter__(self):
         return self
@@ -128,6 +167,11 @@ class _ProfileConn:
     def cursor(self):
         return _ProfileCursor(self)
 
+    @contextmanager
+    def pipeline(self):
+        yield
+        self.round_trips += 1
+
     def commit(self):
         return None
 
@@ -209,8 +253,12 @@ def test_invalid_token_still_fails_protected_routes(monkeypatch):
 
 
 def test_report_generate_no_measurement_returns_not_found_envelope(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    api_main.CATALOG.get(lambda: _MiceConn([]), api_main._mouse_payload)
     monkeypatch.setattr(api_main, "get_conn", lambda: _DummyConn(), raising=True)
-    monkeypatch.setattr(api_main, "latest_measurement", lambda *_: None, raising=True)
+    monkeypatch.setattr(api_main, "latest_session_inputs", lambda *_: api_main.SessionInputs(None, None), raising=True)
 
     client = TestClient(api_main.app)
     response = client.post("/api/report/generate", params={"session_id": "s1"})
@@ -219,11 +267,14 @@ def test_report_generate_no_measurement_returns_not_found_envelope(monkeypatch):
     assert data["code"] == "not_found"
 
 
-def test_latest_measurement_falls_back_to_guest_row():
-    row = api_main.latest_measurement(_LatestConn(), "session-1", "user-1")
+def test_latest_measurement_falls_back_to_guest_row(monkeypatch):
+    monkeypatch.setattr(api_main, "session_cutoff", lambda: _CUTOFF, raising=True)
+    inputs = api_main.latest_session_inputs(_LatestConn(), "session-1", "user-1", "v1")
+    row, grip = inputs.measurement, inputs.grip
     assert row is not None
     assert row.session_id == "session-1"
     assert row.user_id is None
+    assert grip is None
 
 
 def test_profile_me_requires_auth():
@@ -257,6 +308,95 @@ def test_profile_me_upserts_and_returns_profile(monkeypatch):
     assert data["request_id"]
 
 
+class _JwksHandler(BaseHTTPRequestHandler):
+    # Stand-in JWKS endpoint; the test sets `keys` and `delay_sec` on the server.
+    def do_GET(self):
+        self.server.fetches += 1
+        time.sleep(self.server.delay_sec)
+        body = json.dumps({"keys": self.server.keys}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def jwks_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _JwksHandler)
+    server.keys, server.delay_sec, server.fetches = [], 0.0, 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_jwks_stall_does_not_block_the_event_loop(monkeypatch, jwks_server):
+    import httpx
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    from backend import auth as backend_auth
+
+    def signing_key(kid):
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        jwk = {**jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True), "kid": kid, "use": "sig"}
+        return private_key, jwk
+
+    old_key, old_jwk = signing_key("old")
+    new_key, new_jwk = signing_key("new")
+    jwks_server.keys = [old_jwk]
+    monkeypatch.setattr(api_main.config, "ENABLE_AUTH", True, raising=False)
+    monkeypatch.setattr(api_main.config, "SUPABASE_JWKS_URL", f"http://127.0.0.1:{jwks_server.server_port}/jwks")
+    monkeypatch.setattr(api_main.config, "SUPABASE_JWT_ISSUER", "")
+    monkeypatch.setattr(api_main.config, "JWKS_TIMEOUT_SEC", 5.0)
+    monkeypatch.setattr(backend_auth, "VERIFIED_TOKENS", backend_auth.VerifiedTokenCache(), raising=True)
+    monkeypatch.setattr(api_main, "VERIFIED_TOKENS", backend_auth.VERIFIED_TOKENS, raising=True)
+    monkeypatch.setattr(api_main, "get_conn", lambda: _ProfileConn(), raising=True)
+    backend_auth._jwks_client.cache_clear()
+
+    def token(private_key, kid, sub):
+        claims = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + 600}
+        return jwt.encode(claims, private_key, algorithm="ES256", headers={"kid": kid})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            # Startup prefetch: a token from a known key verifies without another fetch.
+            known = await client.get("/api/profile/me", headers={"Authorization": f"Bearer {token(old_key, 'old', 'u1')}"})
+            assert known.json()["id"] == "u1"
+            assert jwks_server.fetches == 1
+
+            # A rotated key means a fetch, and the endpoint now takes a second to answer.
+            jwks_server.keys, jwks_server.delay_sec = [old_jwk, new_jwk], 1.0
+            started = time.perf_counter()
+            rotated = asyncio.create_task(
+                client.get("/api/profile/me", headers={"Authorization": f"Bearer {token(new_key, 'new', 'u2')}"})
+            )
+            await asyncio.sleep(0.05)
+            health = await client.get("/api/health")
+            health_sec = time.perf_counter() - started
+            assert (await rotated).json()["id"] == "u2"
+            return health, health_sec, time.perf_counter() - started
+
+    try:
+        backend_auth.start_jwks_refresh()
+        health, health_sec, rotated_sec = asyncio.run(scenario())
+    finally:
+        backend_auth.stop_jwks_refresh()
+        backend_auth._jwks_client.cache_clear()
+    assert health.status_code == 200
+    assert rotated_sec >= 1.0
+    assert health_sec < 0.5
+    assert jwks_server.fetches == 2
+
+
 def test_me_returns_survey_status(monkeypatch):
     from backend.auth import AuthContext
 
@@ -375,3 +515,1020 @@ def test_profile_me_update_invalid_theme_uses_validation_envelope(monkeypatch):
     data = response.json()
     assert data["code"] == "validation_error"
     assert data["request_id"]
+
+
+
+class _MiceCursor:
+    def __init__(self, conn: "_MiceConn") -> None:
+        self._conn = conn
+        self._rows: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self._conn.queries += 1
+        if "MAX(updated_at)" in query:
+            self._rows = [{"watermark": f"1772323200.000000:{len(self._conn.rows)}"}]
+        else:
+            self._rows = [dict(row) for row in self._conn.rows]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class _MiceConn:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.queries = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def cursor(self):
+        return _MiceCursor(self)
+
+
+def _use_mice_rows(monkeypatch, rows) -> _MiceConn:
+    from backend.catalog import CatalogCache
+
+    conn = _MiceConn(rows)
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    return conn
+
+
+def test_mice_routes_serve_from_catalog_snapshot(monkeypatch):
+    row = {
+        "id": "acme-one",
+        "brand": "Acme",
+        "model": "One",
+        "length_mm": 120.0,
+        "width_mm": 62.0,
+        "grips": '["claw"]',
+        "price_usd": "59.99",
+    }
+    conn = _use_mice_rows(monkeypatch, [row])
+
+    client = TestClient(api_main.app)
+    response = client.get("/api/mice")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=300"
+    data = response.json()
+    assert data[0]["id"] == "acme-one"
+    assert data[0]["grips"] == ["claw"]
+    assert data[0]["price_usd"] == 59.99
+
+    queries_after_list = conn.queries
+    detail = client.get("/api/mice/acme-one")
+    assert detail.status_code == 200
+    assert detail.json() == data[0]
+    missing = client.get("/api/mice/unknown")
+    assert missing.status_code == 404
+    assert missing.json()["code"] == "not_found"
+    assert conn.queries == queries_after_list
+
+
+def test_mice_list_filters_and_pages_with_cursor(monkeypatch):
+    rows = [
+        {"id": f"m-{idx}", "brand": "Acme", "model": f"Model {idx}", "weight_g": 50.0 + idx, "shape": "sym", "wired": False}
+        for idx in range(5)
+    ]
+    rows.append({"id": "ergo-1", "brand": "Bolt", "model": "Ergo", "weight_g": 52.0, "shape": "ergo", "wired": False})
+    _use_mice_rows(monkeypatch, rows)
+
+    client = TestClient(api_main.app)
+    first = client.get("/api/mice", params={"shape": "sym", "weight_g_max": 53, "limit": 2})
+    assert first.status_code == 200
+    assert [item["id"] for item in first.json()] == ["m-0", "m-1"]
+    assert first.headers["x-total-count"] == "4"
+    cursor = first.headers["x-next-cursor"]
+
+    second = client.get("/api/mice", params={"shape": "sym", "weight_g_max": 53, "limit": 2, "cursor": cursor})
+    assert [item["id"] for item in second.json()] == ["m-2", "m-3"]
+    assert "x-next-cursor" not in second.headers
+
+    by_weight = client.get("/api/mice", params={"sort": "-weight_g", "limit": 1})
+    assert [item["id"] for item in by_weight.json()] == ["m-4"]
+
+    bad_cursor = client.get("/api/mice", params={"cursor": "not-a-cursor"})
+    assert bad_cursor.status_code == 400
+    assert bad_cursor.json()["code"] == "invalid_cursor"
+
+
+def test_keyset_pages_walk_a_presorted_snapshot_order():
+    import random
+
+    from backend.catalog import CatalogSnapshot
+    from backend.catalog_query import build_query, matches, run_query, sort_key
+
+    rng = random.Random(11)
+    rows = [
+        {
+            "id": f"m-{idx:03d}",
+            "brand": rng.choice(["Acme", "Bolt", "Core"]),
+            "model": f"Model {idx % 40}",
+            "weight_g": rng.choice([None, round(rng.uniform(40, 110), 1)]),
+            "shape": rng.choice(["ergo", "symmetrical"]),
+        }
+        for idx in range(200)
+    ]
+    snapshot = CatalogSnapshot.build("v1", rows)
+    for sort, shapes in (("brand", None), ("-weight_g", ["ergo"]), ("weight_g", None)):
+        ranges = {"weight_g": (None, 90.0)} if shapes else {}
+        query = build_query(ranges, shapes=shapes, sort=sort, limit=7)
+        expected = sorted(
+            (row for row in rows if matches(row, query)), key=lambda row: sort_key(row, query.sort, query.descending)
+        )
+        seen, cursor = [], None
+        while True:
+            page = run_query(snapshot, build_query(ranges, shapes=shapes, sort=sort, limit=7, cursor=cursor))
+            assert page.total == len(expected)
+            seen.extend(page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert [row["id"] for row in seen] == [row["id"] for row in expected]
+    # Each sort order is built once per snapshot and reused by every later page.
+    assert {key for key in snapshot._derived if key != "totals"} == {
+        ("ordering", "brand", False),
+        ("ordering", "weight_g", True),
+        ("ordering", "weight_g", False),
+    }
+
+
+def test_recommend_mice_matches_per_row_scoring():
+    import random
+
+    from backend.catalog import CatalogSnapshot
+
+    rng = random.Random(7)
+    grips_pool = [[], ["palm"], ["claw"], ["palm", "fingertip"], ["claw", "fingertip"]]
+    rows = []
+    for idx in range(300):
+        rows.append(
+            api_main.row_to_mouse(
+                {
+                    "id": f"m-{idx:03d}",
+                    "brand": "Brand",
+                    "model": f"Model {idx}",
+                    "length_mm": rng.choice([None, 0.0, round(rng.uniform(110, 135), 1)]),
+                    "width_mm": round(rng.uniform(55, 72), 1),
+                    "grips": rng.choice(grips_pool),
+                }
+            ).model_dump()
+        )
+    snapshot = CatalogSnapshot.build("v1", rows)
+    measurement = api_main.MeasurementOut(
+        session_id="s1", length_mm=128.0, width_mm=66.0, length_cm=12.8, width_cm=6.6, created_at="now"
+    )
+    for grip_name in (None, "claw", "palm", "relaxed"):
+        grip = None
+        if grip_name:
+            grip = api_main.GripOut(session_id="s1", grip=grip_name, confidence=1.0, created_at="now")
+        mice = [api_main.Mouse(**row) for row in rows]
+        expected = [api_main.score_mouse(m, measurement, grip) for m in mice if m.length_mm and m.width_mm]
+        expected.sort(key=lambda x: x.score, reverse=True)
+        assert api_main.recommend_mice(snapshot, measurement, grip, k=5) == expected[:5]
+
+
+def test_vectorized_scores_equal_per_mouse_scores_over_the_whole_catalog():
+    import random
+
+    from backend.catalog import CatalogSnapshot
+    from backend.scoring import fit_scores
+
+    rows = [api_main.row_to_mouse(row).model_dump() for row in api_main._seed_mice_rows_from_json()]
+    assert rows
+    # 100 - 0.0875 * 1.2 is 99.895, where np.round and round() disagree on the last digit.
+    halfway = {"id": "halfway", "brand": "Zed", "model": "Halfway", "length_mm": 120.0, "width_mm": 60.0, "grips": ["claw"]}
+    rows.append(api_main.row_to_mouse(halfway).model_dump())
+    snapshot = CatalogSnapshot.build("v1", rows)
+    mice = [api_main.Mouse(**row) for row in rows]
+    rng = random.Random(3)
+    hands = [(round(rng.uniform(100, 140), 2), round(rng.uniform(52, 76), 2)) for _ in range(40)]
+    hands.append((120.0875, 60.0))
+    for length_mm, width_mm in hands:
+        measurement = api_main.MeasurementOut(
+            session_id="s1", length_mm=length_mm, width_mm=width_mm, length_cm=0, width_cm=0, created_at="now"
+        )
+        for grip_name in (None, "claw"):
+            grip = api_main.GripOut(session_id="s1", grip=grip_name, confidence=1.0, created_at="now") if grip_name else None
+            scores, _, _ = fit_scores(snapshot.columns, length_mm, width_mm, grip_name)
+            expected = [api_main.score_mouse(m, measurement, grip) for m in mice if m.length_mm and m.width_mm]
+            vectorized = [float(score) for score in scores if score != float("-inf")]
+            assert vectorized == [item.score for item in expected]
+            expected.sort(key=lambda item: item.score, reverse=True)
+            assert api_main.recommend_mice(snapshot, measurement, grip, k=5) == expected[:5]
+
+
+def test_nearest_mice_returns_closest_within_tolerance(monkeypatch):
+    rows = [
+        {"id": "close", "brand": "Acme", "model": "Close", "length_mm": 118.0, "width_mm": 64.0, "height_mm": 39.0},
+        {"id": "closer", "brand": "Acme", "model": "Closer", "length_mm": 117.8, "width_mm": 64.5, "height_mm": 40.0},
+        {"id": "far", "brand": "Acme", "model": "Far", "length_mm": 130.0, "width_mm": 70.0, "height_mm": 43.0},
+    ]
+    _use_mice_rows(monkeypatch, rows)
+
+    client = TestClient(api_main.app)
+    response = client.get(
+        "/api/mice/nearest",
+        params={"hand_length_mm": 190, "hand_width_mm": 95, "grip": "claw", "tolerance_mm": 5, "k": 5},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["target_length_mm"] == 117.8
+    assert [item["mouse"]["id"] for item in data["results"]] == ["closer", "close"]
+    assert data["results"][0]["distance_mm"] == 0.1
+
+
+def test_mice_list_and_detail_support_etag_and_precompression(monkeypatch):
+    rows = [{"id": f"m-{idx}", "brand": "Acme", "model": f"Model {idx}", "length_mm": 120.0} for idx in range(40)]
+    _use_mice_rows(monkeypatch, rows)
+
+    client = TestClient(api_main.app)
+    response = client.get("/api/mice", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    etag = response.headers["etag"]
+    assert etag.endswith('-gzip"')
+    assert len(response.json()) == 40
+
+    not_modified = client.get("/api/mice", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    detail = client.get("/api/mice/m-3")
+    assert detail.status_code == 200
+    detail_etag = detail.headers["etag"]
+    assert client.get("/api/mice/m-3", headers={"If-None-Match": detail_etag}).status_code == 304
+    assert client.get("/api/mice/m-4", headers={"If-None-Match": detail_etag}).status_code == 200
+
+
+def test_mouse_source_is_served_separately_from_catalog(monkeypatch):
+    rows = [{"id": "acme-one", "brand": "Acme", "model": "One", "source_payload": {"raw": True}}]
+    _use_mice_rows(monkeypatch, rows)
+    client = TestClient(api_main.app)
+    listed = client.get("/api/mice").json()
+    assert "source_payload" not in listed[0]
+
+    class _SourceCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+        def execute(self, query, params):
+            assert "LEFT JOIN mouse_sources" in query
+            self._row = None
+            if params[0] == "acme-one":
+                self._row = {
+                    "id": "acme-one",
+                    "source_handle": "acme-one",
+                    "source": "eloshapes",
+                    "payload": {"general__model": "One"},
+                    "updated_at": datetime(2026, 3, 1, tzinfo=timezone.utc),
+                }
+
+        def fetchone(self):
+            return self._row
+
+    class _SourceConn(_DummyConn):
+        def cursor(self):
+            return _SourceCursor()
+
+    monkeypatch.setattr(api_main, "get_conn", lambda: _SourceConn(), raising=True)
+    response = client.get("/api/mice/acme-one/source")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "eloshapes"
+    assert data["payload"] == {"general__model": "One"}
+    assert data["updated_at"] == "2026-03-01T00:00:00+00:00"
+    assert client.get("/api/mice/missing/source").status_code == 404
+
+
+def test_mice_batch_keeps_request_order_and_reports_missing(monkeypatch):
+    rows = [{"id": f"m-{idx}", "brand": "Acme", "model": f"Model {idx}"} for idx in range(5)]
+    conn = _use_mice_rows(monkeypatch, rows)
+
+    client = TestClient(api_main.app)
+    response = client.post("/api/mice/batch", json={"ids": ["m-3", "nope", "m-0", "m-3"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["mice"]] == ["m-3", "m-0"]
+    assert data["missing"] == ["nope"]
+    queries = conn.queries
+    client.post("/api/mice/batch", json={"ids": ["m-1"]})
+    assert conn.queries == queries
+
+    too_many = client.post("/api/mice/batch", json={"ids": [f"m-{idx}" for idx in range(api_main.MAX_BATCH_IDS + 1)]})
+    assert too_many.status_code == 422
+
+
+def test_trusted_mouse_payload_matches_validated_model():
+    rows = api_main._seed_mice_rows_from_json()
+    assert len(rows) > 400
+    rows.append(
+        {
+            "id": "typed-1",
+            "brand": "Acme",
+            "model": "Typed",
+            "length_mm": 120,
+            "price_usd": Decimal("59.99"),
+            "ergo": 1,
+            "grips": '["claw"]',
+            "affiliate_links": [{"url": "https://example.com"}, "junk"],
+        }
+    )
+    for row in rows:
+        payload = api_main._mouse_payload(row)
+        assert list(payload) == list(api_main.Mouse.model_fields)
+        assert payload == api_main.Mouse.model_validate(payload).model_dump()
+    assert payload["length_mm"] == 120.0 and isinstance(payload["length_mm"], float)
+    assert payload["price_usd"] == 59.99
+    assert payload["grips"] == ["claw"]
+    assert payload["affiliate_links"] == [{"url": "https://example.com"}]
+
+
+def _report_text(report_json: str) -> str:
+    # What `(report_json - 'request_id')::text` renders: no request_id, ", "/": " separators.
+    report = json.loads(report_json)
+    report.pop("request_id", None)
+    return json.dumps(report)
+
+
+class _ReportCursor(_MiceCursor):
+    def execute(self, query, params=None):
+        self._conn.statements.append(query)
+        created_at = self._conn.created_at
+        if "INSERT INTO" in query and "profiles" in query:
+            self._conn.profile_upserts += 1
+        if "idempotency_keys" in query:
+            self._rows = self._conn.idempotency(query, params)
+        elif "FROM measurements" in query:
+            memo_key = (self._conn.measurement_id, self._conn.grip_id, params[-1])
+            self._rows = [
+                {"measurement_id": self._conn.measurement_id, "session_id": params[-7], "user_id": None,
+                 "length_mm": 180.0, "width_mm": 92.0, "length_cm": 18.0, "width_cm": 9.2, "created_at": created_at,
+                 "grip_id": self._conn.grip_id, "grip_user_id": None, "grip": "claw", "grip_confidence": 0.9,
+                 "grip_created_at": created_at, "memo_report_text": self._conn.memo.get(memo_key)}
+            ]
+        elif "AS memo_report_text" in query:
+            # Inputs came from the session-state cache; only the memo is read.
+            self._conn.memo_reads += 1
+            self._rows = [{"memo_report_text": self._conn.memo.get(tuple(params[-3:]))}]
+        elif "INSERT INTO reports" in query:
+            self._conn.stored_reports.append(params[2])
+            self._conn.memo[tuple(params[4:7])] = _report_text(params[2])
+        elif "INSERT INTO measurements" in query:
+            self._rows = [{"id": self._conn.measurement_id}]
+        elif "INSERT INTO grips" in query:
+            self._rows = [{"id": self._conn.grip_id}]
+        elif "FROM reports" in query:
+            report_id = len(self._conn.stored_reports)
+            report_text = None if report_id in params[0] else _report_text(self._conn.stored_reports[-1])
+            self._rows = [{"id": report_id, "report_text": report_text}]
+        elif "INSERT INTO" in query:
+            self._rows = []
+        else:
+            super().execute(query, params)
+
+
+class _ReportConn(_MiceConn):
+    def __init__(self, rows) -> None:
+        super().__init__(rows)
+        self.stored_reports: list = []
+        self.memo: dict = {}
+        self.measurement_id = 7
+        self.grip_id = 3
+        self.created_at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        self.statements: list = []
+        self.profile_upserts = 0
+        self.memo_reads = 0
+        self.round_trips = 0
+        self.in_pipeline = False
+        self.idempotency_keys: dict = {}
+
+    def cursor(self):
+        return _ReportCursor(self)
+
+    def idempotency(self, query, params):
+        # No expiry: every stored key is live for the length of a test.
+        if "WITH claimed" in query:
+            key, fingerprint, _lease, _key = params
+            row = self.idempotency_keys.get(key)
+            if row is None:
+                self.idempotency_keys[key] = {"fingerprint": fingerprint, "status_code": None, "body": None}
+                return [{"claimed": True, "fingerprint": None, "status_code": None, "body": None}]
+            return [{"claimed": False, **row}]
+        if "UPDATE idempotency_keys" in query:
+            status_code, body, _ttl, key, fingerprint = params
+            if self.idempotency_keys[key]["fingerprint"] == fingerprint:
+                self.idempotency_keys[key].update(status_code=status_code, body=body)
+        elif "DELETE FROM idempotency_keys" in query and self.idempotency_keys[params[0]]["status_code"] is None:
+            del self.idempotency_keys[params[0]]
+        return []
+
+    @contextmanager
+    def pipeline(self):
+        # Everything queued inside the block is flushed together when it exits.
+        self.in_pipeline = True
+        try:
+            yield
+        finally:
+            self.in_pipeline = False
+            self.round_trips += 1
+
+    def commit(self):
+        assert self.in_pipeline, "COMMIT should share the pipeline flush with its statements"
+
+    def rollback(self):
+        pass
+
+
+def test_report_generate_stores_and_returns_the_same_serialized_report(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [
+        {"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]},
+        {"id": "b", "brand": "Bolt", "model": "Large", "length_mm": 126.0, "width_mm": 66.0, "grips": ["palm"]},
+    ]
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+
+    client = TestClient(api_main.app)
+    response = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == conn.stored_reports[0].encode("utf-8")
+    report = response.json()
+    assert [item["id"] for item in report["recommendations"]] == ["a", "b"]
+    assert report["grip"]["grip"] == "claw"
+
+    latest = client.get("/api/report/latest", params={"session_id": "s1"})
+    assert latest.status_code == 200
+    assert latest.json() == {**report, "request_id": latest.headers["X-Request-ID"]}
+    assert latest.headers["ETag"] == 'W/"report-1"'
+
+    unchanged = client.get(
+        "/api/report/latest", params={"session_id": "s1"}, headers={"If-None-Match": latest.headers["ETag"]}
+    )
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == 'W/"report-1"'
+
+
+
+def test_report_generate_reuses_report_for_unchanged_inputs(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+
+    first = client.post("/api/report/generate", params={"session_id": "s1"})
+    round_trips = conn.round_trips
+    again = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert again.status_code == 200
+    assert len(conn.stored_reports) == 1
+    assert conn.round_trips == round_trips + 1
+    assert again.json()["created_at"] == first.json()["created_at"]
+    assert again.json()["request_id"] == again.headers["X-Request-ID"] != first.json()["request_id"]
+
+    # A newer grip, or a catalog change, is a different key and gets a fresh report.
+    conn.grip_id = 4
+    assert client.post("/api/grip", json={"session_id": "s1", "grip": "claw", "confidence": 0.9}).status_code == 200
+    client.post("/api/report/generate", params={"session_id": "s1"})
+    assert len(conn.stored_reports) == 2
+    conn.rows = rows + [{"id": "b", "brand": "Bolt", "model": "Large", "length_mm": 126.0, "width_mm": 66.0}]
+    api_main.CATALOG.invalidate()
+    refreshed = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert len(conn.stored_reports) == 3
+    assert [item["id"] for item in refreshed.json()["recommendations"]] == ["a", "b"]
+    assert refreshed.json()["scoring_profile"] == "classic"
+
+    # Each scoring profile memoizes separately; unknown profiles are rejected up front.
+    shaped = client.post("/api/report/generate", params={"session_id": "s1", "profile": "shape"})
+    assert shaped.status_code == 200
+    assert shaped.json()["scoring_profile"] == "shape"
+    assert len(conn.stored_reports) == 4
+    unknown = client.post("/api/report/generate", params={"session_id": "s1", "profile": "nope"})
+    assert unknown.status_code == 400
+    assert unknown.json()["code"] == "invalid_query"
+
+
+class _CutoffReportCursor(_ReportCursor):
+    def execute(self, query, params=None):
+        super().execute(query, params)
+        # Postgres applies the created_at lower bound; rows older than it are not found.
+        if "SELECT m.*" in query and self._conn.created_at < params[2]:
+            self._rows = [{}]
+
+
+def test_report_resolves_a_session_idle_for_months_within_retention(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main.config, "RETAIN_MONTHS", 12)
+    conn = _ReportConn(rows)
+    # The session's only rows are four months old: past any 90-day window, well within retention.
+    conn.created_at = datetime.now(timezone.utc) - timedelta(days=120)
+    monkeypatch.setattr(conn, "cursor", lambda: _CutoffReportCursor(conn))
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+
+    response = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert response.status_code == 200
+    assert response.json()["measurement"]["length_mm"] == 180.0
+
+    # Past the retention window the rows are as good as rolled up.
+    conn.created_at = datetime.now(timezone.utc) - timedelta(days=400)
+    assert client.post("/api/report/generate", params={"session_id": "s2"}).status_code == 404
+
+
+def test_report_after_same_worker_writes_reads_only_the_memo(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+    client.post("/api/measurements", json={"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0})
+    client.post("/api/grip", json={"session_id": "s1", "grip": "claw", "confidence": 0.9})
+
+    statements = len(conn.statements)
+    cached = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert cached.status_code == 200
+    # The session read is one statement that probes only the reports index.
+    [session_read] = [query for query in conn.statements[statements:] if "memo_report_text" in query]
+    assert "FROM reports" in session_read and "FROM measurements" not in session_read
+    assert not any("FROM measurements" in query or "FROM grips" in query for query in conn.statements[statements:])
+    assert conn.memo_reads == 1
+    stored = json.loads(conn.stored_reports[-1])
+    assert stored["measurement"]["request_id"] == cached.json()["request_id"]
+    # The report stamps copies; the cached rows stay request-independent.
+    assert api_main.SESSION_STATE.get("s1", None).measurement.value.request_id is None
+
+    # The merged database read resolves the same ids, so it hits the report stored from the cached inputs.
+    monkeypatch.setattr(api_main, "SESSION_STATE", SessionStateCache(), raising=True)
+    uncached = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert any("FROM measurements" in query for query in conn.statements)
+    # Only this worker's own writes fill the cache, never a database read.
+    assert api_main.SESSION_STATE.get("s1", None) is None
+    assert len(conn.stored_reports) == 1
+    assert uncached.json()["recommendations"] == cached.json()["recommendations"]
+    assert uncached.json()["measurement"]["length_mm"] == cached.json()["measurement"]["length_mm"]
+
+
+def test_other_workers_writes_are_seen_once_the_cache_window_passes(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "SESSION_STATE", SessionStateCache(ttl_sec=0.05), raising=True)
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+    client.post("/api/measurements", json={"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0})
+    client.post("/api/grip", json={"session_id": "s1", "grip": "claw", "confidence": 0.9})
+    client.post("/api/report/generate", params={"session_id": "s1"})
+    assert conn.memo_reads == 1 and len(conn.stored_reports) == 1
+
+    # A grip posted to another worker: once this worker's entry lapses, the database read finds it.
+    conn.grip_id = 5
+    time.sleep(0.06)
+    statements = len(conn.statements)
+    fresh = client.post("/api/report/generate", params={"session_id": "s1"})
+    assert fresh.status_code == 200
+    assert sum("FROM measurements" in query for query in conn.statements[statements:]) == 1
+    assert conn.memo_reads == 1
+    assert len(conn.stored_reports) == 2
+
+
+def test_idempotency_key_replays_the_first_response_without_writing(monkeypatch):
+    from backend.catalog import CatalogCache
+    from backend.idempotency import IdempotencyCache, request_fingerprint, scoped_key
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "IDEMPOTENCY", IdempotencyCache(), raising=True)
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+    body = {"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0}
+
+    first = client.post("/api/measurements", json=body, headers={"Idempotency-Key": "m-1"})
+    assert first.status_code == 200
+    inserts = sum("INSERT INTO measurements" in query for query in conn.statements)
+    retry = client.post("/api/measurements", json=body, headers={"Idempotency-Key": "m-1"})
+    assert retry.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert sum("INSERT INTO measurements" in query for query in conn.statements) == inserts == 1
+
+    # Another worker (empty LRU) replays from the shared table, still without writing or scoring.
+    monkeypatch.setattr(api_main, "IDEMPOTENCY", IdempotencyCache(), raising=True)
+    report = client.post("/api/report/generate", params={"session_id": "s1"}, headers={"Idempotency-Key": "r-1"})
+    monkeypatch.setattr(api_main, "IDEMPOTENCY", IdempotencyCache(), raising=True)
+    statements = len(conn.statements)
+    replayed = client.post("/api/report/generate", params={"session_id": "s1"}, headers={"Idempotency-Key": "r-1"})
+    assert replayed.content == report.content
+    assert len(conn.stored_reports) == 1
+    assert [query for query in conn.statements[statements:] if "idempotency_keys" not in query] == []
+
+    # The same key for a different request is refused; failures are not stored, so a retry can succeed.
+    reused = client.post("/api/measurements", json={**body, "width_mm": 93.0}, headers={"Idempotency-Key": "m-1"})
+    assert reused.status_code == 422
+    assert reused.json()["code"] == "idempotency_key_reused"
+    grip = {"session_id": "s1", "grip": "claw", "confidence": 0.9}
+    save_grip = api_main._save_grip
+
+    def failing_save_grip(payload, request):
+        raise api_main.HTTPException(status_code=503, detail={"code": "unavailable", "message": "try again"})
+
+    monkeypatch.setattr(api_main, "_save_grip", failing_save_grip, raising=True)
+    assert client.post("/api/grip", json=grip, headers={"Idempotency-Key": "g-1"}).status_code == 503
+    assert all(row["body"] for row in conn.idempotency_keys.values())
+    monkeypatch.setattr(api_main, "_save_grip", save_grip, raising=True)
+    assert client.post("/api/grip", json=grip, headers={"Idempotency-Key": "g-1"}).status_code == 200
+
+    # A retry racing the original on the same worker is told to wait rather than run twice.
+    fingerprint = request_fingerprint("POST", "/api/grip", "", api_main.GripIn(**grip).model_dump_json())
+    api_main.IDEMPOTENCY.begin(scoped_key(None, "g-2"), fingerprint)
+    racing = client.post("/api/grip", json=grip, headers={"Idempotency-Key": "g-2"})
+    assert racing.status_code == 409
+    assert racing.json()["code"] == "idempotency_key_in_progress"
+
+
+def test_idempotency_key_reused_while_the_original_runs_is_refused_like_after(monkeypatch):
+    from backend.catalog import CatalogCache
+    from backend.idempotency import IdempotencyCache, request_fingerprint, scoped_key
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "IDEMPOTENCY", IdempotencyCache(), raising=True)
+    conn = _ReportConn(rows)
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    client = TestClient(api_main.app)
+    grip = {"session_id": "s1", "grip": "claw", "confidence": 0.9}
+    fingerprint = request_fingerprint("POST", "/api/grip", "", api_main.GripIn(**grip).model_dump_json())
+    other = {**grip, "grip": "palm"}
+
+    # Running on this worker.
+    api_main.IDEMPOTENCY.begin(scoped_key(None, "g-1"), fingerprint)
+    reused = client.post("/api/grip", json=other, headers={"Idempotency-Key": "g-1"})
+    assert reused.status_code == 422
+    assert reused.json()["code"] == "idempotency_key_reused"
+
+    # Running on another worker: its claim row is there without a response yet.
+    claim = {"fingerprint": fingerprint, "status_code": None, "body": None}
+    conn.idempotency_keys[scoped_key(None, "g-2")] = dict(claim)
+    reused = client.post("/api/grip", json=other, headers={"Idempotency-Key": "g-2"})
+    assert reused.status_code == 422
+    assert reused.json()["code"] == "idempotency_key_reused"
+    racing = client.post("/api/grip", json=grip, headers={"Idempotency-Key": "g-2"})
+    assert racing.status_code == 409
+    assert racing.json()["code"] == "idempotency_key_in_progress"
+    assert sum("INSERT INTO grips" in query for query in conn.statements) == 0
+
+
+def test_idempotent_request_takes_one_pool_checkout(monkeypatch):
+    from backend.catalog import CatalogCache
+    from backend.idempotency import IdempotencyCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    monkeypatch.setattr(api_main, "IDEMPOTENCY", IdempotencyCache(), raising=True)
+    conn = _ReportConn(rows)
+    checkouts: list = []
+    pool = SimpleNamespace(connection=lambda: (checkouts.append(1), conn)[1])
+    monkeypatch.setattr(api_main, "get_pool", lambda: pool, raising=True)
+    client = TestClient(api_main.app)
+    grip = {"session_id": "s1", "grip": "claw", "confidence": 0.9}
+
+    assert client.post("/api/grip", json=grip, headers={"Idempotency-Key": "g-1"}).status_code == 200
+    # The claim, the insert and the stored response all went through the one checkout.
+    assert len(checkouts) == 1
+    assert [row["status_code"] for row in conn.idempotency_keys.values()] == [200]
+    assert sum("INSERT INTO grips" in query for query in conn.statements) == 1
+    assert api_main._REQUEST_CONN.get() is None
+    assert client.post("/api/grip", json=grip).status_code == 200
+    assert len(checkouts) == 2
+
+
+def test_fit_score_streams_top_k_per_profile_without_writes(monkeypatch):
+    rows = [
+        {"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]},
+        {"id": "b", "brand": "Bolt", "model": "Large", "length_mm": 126.0, "width_mm": 66.0, "grips": ["palm"]},
+        {"id": "c", "brand": "Core", "model": "Mid", "length_mm": 120.0, "width_mm": 63.0},
+        {"id": "d", "brand": "Dash", "model": "Shell", "length_mm": None, "width_mm": 60.0},
+    ]
+    conn = _use_mice_rows(monkeypatch, rows)
+    # Three profiles per chunk, so the batch below streams in several pieces.
+    monkeypatch.setattr(api_main, "FIT_SCORE_CHUNK_CELLS", 3 * len(rows), raising=True)
+    profiles = [
+        {"id": f"p{idx}", "length_mm": 160.0 + idx * 5, "width_mm": 80.0 + idx * 2, "grip": grip}
+        for idx, grip in enumerate(["claw", "palm", None, "fingertip", "Claw", None, "palm"])
+    ]
+    client = TestClient(api_main.app)
+
+    response = client.post("/api/fit/score", json={"profiles": profiles, "k": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["X-Scoring-Profile"] == "classic"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(profiles)))
+    assert [line["id"] for line in lines] == [item["id"] for item in profiles]
+
+    snapshot = api_main.CATALOG.peek()
+    for item, line in zip(profiles, lines):
+        measurement = api_main.MeasurementOut(
+            session_id="s",
+            length_mm=item["length_mm"],
+            width_mm=item["width_mm"],
+            length_cm=0,
+            width_cm=0,
+            created_at="",
+        )
+        grip = api_main.GripOut(session_id="s", grip=item["grip"], confidence=1, created_at="") if item["grip"] else None
+        expected = api_main.recommend_mice(snapshot, measurement, grip, k=2)
+        assert line["recommendations"] == [rec.model_dump() for rec in expected]
+
+    # Only the catalog snapshot was read; scoring again touches the database not at all.
+    queries = conn.queries
+    shaped = client.post("/api/fit/score", json={"profiles": profiles[:1], "scoring_profile": "shape"})
+    assert shaped.headers["X-Scoring-Profile"] == "shape"
+    assert conn.queries == queries
+    assert client.post("/api/fit/score", json={"profiles": profiles, "scoring_profile": "nope"}).status_code == 400
+    assert client.post("/api/fit/score", json={"profiles": []}).status_code == 422
+
+
+def test_mice_search_serves_typeahead_from_snapshot(monkeypatch):
+    rows = [
+        {"id": "razer-viper", "brand": "Razer", "model": "Viper V3 Pro", "source_handle": "razer-viper"},
+        {"id": "razer-basilisk", "brand": "Razer", "model": "Basilisk", "source_handle": "razer-basilisk"},
+        {"id": "zowie-ec2", "brand": "Zowie", "model": "EC2-C", "source_handle": "zowie-ec2"},
+    ]
+    conn = _use_mice_rows(monkeypatch, rows)
+
+    client = TestClient(api_main.app)
+    response = client.get("/api/mice/search", params={"q": "razer vip"})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == ["razer-viper"]
+    assert response.json()[0]["model"] == "Viper V3 Pro"
+
+    queries = conn.queries
+    assert [item["id"] for item in client.get("/api/mice/search", params={"q": "basilsk"}).json()] == ["razer-basilisk"]
+    assert [item["id"] for item in client.get("/api/mice/search", params={"q": "ra", "limit": 1}).json()] == ["razer-basilisk"]
+    assert conn.queries == queries
+    assert client.get("/api/mice/search", params={"q": ""}).status_code == 422
+
+
+def test_session_writes_take_one_round_trip_each(monkeypatch):
+    from backend.auth import AuthContext
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    api_main.CATALOG.get(lambda: _MiceConn(rows), api_main._mouse_payload)
+    monkeypatch.setattr(api_main.config, "ENABLE_AUTH", True, raising=False)
+    monkeypatch.setattr(
+        api_main,
+        "verify_bearer_token",
+        lambda _token: AuthContext(user_id="user-1", claims={"email": "user@example.com"}),
+        raising=True,
+    )
+    client = TestClient(api_main.app)
+    headers = {"Authorization": "Bearer valid-token"}
+    calls = [
+        (client.post, "/api/measurements", {"json": {"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0}}, 1),
+        (client.post, "/api/grip", {"json": {"session_id": "s1", "grip": "claw", "confidence": 0.9}}, 1),
+        # The report is scored in Python between reading its inputs (and memo) and storing it.
+        (client.post, "/api/report/generate", {"params": {"session_id": "s1"}}, 2),
+    ]
+
+    for method, path, kwargs, round_trips in calls:
+        conn = _ReportConn(rows)
+        monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+        monkeypatch.setattr(api_main, "PROFILE_SEEDS", ProfileSeedCache(), raising=True)
+        assert method(path, headers=headers, **kwargs).status_code == 200, path
+        assert conn.round_trips == round_trips, path
+        assert len(conn.statements) == round_trips, path
+        # The profile upsert rides along as a CTE instead of its own statement.
+        assert conn.profile_upserts == 1, path
+
+    for method, path, kwargs in [
+        (client.get, "/api/me", {}),
+        (client.get, "/api/profile/me", {}),
+        (client.post, "/api/profile/me", {"json": {"display_name": "Lanbo", "theme": "light"}}),
+        (client.post, "/api/survey/complete", {}),
+        (client.post, "/api/survey/dismiss", {}),
+    ]:
+        conn = _ProfileConn()
+        monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+        monkeypatch.setattr(api_main, "PROFILE_SEEDS", ProfileSeedCache(), raising=True)
+        assert method(path, headers=headers, **kwargs).status_code == 200, path
+        assert conn.round_trips == 1, path
+        assert len(conn.statements) == 1 and "RETURNING" in conn.statements[0], path
+
+
+class _BufferCopy:
+    def __init__(self, events: list, statement: str) -> None:
+        self._events = events
+        self._table = statement.split()[1]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def write_row(self, row):
+        self._events.append((self._table, row))
+
+
+class _BufferConn:
+    """What the write-behind flusher COPYs, in order with the statements of later requests."""
+
+    def __init__(self, events: list) -> None:
+        self.events = events
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def cursor(self):
+        return self
+
+    def copy(self, statement):
+        return _BufferCopy(self.events, statement)
+
+    def commit(self):
+        self.events.append("commit")
+
+
+def test_write_behind_buffers_session_rows_and_flushes_before_reports(monkeypatch):
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    api_main.CATALOG.get(lambda: _MiceConn(rows), api_main._mouse_payload)
+    events: list = []
+    buffer = WriteBehindBuffer(flush_interval_sec=60)
+    buffer.start(lambda: _BufferConn(events))
+    monkeypatch.setattr(api_main, "WRITE_BEHIND", buffer, raising=True)
+
+    def no_conn():
+        raise AssertionError("buffered writes must not check out a connection")
+
+    monkeypatch.setattr(api_main, "get_conn", no_conn, raising=True)
+    client = TestClient(api_main.app)
+    try:
+        measured = client.post("/api/measurements", json={"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0})
+        assert measured.status_code == 200 and measured.json()["length_cm"] == 18.0
+        assert client.post("/api/grip", json={"session_id": "s1", "grip": "claw"}).status_code == 200
+        assert events == [] and buffer.has_pending("s1")
+
+        conn = _ReportConn(rows)
+        monkeypatch.setattr(api_main, "get_conn", lambda: (events.append("report"), conn)[1], raising=True)
+        assert client.post("/api/report/generate", params={"session_id": "s1"}).status_code == 200
+        # Both rows are committed, in one batch, before the report reads the session.
+        assert [event if isinstance(event, str) else event[0] for event in events] == [
+            "measurements",
+            "grips",
+            "commit",
+            "report",
+        ]
+        assert events[0][1][:4] == ("s1", None, 180.0, 92.0)
+        assert client.get("/api/metrics").json()["write_behind"]["flushed"] == 2
+    finally:
+        buffer.stop()
+
+
+def test_ingest_validates_ndjson_lines_and_copies_in_one_transaction(monkeypatch):
+    events: list = []
+    checkouts: list = []
+    monkeypatch.setattr(api_main, "get_conn", lambda: (checkouts.append(1), _BufferConn(events))[1], raising=True)
+    lines = [
+        '{"type": "measurement", "session_id": "k1", "length_mm": 181.0, "width_mm": 93.0}',
+        "",
+        '{"type": "grip", "session_id": "k1", "grip": "claw", "confidence": 0.8,'
+        ' "created_at": "2026-10-01T09:30:00+02:00"}',
+        '{"type": "measurement", "session_id": "k2", "length_mm": "long"}',
+        "not json",
+        '{"type": "grip", "session_id": "k2", "grip": "palm", "created_at": "2099-01-01T00:00:00Z"}',
+        '{"type": "grip", "session_id": "k2", "grip": "' + "x" * api_main.MAX_INGEST_LINE_BYTES + '"}',
+        '{"type": "measurement", "session_id": "k2", "length_mm": 175.5, "width_mm": 90.0}',
+    ]
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+    # Chunks split lines mid-record, as a slow upload would.
+    chunks = [body[idx : idx + 37] for idx in range(0, len(body), 37)]
+
+    client = TestClient(api_main.app)
+    response = client.post("/api/ingest", content=iter(chunks), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["accepted"], data["rejected"], data["measurements"], data["grips"]) == (3, 4, 2, 1)
+    assert [(item["line"], item["status"]) for item in data["results"]] == [
+        (1, "accepted"),
+        (3, "accepted"),
+        (4, "rejected"),
+        (5, "rejected"),
+        (6, "rejected"),
+        (7, "rejected"),
+        (8, "accepted"),
+    ]
+    errors = {item["line"]: item["errors"] for item in data["results"] if item["errors"]}
+    assert {error["loc"][-1] for error in errors[4]} == {"length_mm", "width_mm"}
+    assert errors[5][0]["type"] == "json_invalid"
+    assert errors[6][0]["type"] == "created_at_in_future"
+    assert errors[7][0]["type"] == "line_too_long"
+
+    # One checkout, one COPY per table, one commit.
+    assert len(checkouts) == 1
+    assert [event if isinstance(event, str) else event[0] for event in events] == [
+        "measurements",
+        "measurements",
+        "grips",
+        "commit",
+    ]
+    assert events[0][1] == ("k1", None, 181.0, 93.0, 18.1, 9.3, events[0][1][-1])
+    assert events[2][1] == ("k1", None, "claw", 0.8, "2026-10-01T07:30:00+00:00")
+
+
+def test_ingest_rejects_oversized_batches_without_writing(monkeypatch):
+    monkeypatch.setattr(api_main, "MAX_INGEST_RECORDS", 2, raising=True)
+    monkeypatch.setattr(api_main, "get_conn", lambda: pytest.fail("nothing should be written"), raising=True)
+    client = TestClient(api_main.app)
+    line = '{"type": "grip", "session_id": "k1", "grip": "palm"}\n'
+    response = client.post("/api/ingest", content=line * 3)
+    assert response.status_code == 413
+    assert response.json()["code"] == "payload_too_large"
+    empty = client.post("/api/ingest", content="\n\n")
+    assert empty.status_code == 200 and empty.json()["accepted"] == 0
+
+
+def test_repeated_token_seed_skips_profile_upserts(monkeypatch):
+    from backend.auth import AuthContext
+    from backend.catalog import CatalogCache
+
+    rows = [{"id": "a", "brand": "Acme", "model": "Small", "length_mm": 112.0, "width_mm": 60.0, "grips": ["claw"]}]
+    monkeypatch.setattr(api_main, "CATALOG", CatalogCache(check_interval_sec=60), raising=True)
+    api_main.CATALOG.get(lambda: _MiceConn(rows), api_main._mouse_payload)
+    monkeypatch.setattr(api_main.config, "ENABLE_AUTH", True, raising=False)
+    claims = {"email": "user@example.com"}
+    monkeypatch.setattr(
+        api_main,
+        "verify_bearer_token",
+        lambda _token: AuthContext(user_id="user-1", claims=dict(claims)),
+        raising=True,
+    )
+    client = TestClient(api_main.app)
+    headers = {"Authorization": "Bearer valid-token"}
+
+    def measure():
+        conn = _ReportConn(rows)
+        monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+        body = {"session_id": "s1", "length_mm": 180.0, "width_mm": 92.0}
+        assert client.post("/api/measurements", headers=headers, json=body).status_code == 200
+        return conn
+
+    assert measure().profile_upserts == 1
+    repeat = measure()
+    assert repeat.profile_upserts == 0
+    assert not repeat.statements[0].lstrip().startswith("WITH profile")
+
+    # /api/me with the same seed reads the row instead of upserting it.
+    conn = _ProfileConn()
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    assert client.get("/api/me", headers=headers).json()["email"] == "user@example.com"
+    assert len(conn.statements) == 1 and "INSERT" not in conn.statements[0]
+
+    # A changed claim is written again, and the guard leaves an unchanged row alone.
+    claims["email"] = "new@example.com"
+    assert measure().profile_upserts == 1
+    conn = _ProfileConn()
+    conn.profile["email"] = "new@example.com"
+    monkeypatch.setattr(api_main, "get_conn", lambda: conn, raising=True)
+    monkeypatch.setattr(api_main, "PROFILE_SEEDS", ProfileSeedCache(), raising=True)
+    assert client.get("/api/me", headers=headers).status_code == 200
+    assert "IS DISTINCT FROM" in conn.statements[0]
+    assert conn.writes == 0
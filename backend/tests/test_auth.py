@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import sys
+import threading
+import time
 from importlib import util
 from pathlib import Path
 
@@ -67,3 +69,100 @@ def test_verify_bearer_token_preserves_auth_configuration_errors(monkeypatch):
 
     assert exc_info.value.code == "auth_not_configured"
     assert exc_info.value.status_code == 500
+
+
+def test_verified_tokens_are_cached_until_shortly_before_exp(monkeypatch):
+    monkeypatch.setattr(auth_module.config, "ENABLE_AUTH", True, raising=False)
+    monkeypatch.setattr(auth_module, "VERIFIED_TOKENS", auth_module.VerifiedTokenCache(margin_sec=30), raising=True)
+    monkeypatch.setattr(auth_module, "_jwks_client", lambda: _DummyJwkClient(), raising=True)
+    monkeypatch.setattr(auth_module.jwt, "get_unverified_header", lambda _token: {"alg": "ES256"}, raising=True)
+    now = 1_800_000_000.0
+    monkeypatch.setattr(auth_module.time, "time", lambda: now, raising=True)
+    expiry = {"long": now + 3600, "short": now + 10, "none": None}
+    decoded: list[str] = []
+
+    def _fake_decode(token, key, algorithms, audience, issuer, options):
+        decoded.append(token)
+        claims = {"sub": f"user-{token}"}
+        if expiry[token] is not None:
+            claims["exp"] = expiry[token]
+        return claims
+
+    monkeypatch.setattr(auth_module.jwt, "decode", _fake_decode, raising=True)
+
+    first = auth_module.verify_bearer_token("long")
+    assert auth_module.verify_bearer_token("long") is first
+    # Tokens within the margin of expiry, or without exp, are verified every time.
+    for token in ("short", "short", "none", "none"):
+        assert auth_module.verify_bearer_token(token).user_id == f"user-{token}"
+    assert decoded == ["long", "short", "short", "none", "none"]
+    assert auth_module.VERIFIED_TOKENS.stats() == {"hits": 1, "misses": 5, "entries": 1}
+
+    now += 3600 - 30
+    auth_module.verify_bearer_token("long")
+    assert decoded[-1] == "long"
+
+
+def test_verified_token_cache_is_bounded_and_can_be_disabled(monkeypatch):
+    now = 1_800_000_000.0
+    monkeypatch.setattr(auth_module.time, "time", lambda: now, raising=True)
+
+    def context(user_id: str):
+        return auth_module.AuthContext(user_id=user_id, claims={"sub": user_id, "exp": now + 3600})
+
+    cache = auth_module.VerifiedTokenCache(max_entries=2)
+    cache.put("a", context("a"))
+    cache.put("b", context("b"))
+    assert cache.get("a").user_id == "a"  # a is now the most recently used
+    cache.put("c", context("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    disabled = auth_module.VerifiedTokenCache(max_entries=0)
+    disabled.put("a", context("a"))
+    assert disabled.get("a") is None
+
+
+class _GatedJwksEndpoint:
+    """Answers with the key set as it was when the fetch started, once `gate` opens."""
+
+    def __init__(self, kids: list) -> None:
+        self.kids = kids
+        self.gate = threading.Event()
+        self.fetches = 0
+
+    def get_signing_keys(self, refresh: bool = False):
+        self.fetches += 1
+        kids = list(self.kids)
+        self.gate.wait(2.0)
+        return [type("Jwk", (), {"key_id": kid})() for kid in kids]
+
+
+def test_unknown_kid_waits_for_the_refresh_in_flight_then_refetches():
+    import jwt
+
+    cache = auth_module.JwksCache("http://jwks.invalid/keys", min_refetch_sec=30)
+    endpoint = _GatedJwksEndpoint(["old"])
+    cache._client = endpoint
+    # The background refresh starts before the rotation, so the set it brings back lacks the new key.
+    background = threading.Thread(target=cache.refresh)
+    background.start()
+    time.sleep(0.05)
+    endpoint.kids = ["old", "new"]
+    token = jwt.encode({"sub": "u2"}, "secret-of-sufficient-length-for-hs256", algorithm="HS256", headers={"kid": "new"})
+    found: list = []
+    verifier = threading.Thread(target=lambda: found.append(cache.get_signing_key_from_jwt(token).key_id))
+    verifier.start()
+    time.sleep(0.05)
+    assert not found  # waiting on the fetch in flight rather than failing the token
+    endpoint.gate.set()
+    verifier.join(2.0)
+    background.join(2.0)
+    assert found == ["new"]
+    assert endpoint.fetches == 2
+
+    # Within min_refetch_sec an unknown kid fails without another fetch.
+    stranger = jwt.encode({}, "secret-of-sufficient-length-for-hs256", algorithm="HS256", headers={"kid": "other"})
+    with pytest.raises(auth_module.PyJWKClientError):
+        cache.get_signing_key_from_jwt(stranger)
+    assert endpoint.fetches == 2
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from importlib import util
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+spec = util.spec_from_file_location("mousefit_backend_catalog", BACKEND_DIR / "backend" / "catalog.py")
+assert spec and spec.loader
+catalog_module = util.module_from_spec(spec)
+sys.modules[spec.name] = catalog_module
+spec.loader.exec_module(catalog_module)
+
+
+class _CatalogCursor:
+    def __init__(self, conn: "_CatalogConn") -> None:
+        self._conn = conn
+        self._rows: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self._conn.queries.append(query)
+        if "MAX(updated_at)" in query:
+            self._rows = [{"watermark": f"{self._conn.updated_at.timestamp()}:{len(self._conn.rows)}"}]
+            return
+        if "FROM mice" in query:
+            self._rows = [dict(row) for row in self._conn.rows]
+            return
+        raise AssertionError(f"Unexpected query in test double: {query}")
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class _CatalogConn:
+    def __init__(self) -> None:
+        self.updated_at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        self.rows = [
+            {"id": "a-1", "brand": "Acme", "model": "One"},
+            {"id": "b-2", "brand": "Bolt", "model": "Two"},
+        ]
+        self.queries: list[str] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def cursor(self):
+        return _CatalogCursor(self)
+
+
+def test_snapshot_holds_rows_index_and_serialized_list():
+    conn = _CatalogConn()
+    cache = catalog_module.CatalogCache(check_interval_sec=0)
+    snapshot = cache.get(lambda: conn, dict)
+
+    assert [row["id"] for row in snapshot.rows] == ["a-1", "b-2"]
+    assert snapshot.by_id["b-2"]["brand"] == "Bolt"
+    assert json.loads(snapshot.list_json) == conn.rows
+    assert json.loads(snapshot.item_json["a-1"]) == conn.rows[0]
+
+
+def test_snapshot_rebuilds_only_when_watermark_moves():
+    conn = _CatalogConn()
+    cache = catalog_module.CatalogCache(check_interval_sec=0)
+    first = cache.get(lambda: conn, dict)
+    second = cache.get(lambda: conn, dict)
+    assert second is first
+    assert cache.rebuilds == 1
+
+    conn.updated_at += timedelta(seconds=1)
+    conn.rows[0] = {"id": "a-1", "brand": "Acme", "model": "One Pro"}
+    third = cache.get(lambda: conn, dict)
+    assert third is not first
+    assert third.version != first.version
+    assert third.by_id["a-1"]["model"] == "One Pro"
+    assert cache.rebuilds == 2
+
+
+def test_snapshot_skips_watermark_check_within_interval():
+    conn = _CatalogConn()
+    cache = catalog_module.CatalogCache(check_interval_sec=60)
+    cache.get(lambda: conn, dict)
+    conn.queries.clear()
+
+    cache.get(lambda: conn, dict)
+    assert conn.queries == []
+
+    cache.invalidate()
+    cache.get(lambda: conn, dict)
+    assert len(conn.queries) == 1
+
+
+def test_encode_json_matches_stdlib_fallback(monkeypatch):
+    row = {"id": "ü-1", "brand": "Zowie", "length_mm": 120.5, "grips": ["claw"], "links": [{"url": "https://x"}]}
+    fast = catalog_module.encode_json(row)
+    monkeypatch.setattr(catalog_module, "orjson", None)
+    assert catalog_module.encode_json(row) == fast
+
+
+def test_connected_listener_replaces_watermark_polling():
+    conn = _CatalogConn()
+    listener = SimpleNamespace(connected=True)
+    cache = catalog_module.CatalogCache(check_interval_sec=0, listener=listener)
+    first = cache.get(lambda: conn, dict)
+    conn.queries.clear()
+
+    assert cache.get(lambda: conn, dict) is first
+    assert conn.queries == []
+
+    # A notification for the version already being served is a no-op.
+    cache.invalidate(f"{conn.updated_at.timestamp()}:{len(conn.rows)}")
+    cache.get(lambda: conn, dict)
+    assert conn.queries == []
+
+    conn.updated_at += timedelta(seconds=1)
+    cache.invalidate(f"{conn.updated_at.timestamp()}:{len(conn.rows)}")
+    assert cache.get(lambda: conn, dict) is not first
+    assert cache.rebuilds == 2
+
+    listener.connected = False
+    conn.queries.clear()
+    cache.get(lambda: conn, dict)
+    assert len(conn.queries) == 1
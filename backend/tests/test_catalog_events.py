@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import queue
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.catalog_events import CATALOG_CHANNEL, CatalogListener, notify_catalog_changed
+
+
+class _ListenConn:
+    def __init__(self) -> None:
+        self.executed: list[str] = []
+        self.pending: "queue.Queue[str]" = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+
+    def notifies(self, timeout=None):
+        try:
+            yield SimpleNamespace(channel=CATALOG_CHANNEL, payload=self.pending.get(timeout=timeout))
+        except queue.Empty:
+            return
+
+
+def _wait_for(events: list, count: int, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(events) >= count, events
+
+
+def test_listener_listens_outside_pool_and_fans_out_payloads():
+    conn = _ListenConn()
+    calls: list = []
+    listener = CatalogListener(poll_timeout_sec=0.05, connect=lambda conninfo, autocommit: conn)
+    listener.subscribe(calls.append)
+    listener.subscribe(lambda payload: 1 / 0)  # a failing subscriber must not starve the others
+    assert listener.start("postgresql://example")
+    try:
+        _wait_for(calls, 1)
+        assert calls == [None]  # connect => resync
+        assert listener.connected
+        assert conn.executed == [f"LISTEN {CATALOG_CHANNEL}"]
+
+        conn.pending.put("1772323200.000000:464")
+        _wait_for(calls, 2)
+        assert calls[1] == "1772323200.000000:464"
+        assert listener.notifications == 1
+    finally:
+        listener.stop()
+    assert not listener.connected
+
+
+def test_listener_reconnects_and_resyncs_after_connection_loss():
+    attempts: list = []
+    calls: list = []
+    conn = _ListenConn()
+
+    def connect(conninfo, autocommit):
+        attempts.append(conninfo)
+        if len(attempts) == 1:
+            raise OSError("connection refused")
+        return conn
+
+    listener = CatalogListener(reconnect_delay_sec=0.01, poll_timeout_sec=0.05, connect=connect)
+    listener.subscribe(calls.append)
+    listener.start("postgresql://example")
+    try:
+        _wait_for(calls, 1)
+        assert len(attempts) == 2
+        assert listener.connected
+    finally:
+        listener.stop()
+
+
+def test_notify_queues_watermark_on_the_mice_table():
+    executed: list = []
+    cur = SimpleNamespace(execute=lambda query, params: executed.append((query, params)))
+    notify_catalog_changed(cur)
+    query, params = executed[0]
+    assert query.startswith("SELECT pg_notify(%s,") and "FROM mice" in query
+    assert params == (CATALOG_CHANNEL,)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import gzip
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.http_cache import PrecompressedBody, etag_matches, negotiate_encoding
+
+
+def test_negotiate_encoding_respects_server_preference_and_q_values():
+    assert negotiate_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("br;q=0, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*", ("br", "gzip")) == "br"
+    assert negotiate_encoding("", ("br", "gzip")) == "identity"
+    assert negotiate_encoding("deflate", ("br", "gzip")) == "identity"
+
+
+def test_etag_matches_any_coding_variant_of_the_same_version():
+    assert etag_matches('"v1"', "v1")
+    assert etag_matches('"other", "v1-gzip"', "v1")
+    assert etag_matches('W/"v1-br"', "v1")
+    assert etag_matches("*", "v1")
+    assert not etag_matches('"v2"', "v1")
+    assert not etag_matches(None, "v1")
+
+
+def test_precompressed_body_compresses_each_variant_once():
+    raw = b'{"items":[' + b",".join(b'{"id":%d}' % i for i in range(500)) + b"]}"
+    body = PrecompressedBody("v1", raw)
+    first = body.variant("gzip")
+    assert body.variant("gzip") is first
+    assert gzip.decompress(first) == raw
+    assert body.etag("gzip") == '"v1-gzip"'
+    assert body.etag("identity") == '"v1"'
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import partitions  # noqa: E402
+
+
+def _utc(*args: int) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_math_and_partition_names():
+    # Months are UTC: late on Jan 31 in UTC-5 is already February.
+    assert partitions.month_start(datetime(2026, 1, 31, 22, tzinfo=timezone(timedelta(hours=-5)))) == _utc(2026, 2, 1)
+    assert partitions.add_months(_utc(2026, 11, 1), 3) == _utc(2027, 2, 1)
+    assert partitions.add_months(_utc(2026, 1, 1), -13) == _utc(2024, 12, 1)
+
+    name = partitions.partition_name("grips", _utc(2026, 3, 1))
+    assert name == "grips_p202603"
+    assert partitions.partition_month("grips", name) == _utc(2026, 3, 1)
+    assert partitions.partition_month("measurements", name) is None
+    assert partitions.partition_month("grips", "grips_default") is None
+
+
+def test_expired_partitions_are_whole_months_before_the_cutoff():
+    names = ["reports_p202610", "reports_default", "reports_p202508", "reports_p202509", "grips_p202401"]
+    assert partitions.expired_partitions("reports", names, _utc(2025, 10, 1)) == [
+        "reports_p202508",
+        "reports_p202509",
+    ]
+    assert partitions.expired_partitions("reports", names, _utc(2025, 8, 1)) == []
+
+
+def test_session_cutoff_is_the_first_retained_month(monkeypatch):
+    now = _utc(2026, 10, 18, 12)
+    monkeypatch.setattr(partitions.config, "RETAIN_MONTHS", 12)
+    assert partitions.session_cutoff(now) == _utc(2025, 10, 1)
+    monkeypatch.setattr(partitions.config, "RETAIN_MONTHS", 0)
+    assert partitions.session_cutoff(now) == _utc(2026, 10, 1)
+    monkeypatch.setattr(partitions.config, "RETAIN_MONTHS", -1)
+    assert partitions.session_cutoff(now) < _utc(2000, 1, 1)
+
+
+class _CatalogCursor:
+    """pg_catalog answers for partitioned tables; records the DDL and DML it is sent."""
+
+    def __init__(self, partitions: dict, stranded: set) -> None:
+        self.partitions = partitions
+        self.stranded = stranded
+        self.statements: list = []
+        self._rows: list = []
+
+    def execute(self, query, params=None):
+        text = query if isinstance(query, str) else query.as_string(None)
+        self.statements.append(text)
+        if "pg_partitioned_table" in text:
+            self._rows = [{"partitioned": 1}] if params[0] in self.partitions else []
+        elif "pg_inherits" in text:
+            self._rows = [{"relname": name} for name in self.partitions[params[0]]]
+        elif "AS stranded" in text:
+            self._rows = [{"stranded": any(f"'{month}" in text for month in self.stranded)}]
+        else:
+            self._rows = []
+            if "PARTITION OF" in text:
+                name, parent = text.split('"')[1], text.split('"')[3]
+                self.partitions[parent].append(name)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+def test_upcoming_partitions_move_rows_stranded_in_the_default_partition():
+    # grips is partitioned but its job stopped: October rows went to grips_default. reports is not partitioned yet.
+    cur = _CatalogCursor({"measurements": ["measurements_default"], "grips": ["grips_default"]}, {"2026-10"})
+    cur.partitions["measurements"].extend(["measurements_p202610", "measurements_p202611"])
+    created = partitions.ensure_upcoming_partitions(cur, _utc(2026, 10, 18), months_ahead=1)
+    assert created == ["grips_p202610", "grips_p202611"]
+    assert "pg_advisory_xact_lock" in cur.statements[0]
+
+    grips = [text for text in cur.statements if '"grips' in text]
+    october = grips.index(next(text for text in grips if "CREATE TABLE" in text and "grips_p202610" in text))
+    # Out of the default, into a new partition, then back into the parent, all behind a writer lock.
+    assert grips[october - 3].startswith('LOCK TABLE "grips" IN SHARE ROW EXCLUSIVE MODE')
+    assert grips[october - 1].startswith('WITH gone AS (DELETE FROM "grips_default"')
+    assert grips[october + 1] == 'INSERT INTO "grips" SELECT * FROM "grips_p202610_moved"'
+    # November has nothing stranded: a plain CREATE, no lock.
+    assert grips[october + 2].startswith('SELECT EXISTS (SELECT 1 FROM "grips_default"')
+    assert grips[october + 3].startswith('CREATE TABLE IF NOT EXISTS "grips_p202611"')
+    assert len(grips) == october + 4
+    assert not any('"reports' in text for text in cur.statements)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import config  # noqa: E402
+from backend.report_backfill import (  # noqa: E402
+    REPORT_TOP_K,
+    ReportRescorer,
+    StaleReport,
+    changed_mice,
+    memo_version,
+    mouse_fingerprints,
+    refreshed_report,
+)
+from backend.scoring import ColumnarCatalog, score_top_k  # noqa: E402
+from backend.scoring_profiles import CLASSIC, SHAPE  # noqa: E402
+
+OLD_VERSION = "old-catalog"
+
+
+def _catalog_rows():
+    rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))[:120]
+    for idx, row in enumerate(rows):
+        row["id"] = f"seed-{idx}"
+        row["grips"] = [["claw"], ["palm"], [], ["palm", "fingertip"]][idx % 4]
+    return rows
+
+
+def _stored_reports(rows, profile, count=60, seed=11):
+    """Reports as /api/report/generate would have stored them against `rows`."""
+    rng = np.random.default_rng(seed)
+    # Classic compares hand and mouse dimensions directly, so it needs mouse-sized inputs to spread scores.
+    lengths, widths = ((110, 135), (55, 72)) if profile is CLASSIC else ((160, 210), (75, 105))
+    rescorer = ReportRescorer(rows, {})
+    reports = []
+    for idx in range(count):
+        grip = [None, "palm", "claw", "fingertip"][idx % 4]
+        report = {
+            "session_id": f"s{idx}",
+            "measurement": {"length_mm": float(rng.uniform(*lengths)), "width_mm": float(rng.uniform(*widths))},
+            "grip": {"grip": grip} if grip else None,
+            "recommendations": [],
+            "summary": "",
+            "scoring_profile": profile.name,
+        }
+        stale = StaleReport(id=idx + 1, report=report, catalog_version=None)
+        rescored = rescorer.rescore([stale])[0]
+        report = refreshed_report(report, rescored, "2026-10-01T00:00:00+00:00")
+        reports.append(StaleReport(id=idx + 1, report=report, catalog_version=memo_version(OLD_VERSION, profile)))
+    return reports
+
+
+def test_full_rescore_matches_report_scoring():
+    rows = _catalog_rows()
+    catalog = ColumnarCatalog.from_rows(rows)
+    reports = _stored_reports(rows, CLASSIC)
+    for item in reports:
+        measurement = item.report["measurement"]
+        grip = (item.report["grip"] or {}).get("grip")
+        expected = score_top_k(catalog, measurement["length_mm"], measurement["width_mm"], grip, REPORT_TOP_K)
+        assert [rec["id"] for rec in item.report["recommendations"]] == [catalog.ids[w.index] for w in expected]
+        assert [rec["score"] for rec in item.report["recommendations"]] == [w.score for w in expected]
+
+
+def test_unaffected_reports_are_skipped_only_when_top_k_holds():
+    old_rows = _catalog_rows()
+    known = {OLD_VERSION: mouse_fingerprints(old_rows)}
+    rng = np.random.default_rng(4)
+    for profile in (CLASSIC, SHAPE):
+        reports = _stored_reports(old_rows, profile)
+        for _ in range(6):
+            new_rows = copy.deepcopy(old_rows)
+            for idx in rng.choice(len(new_rows), size=3, replace=False):
+                new_rows[idx]["length_mm"] = float(rng.uniform(100, 135))
+                new_rows[idx]["width_mm"] = float(rng.uniform(55, 72))
+            del new_rows[int(rng.integers(len(new_rows)))]
+            assert 1 <= len(changed_mice(known[OLD_VERSION], mouse_fingerprints(new_rows))) <= 4
+
+            results = ReportRescorer(new_rows, known).rescore(reports)
+            full = ReportRescorer(new_rows, {}).rescore(reports)
+            assert [item.id for item in results] == [item.id for item in reports]
+            skipped = 0
+            for item, result, expected in zip(reports, results, full):
+                if result.recommendations is None:
+                    skipped += 1
+                    assert item.report["recommendations"] == expected.recommendations
+                else:
+                    assert result.recommendations == expected.recommendations
+            # A few changed mice among 120 leave most reports untouched.
+            assert skipped > len(reports) // 2
+
+
+def test_unknown_catalog_or_profile_definition_rescores_everything():
+    rows = _catalog_rows()
+    known = {OLD_VERSION: mouse_fingerprints(rows)}
+    reports = _stored_reports(rows, CLASSIC, count=8)
+    assert all(item.recommendations is None for item in ReportRescorer(rows, known).rescore(reports))
+
+    legacy = [StaleReport(id=item.id, report=item.report, catalog_version=None) for item in reports]
+    assert all(item.recommendations is not None for item in ReportRescorer(rows, known).rescore(legacy))
+    redefined = [
+        StaleReport(id=item.id, report=item.report, catalog_version=f"{OLD_VERSION}:classic-00000000")
+        for item in reports
+    ]
+    assert all(item.recommendations is not None for item in ReportRescorer(rows, known).rescore(redefined))
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.rag import retriever  # noqa: E402
+
+
+def test_source_file_edits_recheck_the_index_while_the_listener_is_connected(monkeypatch, tmp_path):
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    dataset = tmp_path / "dataset"
+    dataset.mkdir()
+    (dataset / "mice.json").write_text("[]", encoding="utf-8")
+    monkeypatch.setattr(retriever.config, "RAG_SOURCES_DIR", sources)
+    monkeypatch.setattr(retriever.config, "DATASET_DIR", dataset)
+    monkeypatch.setattr(retriever.config, "RAG_EMBEDDINGS_PATH", tmp_path / "embeddings.json")
+    monkeypatch.setattr(retriever, "CATALOG_LISTENER", SimpleNamespace(connected=True))
+    monkeypatch.setattr(retriever, "_index_checked", False)
+    monkeypatch.setattr(retriever, "_index_files", None)
+    checks: list = []
+    monkeypatch.setattr(retriever, "build_embeddings", lambda rebuild=False: checks.append(rebuild) or 0)
+
+    retriever._ensure_index()
+    retriever._ensure_index()
+    assert len(checks) == 1
+
+    # No notification covers the files on disk; their stat fingerprint does.
+    note = sources / "acme_small.md"
+    note.write_text("Low hump, short shell.", encoding="utf-8")
+    retriever._ensure_index()
+    assert len(checks) == 2
+    os.utime(dataset / "mice.json", ns=(0, 10**18))
+    retriever._ensure_index()
+    retriever._ensure_index()
+    assert len(checks) == 3
+
+    retriever.invalidate_index()
+    retriever._ensure_index()
+    assert len(checks) == 4
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import config  # noqa: E402
+from backend.scoring import ColumnarCatalog, FitLookupGrid, score_top_k, top_k_indices  # noqa: E402
+
+
+def test_top_k_breaks_ties_by_catalog_order():
+    scores = np.array([50.0, 90.0, 70.0, 90.0, -np.inf, 70.0, 10.0])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 5, 0, 6]
+
+
+def test_columnar_catalog_builds_grip_bitmasks_and_skips_missing_dims():
+    catalog = ColumnarCatalog.from_rows(
+        [
+            {"id": "a", "length_mm": 120.0, "width_mm": 60.0, "grips": ["Claw", "palm"]},
+            {"id": "b", "length_mm": None, "width_mm": 60.0, "grips": ["claw"]},
+            {"id": "c", "length_mm": 125.0, "width_mm": 64.0, "grips": []},
+        ]
+    )
+    assert catalog.scorable.tolist() == [True, False, True]
+    assert int(catalog.grip_mask[0]) == catalog.grip_bit("claw") | catalog.grip_bit("palm")
+    assert catalog.grip_bit("fingertip") == 0
+
+    winners = score_top_k(catalog, 125.0, 64.0, "claw", k=5)
+    assert [w.index for w in winners] == [2, 0]
+    assert winners[0].grip_match is None
+    assert winners[1].grip_match is True
+    assert winners[1].score == 96.4
+
+
+def _random_hands(rng, count):
+    # Mostly inside the grid, some on cell edges, a few outside it.
+    hands = [(rng.uniform(145, 225), rng.uniform(65, 115)) for _ in range(count)]
+    hands += [(float(rng.integers(150, 221)), float(rng.integers(70, 111))) for _ in range(count // 4)]
+    return hands
+
+
+def test_fit_grid_matches_full_scan():
+    rng = np.random.default_rng(3)
+    seed_rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))
+    # Synthetic shells sized like hands so scores spread out, on a coarse lattice so many tie.
+    synthetic = [
+        {
+            "id": f"m{idx}",
+            "length_mm": float(rng.integers(150, 220)),
+            "width_mm": float(rng.integers(70, 110)) if idx % 17 else None,
+            "grips": [["claw"], ["palm"], [], ["palm", "fingertip"]][idx % 4],
+        }
+        for idx in range(400)
+    ]
+    for rows in (seed_rows, synthetic):
+        catalog = ColumnarCatalog.from_rows(rows)
+        grid = FitLookupGrid(catalog, validate=True)
+        for length_mm, width_mm in _random_hands(rng, 120):
+            for grip in (None, "claw", "Fingertip", "thumb"):
+                for k in (1, 5, 10):
+                    assert grid.score_top_k(length_mm, width_mm, grip, k) == score_top_k(
+                        catalog, length_mm, width_mm, grip, k
+                    )
+        assert grid.mismatches == 0
+
+    shortlist = FitLookupGrid(ColumnarCatalog.from_rows(synthetic)).shortlist(180.5, 90.5, "claw")
+    assert shortlist is not None and 10 <= len(shortlist) < 400
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend import config  # noqa: E402
+from backend.scoring import ColumnarCatalog, fit_scores, score_top_k  # noqa: E402
+from backend.scoring_profiles import (  # noqa: E402
+    CLASSIC,
+    SHAPE,
+    CategoryPreference,
+    DistancePenalty,
+    Hands,
+    MembershipMatch,
+    ScoringProfile,
+    UnknownProfile,
+    parse_variants,
+    resolve_profile,
+)
+
+
+def test_classic_profile_matches_fit_scores_exactly():
+    rng = np.random.default_rng(5)
+    rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))
+    for idx, row in enumerate(rows):
+        row["grips"] = [["claw"], ["palm", "fingertip"], []][idx % 3]
+    catalog = ColumnarCatalog.from_rows(rows)
+    grips = [None, "palm", "Claw", "fingertip", "thumb"] * 20
+    hands = Hands.of(rng.uniform(150, 220, len(grips)), rng.uniform(70, 110, len(grips)), grips)
+
+    scores = CLASSIC.scores(catalog, hands)
+    top = CLASSIC.top_k(catalog, hands, 5)
+    for row, grip in enumerate(grips):
+        length_mm, width_mm = float(hands.length_mm[row, 0]), float(hands.width_mm[row, 0])
+        assert np.array_equal(scores[row], fit_scores(catalog, length_mm, width_mm, grip)[0])
+        assert top[row] == score_top_k(catalog, length_mm, width_mm, grip, 5)
+
+
+def test_shape_features_use_height_weight_and_labels():
+    catalog = ColumnarCatalog.from_rows(
+        [
+            {"id": "low", "length_mm": 115.0, "width_mm": 62.0, "height_mm": 38.0, "weight_g": 55.0},
+            {"id": "tall", "length_mm": 115.0, "width_mm": 62.0, "height_mm": 44.0, "weight_g": 55.0},
+            {"id": "heavy", "length_mm": 115.0, "width_mm": 62.0, "height_mm": 38.0, "weight_g": 110.0},
+            {"id": "hump", "length_mm": 115.0, "width_mm": 62.0, "hump_bucket": "back", "hump": "High"},
+            {"id": "sized", "length_mm": 115.0, "width_mm": 62.0, "hands": ["Large"], "shape": "Ergo"},
+        ]
+    )
+    assert catalog.categories["hump"].codes.tolist() == [-1, -1, -1, 0, -1]
+    assert catalog.categories["shape"].codes.tolist() == [-1, -1, -1, -1, 0]
+    hands = Hands.of([185.0, 160.0], [90.0, 90.0], ["claw", None])
+
+    height = DistancePenalty("height_mm", 2.0, offset={"claw": 38.5}, tolerance=1.0).evaluate(catalog, hands)
+    assert height[0].tolist() == [0.0, 9.0, 0.0, 0.0, 0.0]
+    # No grip reads the palm setting, which this penalty leaves at 0 mm.
+    assert height[1, 0] == 74.0
+
+    sizes = MembershipMatch("hands", 4.0, 3.0).evaluate(catalog, hands)
+    assert sizes[:, 4].tolist() == [-3.0, -3.0]
+    assert Hands.of([195.0], [90.0], [None]).sizes == ("large",)
+
+    hump = CategoryPreference("hump", {"claw": ("back", "back_high")}, 3.0, 2.0).evaluate(catalog, hands)
+    assert hump.tolist() == [[0.0, 0.0, 0.0, 3.0, 0.0], [0.0] * 5]
+
+    scores = SHAPE.scores(catalog, Hands.of([185.0], [90.0], ["claw"]))[0]
+    assert scores[0] > scores[1] and scores[0] > scores[2]
+
+
+def test_profile_scores_whole_batches_at_once():
+    rows = json.loads((config.DATASET_DIR / "mice.json").read_text(encoding="utf-8"))
+    catalog = ColumnarCatalog.from_rows(rows)
+    grips = ["palm", "claw", "fingertip", None]
+    batch = Hands.of([160.0, 175.0, 190.0, 205.0], [80.0, 85.0, 95.0, 100.0], grips)
+    scores = SHAPE.scores(catalog, batch)
+    assert scores.shape == (4, len(catalog))
+    for row, grip in enumerate(grips):
+        single = Hands.of(batch.length_mm[row], batch.width_mm[row], [grip])
+        assert np.array_equal(scores[row], SHAPE.scores(catalog, single)[0])
+        assert SHAPE.top_k(catalog, batch, 5)[row] == SHAPE.top_k(catalog, single, 5)[0]
+
+
+def test_profile_key_changes_with_weights():
+    tweaked = ScoringProfile(name="classic", fit=(DistancePenalty("length_mm", 1.0, source="length_mm"),))
+    assert CLASSIC.key.startswith("classic-") and tweaked.key != CLASSIC.key
+
+
+def test_resolve_profile_prefers_request_then_ab_split_then_default():
+    variants = parse_variants("classic=1, shape=1")
+    assert variants == (("classic", 1), ("shape", 1))
+    assert resolve_profile("Shape", "s1", variants=variants) is SHAPE
+    assert resolve_profile(None, "s1", default="shape") is SHAPE
+
+    assigned = {session: resolve_profile(None, session, variants=variants) for session in map(str, range(200))}
+    assert {profile.name for profile in assigned.values()} == {"classic", "shape"}
+    assert all(resolve_profile(None, session, variants=variants) is profile for session, profile in assigned.items())
+    assert resolve_profile(None, "s1", variants=(("shape", 1), ("classic", 0))) is SHAPE
+
+    with pytest.raises(UnknownProfile):
+        resolve_profile("nope", "s1")
+    with pytest.raises(UnknownProfile):
+        parse_variants("classic=50,nope=50")
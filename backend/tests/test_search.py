@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.search import SearchIndex, tokenize
+
+ROWS = [
+    {"brand": "Logitech", "model": "G Pro X Superlight", "variant": None, "source_handle": "logitech-g-pro-x-superlight"},
+    {"brand": "Logitech", "model": "G502", "variant": "Hero", "source_handle": "logitech-g502-hero"},
+    {"brand": "Razer", "model": "Viper V3 Pro", "variant": None, "source_handle": "razer-viper-v3-pro"},
+    {"brand": "Razer", "model": "Viper Mini", "variant": "Signature Edition", "source_handle": "razer-viper-mini-se"},
+    {"brand": "Zowie", "model": "EC2-C", "variant": None, "source_handle": "zowie-ec2-c"},
+    {"brand": "Pulsar", "model": "X2", "variant": "Mini", "source_handle": "pulsar-x2-mini"},
+]
+
+
+def _ids(index: SearchIndex, query: str, limit: int = 10):
+    return [hit.index for hit in index.search(query, limit=limit)]
+
+
+def test_tokenize_splits_on_punctuation_and_lowercases():
+    assert tokenize("EC2-C / Hero") == ["ec2", "c", "hero"]
+    assert tokenize(None) == []
+
+
+def test_prefix_typeahead_requires_every_token():
+    index = SearchIndex(ROWS)
+    assert _ids(index, "raz") == [2, 3]
+    assert _ids(index, "razer vi") == [2, 3]
+    assert _ids(index, "razer viper mi") == [3]
+    assert _ids(index, "logitech g5") == [1]
+    assert _ids(index, "ec2") == [4]
+    assert _ids(index, "razer g502") == []
+    assert _ids(index, "   ") == []
+
+
+def test_exact_terms_outrank_prefix_matches():
+    index = SearchIndex(ROWS)
+    # "mini" is a whole term for both; "x2" only exactly matches the Pulsar.
+    assert _ids(index, "mini") == [3, 5]
+    assert _ids(index, "x") == [0, 5]
+    assert [hit.score for hit in index.search("x")] == [3, 2]
+
+
+def test_typos_fall_back_to_edit_distance():
+    index = SearchIndex(ROWS)
+    assert _ids(index, "razr") == [2, 3]
+    assert _ids(index, "logitch g502") == [1]
+    assert _ids(index, "vipre") == [2, 3]
+    assert _ids(index, "qwzx") == []
+
+
+def test_search_matches_brute_force_on_random_catalog():
+    rng = random.Random(7)
+    words = ["viper", "vipe", "orbit", "orb", "pro", "mini", "max", "zeta", "z1", "z10"]
+    rows = [
+        {"brand": rng.choice(["Acme", "Acorn", "Bolt"]), "model": " ".join(rng.sample(words, 2)), "variant": None}
+        for _ in range(3000)
+    ]
+    index = SearchIndex(rows)
+    for query in ["ac", "acme vip", "bolt z1", "or m", "z", "acorn orbit max", "pr"]:
+        tokens = tokenize(query)
+        expected = []
+        for idx, row in enumerate(rows):
+            terms = set(tokenize(row["brand"])) | set(tokenize(row["model"]))
+            if all(any(term.startswith(token) for term in terms) for token in tokens):
+                score = sum(3 if token in terms else 2 for token in tokens)
+                expected.append((-score, idx))
+        expected.sort()
+        assert _ids(index, query, limit=25) == [idx for _, idx in expected[:25]], query
+        # Broad queries are memoized; the second call must agree with the first.
+        assert _ids(index, query, limit=25) == [idx for _, idx in expected[:25]], query
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.session_state import CachedRow, SessionStateCache  # noqa: E402
+
+
+def test_partial_state_misses_until_both_rows_are_written():
+    cache = SessionStateCache()
+    cache.record_write("s1", None, "measurement", 1, "m1")
+    assert cache.get("s1", None) is None
+    cache.record_write("s1", None, "grip", 2, "g2")
+    state = cache.get("s1", None)
+    assert (state.measurement, state.grip) == (CachedRow(1, "m1"), CachedRow(2, "g2"))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Entries are per caller: a user's writes say nothing about the guest rows, or another user's.
+    cache.record_write("s1", "user-1", "measurement", 3, "own-m3")
+    cache.record_write("s1", "user-1", "grip", 4, "own-g4")
+    assert cache.get("s1", "user-1").measurement.id == 3
+    assert cache.get("s1", None).measurement.id == 1
+    assert cache.get("s1", "user-2") is None
+    cache.record_write("s1", "user-1", "grip", 5, "own-g5")
+    assert cache.get("s1", "user-1").grip == CachedRow(5, "own-g5")
+
+
+def test_entries_expire_evict_and_can_be_forgotten():
+    cache = SessionStateCache(ttl_sec=0.05, max_sessions=2)
+
+    def write(session_id):
+        cache.record_write(session_id, None, "measurement", 1, "m")
+        cache.record_write(session_id, None, "grip", 2, "g")
+
+    write("s1")
+    write("s2")
+    assert cache.get("s1", None) is not None  # s1 is now the most recently used
+    write("s3")
+    assert cache.get("s2", None) is None
+    assert cache.get("s1", None) is not None
+    cache.forget("s1")
+    assert cache.get("s1", None) is None
+    time.sleep(0.06)
+    assert cache.get("s3", None) is None
+    # A write after expiry starts over; the other kind is unknown again.
+    cache.record_write("s3", None, "grip", 3, "g3")
+    assert cache.get("s3", None) is None
+
+    disabled = SessionStateCache(ttl_sec=0)
+    disabled.record_write("s1", None, "measurement", 1, "m")
+    disabled.record_write("s1", None, "grip", 2, "g")
+    assert disabled.get("s1", None) is None
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.spatial import FitGridIndex, target_mouse_dims
+
+
+def _brute_force(points, length, width, height, k, tol):
+    out = []
+    for idx, (l, w, h) in enumerate(points):
+        if np.isnan(l) or np.isnan(w):
+            continue
+        deltas = [l - length, w - width] + ([] if height is None else [h - height])
+        if any(np.isnan(d) or abs(d) > tol for d in deltas):
+            continue
+        out.append((float(np.sqrt(sum(d * d for d in deltas))), idx))
+    out.sort()
+    return [idx for _, idx in out[:k]]
+
+
+def test_grid_query_matches_brute_force():
+    rng = np.random.default_rng(3)
+    length = rng.uniform(105, 135, 2000)
+    width = rng.uniform(52, 75, 2000)
+    height = rng.uniform(35, 45, 2000)
+    length[::50] = np.nan
+    height[::7] = np.nan
+    points = list(zip(length, width, height))
+
+    for cell_mm in (None, 0.5, 4.0):
+        index = FitGridIndex(length, width, height, cell_mm=cell_mm)
+        for target, tol in (((120.0, 63.0, None), 4.0), ((121.3, 60.2, 40.0), 6.5), ((200.0, 90.0, None), 10.0)):
+            got = [n.index for n in index.query(*target, k=15, tolerance_mm=tol)]
+            assert got == _brute_force(points, *target, 15, tol)
+
+
+def test_target_mouse_dims_uses_grip_ratios():
+    assert target_mouse_dims(190.0, 95.0, "claw") == (117.8, 64.6)
+    assert target_mouse_dims(190.0, 95.0, None) == target_mouse_dims(190.0, 95.0, "palm")
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import psycopg
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from backend.write_behind import WriteBehindBuffer  # noqa: E402
+
+
+class _Copy:
+    def __init__(self, sink: list, poison: set) -> None:
+        self._sink = sink
+        self._poison = poison
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def write_row(self, row):
+        if row[0] in self._poison:
+            raise psycopg.DataError(f"invalid row for session {row[0]}")
+        self._sink.append(row)
+
+
+class _CopyCursor:
+    def __init__(self, conn) -> None:
+        self._conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self._conn.statements.append(query)
+
+    def copy(self, statement):
+        if self._conn.fail:
+            raise RuntimeError("connection lost")
+        self._conn.statements.append(statement)
+        rows: list = []
+        self._conn.staged.append((statement.split()[1], rows))
+        return _Copy(rows, self._conn.poison)
+
+
+class _CopyConn:
+    """Shared across checkouts; staged COPY rows become visible on commit."""
+
+    def __init__(self) -> None:
+        self.statements: list = []
+        self.staged: list = []
+        self.committed: dict = {"measurements": [], "grips": []}
+        self.commits = 0
+        self.fail = False
+        # Session ids whose rows the database rejects, as it would a value it cannot store.
+        self.poison: set = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.staged = []
+        return False
+
+    def cursor(self):
+        return _CopyCursor(self)
+
+    def commit(self):
+        for table, rows in self.staged:
+            self.committed[table].extend(rows)
+        self.staged = []
+        self.commits += 1
+
+
+class _BlockingCheckout:
+    def __init__(self, conn: _CopyConn, release: threading.Event) -> None:
+        self._conn = conn
+        self._release = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._release.wait(2.0)
+        self._conn.commit()
+
+
+def _measurement(session_id: str, length_mm: float = 180.0):
+    return (session_id, None, length_mm, 92.0, round(length_mm / 10, 2), 9.2, "2026-10-18T00:00:00+00:00")
+
+
+def test_rows_are_copied_in_batches_by_the_background_flusher():
+    conn = _CopyConn()
+    buffer = WriteBehindBuffer(flush_interval_sec=0.02, max_batch=100)
+    buffer.start(lambda: conn)
+    try:
+        for idx in range(250):
+            assert buffer.offer("measurements", _measurement(f"s{idx % 7}", 150.0 + idx))
+        assert buffer.offer("grips", ("s1", None, "claw", 0.9, "2026-10-18T00:00:00+00:00"))
+        deadline = time.monotonic() + 2.0
+        while buffer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        buffer.stop()
+    assert [row[2] for row in conn.committed["measurements"]] == [150.0 + idx for idx in range(250)]
+    assert conn.committed["grips"] == [("s1", None, "claw", 0.9, "2026-10-18T00:00:00+00:00")]
+    # At most max_batch rows per transaction, far fewer commits than rows.
+    assert 3 <= conn.commits < 10
+    assert "COPY measurements (session_id, user_id, length_mm" in conn.statements[0]
+    assert buffer.stats()["flushed"] == 251 and buffer.stats()["pending"] == 0
+
+
+def test_flush_session_gives_read_your_writes_and_stop_drains():
+    conn = _CopyConn()
+    buffer = WriteBehindBuffer(flush_interval_sec=60, synchronous_commit=False)
+    buffer.start(lambda: conn)
+    time.sleep(0.05)  # let the flusher settle into its long wait
+    buffer.offer("measurements", _measurement("s1"))
+    assert buffer.has_pending("s1") and not buffer.has_pending("s2")
+    buffer.flush_session("s2")
+    assert conn.committed["measurements"] == []
+    buffer.flush_session("s1")
+    assert [row[0] for row in conn.committed["measurements"]] == ["s1"]
+    assert not buffer.has_pending("s1")
+    assert conn.statements[0] == "SET LOCAL synchronous_commit = off"
+
+    buffer.offer("measurements", _measurement("s3"))
+    buffer.stop()
+    assert [row[0] for row in conn.committed["measurements"]] == ["s1", "s3"]
+    # A stopped buffer refuses rows, so callers fall back to writing them synchronously.
+    assert not buffer.offer("measurements", _measurement("s4"))
+
+
+def test_full_or_stopped_buffer_refuses_and_failed_flush_keeps_rows():
+    conn = _CopyConn()
+    buffer = WriteBehindBuffer(max_rows=2, flush_interval_sec=60)
+    assert not buffer.offer("measurements", _measurement("s1"))  # not started
+    buffer.start(lambda: conn)
+    try:
+        time.sleep(0.05)
+        assert buffer.offer("measurements", _measurement("s1", 170.0))
+        assert buffer.offer("measurements", _measurement("s1", 171.0))
+        assert not buffer.offer("measurements", _measurement("s1", 172.0))
+        assert buffer.stats()["refused"] == 2
+
+        conn.fail = True
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+        assert buffer.pending == 2 and buffer.has_pending("s1")
+        assert buffer.stats()["failures"] == 1
+
+        conn.fail = False
+        assert buffer.flush() == 2
+        assert [row[2] for row in conn.committed["measurements"]] == [170.0, 171.0]
+    finally:
+        buffer.stop()
+
+
+def test_concurrent_flush_waits_for_the_batch_in_flight():
+    conn = _CopyConn()
+    release = threading.Event()
+    buffer = WriteBehindBuffer(flush_interval_sec=60)
+    buffer.start(lambda: _BlockingCheckout(conn, release))
+    try:
+        time.sleep(0.05)
+        buffer.offer("measurements", _measurement("s1"))
+        worker = threading.Thread(target=buffer.flush)
+        worker.start()
+        time.sleep(0.05)
+        # The row is out of the queue but not committed; a reader must still wait for it.
+        assert buffer.pending == 0 and buffer.has_pending("s1")
+        reader = threading.Thread(target=buffer.flush_session, args=("s1",))
+        reader.start()
+        time.sleep(0.05)
+        assert reader.is_alive()
+        release.set()
+        reader.join(2.0)
+        worker.join(2.0)
+        assert [row[0] for row in conn.committed["measurements"]] == ["s1"]
+    finally:
+        buffer.stop()
+
+
+
+def test_poison_row_is_dead_lettered_and_the_rows_around_it_are_written():
+    conn = _CopyConn()
+    conn.poison = {"bad"}
+    buffer = WriteBehindBuffer(flush_interval_sec=60)
+    buffer.start(lambda: conn)
+    try:
+        time.sleep(0.05)
+        for session_id in ("s1", "s2", "bad", "s3", "s4"):
+            assert buffer.offer("measurements", _measurement(session_id))
+        assert buffer.flush() == 5
+        assert [row[0] for row in conn.committed["measurements"]] == ["s1", "s2", "s3", "s4"]
+        assert [row[0] for _table, row in buffer.dead_letters] == ["bad"]
+        assert not buffer.has_pending("bad") and buffer.pending == 0
+        stats = buffer.stats()
+        assert stats["dead_lettered"] == 1 and stats["flushed"] == 4 and stats["failures"] == 1
+
+        # The queue keeps moving after the poison row.
+        buffer.offer("measurements", _measurement("s5"))
+        buffer.flush_session("s5")
+        assert conn.committed["measurements"][-1][0] == "s5"
+    finally:
+        buffer.stop()
+
+
+def test_rows_that_cannot_be_stored_are_refused_before_they_are_acknowledged():
+    conn = _CopyConn()
+    buffer = WriteBehindBuffer(flush_interval_sec=60)
+    buffer.start(lambda: conn)
+    try:
+        assert not buffer.offer("measurements", _measurement("nul\x00session"))
+        assert not buffer.offer("measurements", _measurement("s1", float("nan")))
+        assert not buffer.offer("grips", ("s1", None, None, 0.9, "2026-10-18T00:00:00+00:00"))
+        assert not buffer.offer("grips", ("s1", None, "claw", 0.9))
+        assert buffer.offer("grips", ("s1", None, "claw", 0.9, "2026-10-18T00:00:00+00:00"))
+        assert buffer.stats()["rejected"] == 4 and buffer.pending == 1
+    finally:
+        buffer.stop()
@@ -1,4 +1,4 @@
-import type { CurrentUser, Grip, Measurement, Mouse, Report, ThemeMode, UserProfile } from "./types";
+import type { CurrentUser, Grip, Measurement, Mouse, MouseSource, NearestMice, Report, ThemeMode, UserProfile } from "./types";
 import { getAccessToken, handleUnauthorizedSession } from "./auth";
 
 declare global {
@@ -128,10 +128,42 @@ export function getMice(): Promise<Mouse[]> {
   return apiJson("/api/mice");
 }
 
+export function getNearestMice(params: {
+  hand_length_mm: number;
+  hand_width_mm: number;
+  grip?: string;
+  height_mm?: number;
+  tolerance_mm?: number;
+  k?: number;
+}): Promise<NearestMice> {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value != null && value !== "") query.set(key, String(value));
+  }
+  return apiJson(`/api/mice/nearest?${query.toString()}`);
+}
+
+export function searchMice(q: string, limit?: number): Promise<Mouse[]> {
+  const query = new URLSearchParams({ q });
+  if (limit != null) query.set("limit", String(limit));
+  return apiJson(`/api/mice/search?${query.toString()}`);
+}
+
 export function getMouse(id: string): Promise<Mouse> {
   return apiJson(`/api/mice/${id}`);
 }
 
+export function getMiceBatch(ids: string[]): Promise<{ mice: Mouse[]; missing: string[] }> {
+  return apiJson("/api/mice/batch", {
+    method: "POST",
+    body: JSON.stringify({ ids }),
+  });
+}
+
+export function getMouseSource(id: string): Promise<MouseSource> {
+  return apiJson(`/api/mice/${id}/source`);
+}
+
 export function saveMeasurement(payload: {
   session_id: string;
   length_mm: number;
@@ -27,7 +27,22 @@ export type Mouse = {
   discount_code?: string | null;
   price_usd?: number | null;
   price_status?: string | null;
-  source_payload?: Record<string, unknown> | null;
+};
+
+export type MouseSource = {
+  id: string;
+  source?: string | null;
+  source_handle?: string | null;
+  payload?: Record<string, unknown> | null;
+  updated_at?: string | null;
+};
+
+export type NearestMice = {
+  target_length_mm: number;
+  target_width_mm: number;
+  target_height_mm?: number | null;
+  tolerance_mm: number;
+  results: Array<{ distance_mm: number; mouse: Mouse }>;
 };
 
 export type Measurement = {